@@ -1534,6 +1534,29 @@ static char* get_op_name( int index ){
     return buffer;
 }
 
+/* adds search statistics of the last planning call to a plan dictionary, returns 0 on success
+ */
+static int set_search_statistics( PyObject* result ){
+    const char* keys[] = {"evaluated_states", "grounded_actions", "grounded_facts"};
+    long values[] = {gevaluated_states, gnum_op_conn, gnum_ft_conn};
+    int i;
+
+    for ( i = 0; i < 3; i++ ) {
+        PyObject* value = PyInt_FromLong(values[i]);
+        if(!value){
+            PyErr_SetString(FFError, "Could not create python int");
+            return -1;
+        }
+        if(PyDict_SetItemString(result, keys[i], value) != 0){
+            PyErr_SetString(FFError, "Could not set search statistics");
+            Py_DecRef(value);
+            return -1;
+        }
+        Py_DecRef(value);
+    }
+    return 0;
+}
+
 static PyObject* get_regular_plan( void ){
     PyObject* result =  PyDict_New();
     if(!result){
@@ -1594,6 +1617,9 @@ static PyObject* get_regular_plan( void ){
         return NULL;
     }
     Py_DecRef(actions);
+    if(set_search_statistics(result) != 0){
+        return NULL;
+    }
     return result;
 }
 
@@ -1683,6 +1709,9 @@ static PyObject* get_special_plan( BfsNode *last ){
         return NULL;
     }
     Py_DecRef(actions);
+    if(set_search_statistics(result) != 0){
+        return NULL;
+    }
     return result;
 }
 
@@ -16,6 +16,21 @@ from rhbp_core.msg import Activation
 import utils.rhbp_logging
 rhbplog = utils.rhbp_logging.LogManager(logger_name=utils.rhbp_logging.LOGGER_DEFAULT_NAME + '.planning')
 
+# kinds of behaviours sharing an influence on an effect, see BaseActivationAlgorithm._create_sharing_behaviours
+_SUPPORTING_EFFECTS = 0  # correlations in the direction of the indicator
+_CONFLICTING_EFFECTS = 1  # correlations against the indicator or any correlation if the indicator is 0
+_SHARED_WISHES = 2  # wishes in the direction of the indicator
+
+# inputs of the spreading terms, see BaseActivationAlgorithm._get_spreading_term
+# term -> tuple(own effects of the behaviour, effect signatures, effect signatures of the activations)
+_spreading_term_dependencies = {
+    'goal_activation': ('correlations', ('correlations', 'goal_wishes'), ()),
+    'goal_inhibition': ('correlations', ('correlations', 'goal_wishes'), ()),
+    'predecessors': ('wishes', ('correlations', 'correlation_states', 'wishes'), ('correlation_activations',)),
+    'successors': ('correlations', ('wishes', 'wish_states', 'correlations'), ('wish_activations',)),
+    'conflictors': ('correlations', ('wishes', 'correlations'), ('wish_activations',)),
+}
+
 
 class AbstractActivationAlgorithm(object):
     """
@@ -32,6 +47,8 @@ class AbstractActivationAlgorithm(object):
         """
         self._manager = manager
         self._extensive_logging = extensive_logging
+        # record and log the activation components of the behaviours, disabled by the manager if nobody needs them
+        self.diagnostics = True
 
     def step_preparation(self):
         """
@@ -126,6 +143,10 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
     Formulas for the inhibition calculations have been changed/improved
     """
 
+    # Reuse the spreading terms of the last step if their inputs did not change, subclasses that compute the terms from
+    # other inputs than the correlations, wishes, states and activations of the behaviours and goals have to disable it
+    cache_spreading_terms = True
+
     def __init__(self, manager, extensive_logging=False, create_log_files=False):
         super(BaseActivationAlgorithm, self).__init__(manager, extensive_logging=extensive_logging)
 
@@ -139,6 +160,17 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
         self._activation_decay = 0.9
         self._goal_priority_weights = {}
         self._apply_goal_priority_weights = False
+        # per step index of the operational behaviours, see _create_index()
+        self._effect_index = {}
+        self._wish_index = {}
+        self._sharing_behaviours = {}
+        # dependency tracking of the spreading terms, see _get_spreading_term()
+        self._effect_signatures = {}
+        self._changed_effects = None  # determined on the first request of a spreading term in a step
+        self._total_activation = None
+        self._total_activation_changed = True
+        self._previous_terms = {}
+        self._terms = {}
 
     def update_config(self, **kwargs):
         """
@@ -172,6 +204,9 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
                         self._situation_bias, self._plan_bias, self._goal_bias, self._apply_goal_priority_weights,
                         self._successor_bias, self._predecessor_bias, self._conflictor_bias, self._activation_decay
                         )
+        # the weights are part of all spreading terms
+        self._previous_terms = {}
+        self._terms = {}
 
     def is_planner_enabled(self):
         return self._plan_bias > 0.0
@@ -183,6 +218,155 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
             self._goal_priority_weights = self._calculate_goal_priority_weights()
             rhbplog.logdebug("Goal prio weights: %s", str(self._goal_priority_weights))
 
+        self._effect_index = self._create_index(lambda b: b.correlations)
+        self._wish_index = self._create_index(lambda b: b.wishes)
+        self._sharing_behaviours = self._create_sharing_behaviours()
+
+        if self.cache_spreading_terms:
+            self._changed_effects = None
+            # terms which are not used in this step are dropped
+            self._previous_terms = self._terms
+            self._terms = {}
+
+    def _update_changed_effects(self):
+        """
+        Determine for every kind of input of the spreading terms the effects whose inputs changed since the last step
+        in which spreading terms were requested
+        """
+        signatures = {
+            'correlations': {},  # index entries
+            'correlation_states': {},  # state of the behaviours with the correlations
+            'correlation_activations': {},
+            'wishes': {},
+            'wish_states': {},
+            'wish_activations': {},
+            'goal_wishes': {},
+        }
+        for name, entries in self._effect_index.iteritems():
+            signatures['correlations'][name] = tuple(entries)
+            signatures['correlation_states'][name] = tuple((b.executable, b.preconditionSatisfaction)
+                                                           for _, b, _ in entries)
+            signatures['correlation_activations'][name] = tuple(b.activation for _, b, _ in entries)
+        for name, entries in self._wish_index.iteritems():
+            signatures['wishes'][name] = tuple(entries)
+            signatures['wish_states'][name] = tuple(b.executable for _, b, _ in entries)
+            signatures['wish_activations'][name] = tuple(b.activation for _, b, _ in entries)
+        goal_wishes = {}
+        for position, goal in enumerate(self._manager.operational_goals):
+            prio_weight = self._goal_priority_weights.get(goal, 1.0) if self._apply_goal_priority_weights else 1.0
+            for wish in goal.wishes:
+                goal_wishes.setdefault(wish.get_pddl_effect_name(), []).append((position, goal, wish.indicator,
+                                                                                prio_weight))
+        signatures['goal_wishes'] = {name: tuple(entries) for name, entries in goal_wishes.iteritems()}
+
+        self._changed_effects = {}
+        for kind, current in signatures.iteritems():
+            previous = self._effect_signatures.get(kind, {})
+            self._changed_effects[kind] = set(name for name in set(previous) | set(current)
+                                              if previous.get(name) != current.get(name))
+        self._effect_signatures = signatures
+
+        self._total_activation_changed = self._manager.totalActivation != self._total_activation
+        self._total_activation = self._manager.totalActivation
+
+    def _get_spreading_term(self, ref_behaviour, term, compute_term):
+        """
+        Reuse a spreading term of the last step if none of its inputs changed, otherwise compute it. The inputs are the
+        own effects of the behaviour and the index entries, states and activations of the other behaviours and goals
+        for these effects. Terms without contributions do not depend on the activations.
+        :param ref_behaviour: the behaviour for which the activation is determined
+        :param term: key of _spreading_term_dependencies
+        :param compute_term: function computing the term, e.g. self.get_activation_from_goals
+        :return: result of compute_term
+        """
+        if not self.cache_spreading_terms or self._extensive_logging:
+            return compute_term(ref_behaviour)
+
+        if self._changed_effects is None:
+            self._update_changed_effects()
+
+        own_effects, input_kinds, activation_kinds = _spreading_term_dependencies[term]
+        signature = tuple((e.get_pddl_effect_name(), e.indicator) for e in getattr(ref_behaviour, own_effects))
+        key = (ref_behaviour, term)
+        cached = self._previous_terms.get(key)
+        result = None
+        if cached is not None and cached[0] == signature:
+            result = cached[1]
+            has_contributions = len(result) > 1
+            if has_contributions and activation_kinds:
+                input_kinds += activation_kinds
+                if self._total_activation_changed:
+                    result = None
+            if result is not None and any(name in self._changed_effects[kind] for kind in input_kinds
+                                          for name, _ in signature):
+                result = None
+        if result is None:
+            result = compute_term(ref_behaviour)
+        self._terms[key] = (signature, result)
+        return result
+
+    def _create_index(self, get_effects):
+        """
+        Index the correlations or wishes of all operational behaviours by effect name, this avoids scanning all
+        behaviours for every wish during the activation spreading
+        :param get_effects: function returning the list of effects of a behaviour
+        :return: dict {effect name: list of tuple(behaviour position, behaviour, indicator)}, the entries are ordered
+                 like the operational behaviours and their effects
+        """
+        index = {}
+        for position, behaviour in enumerate(self._manager.operational_behaviours):
+            for effect in get_effects(behaviour):
+                index.setdefault(effect.get_pddl_effect_name(), []).append((position, behaviour, effect.indicator))
+        return index
+
+    def _create_sharing_behaviours(self):
+        """
+        First phase of the activation spreading: determine once per step which operational behaviours share an
+        influence on an effect in the same direction. The activation is distributed among them, the second phase
+        (the get_* methods of each behaviour) only looks them up with _get_sharing_behaviours()
+        :return: dict {tuple(kind, effect name, direction): list of behaviours in the order of the operational
+                 behaviours}, kind is _SUPPORTING_EFFECTS, _CONFLICTING_EFFECTS or _SHARED_WISHES and direction is
+                 the sign (-1, 0, 1) of the indicator that is compared with the indexed ones
+        """
+        sharing_behaviours = {}
+        for kind, index in [(_SUPPORTING_EFFECTS, self._effect_index), (_CONFLICTING_EFFECTS, self._effect_index),
+                            (_SHARED_WISHES, self._wish_index)]:
+            for effect_name, entries in index.iteritems():
+                for direction in (-1, 0, 1):
+                    behaviours = []
+                    for _, behaviour, x in entries:
+                        if kind == _CONFLICTING_EFFECTS:
+                            selected = x * direction < 0 or (x * direction == 0 and x != 0)
+                        else:
+                            selected = x * direction > 0
+                        # the entries of a behaviour are adjacent
+                        if selected and (not behaviours or behaviours[-1] is not behaviour):
+                            behaviours.append(behaviour)
+                    if behaviours:
+                        sharing_behaviours[(kind, effect_name, direction)] = behaviours
+        return sharing_behaviours
+
+    def _get_sharing_behaviours(self, kind, effect_name, indicator):
+        """
+        :param kind: _SUPPORTING_EFFECTS, _CONFLICTING_EFFECTS or _SHARED_WISHES
+        :param effect_name: effect name
+        :param indicator: indicator of the wish or correlation that is compared with the indexed ones
+        :return: list of the operational behaviours sharing the influence, see _create_sharing_behaviours()
+        """
+        direction = (indicator > 0) - (indicator < 0)
+        return self._sharing_behaviours.get((kind, effect_name, direction), [])
+
+    @staticmethod
+    def _restore_behaviour_order(entries):
+        """
+        The indexed spreading iterates the effects first, sorting the results by the position of the behaviour
+        restores the summation order of iterating the behaviours first, which keeps the results exactly the same
+        :param entries: list of tuple(tuple(behaviour position, effect position), result)
+        :return: list of results
+        """
+        entries.sort(key=lambda entry: entry[0])
+        return [entry[1] for entry in entries]
+
     def _calculate_goal_priority_weights(self, min_weight=1, max_weight=2):
         """
         calculate weights considering the priority of goals
@@ -215,20 +399,26 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
     def compute_behaviour_activation_step(self, ref_behaviour):
 
         activation_precondition = self.get_activation_from_preconditions(ref_behaviour)
-        activation_goals = self.get_activation_from_goals(ref_behaviour)[0]
-        inhibition_goals = self.get_inhibition_from_goals(ref_behaviour)[0]
-        activation_predecessors = self.get_activation_from_predecessors(ref_behaviour)[0]
-        activation_successors = self.get_activation_from_successors(ref_behaviour)[0]
-        inhibition_conflictors = self.get_inhibition_from_conflictors(ref_behaviour)[0]
+        activation_goals = self._get_spreading_term(ref_behaviour, 'goal_activation',
+                                                    self.get_activation_from_goals)[0]
+        inhibition_goals = self._get_spreading_term(ref_behaviour, 'goal_inhibition',
+                                                    self.get_inhibition_from_goals)[0]
+        activation_predecessors = self._get_spreading_term(ref_behaviour, 'predecessors',
+                                                           self.get_activation_from_predecessors)[0]
+        activation_successors = self._get_spreading_term(ref_behaviour, 'successors',
+                                                         self.get_activation_from_successors)[0]
+        inhibition_conflictors = self._get_spreading_term(ref_behaviour, 'conflictors',
+                                                          self.get_inhibition_from_conflictors)[0]
         activation_plan = self.get_activation_from_plan(ref_behaviour)[0]
 
-        rhbplog.loginfo("\t%s: activation from preconditions: %2.3f", ref_behaviour, activation_precondition)
-        rhbplog.loginfo("\t%s: activation from goals: %2.3f", ref_behaviour, activation_goals)
-        rhbplog.loginfo("\t%s: inhibition from goals: %2.3f", ref_behaviour, inhibition_goals)
-        rhbplog.loginfo("\t%s: activation from predecessors: %2.3f", ref_behaviour, activation_predecessors)
-        rhbplog.loginfo("\t%s: activation from successors: %2.3f", ref_behaviour, activation_successors)
-        rhbplog.loginfo("\t%s: inhibition from conflicted: %2.3f", ref_behaviour, inhibition_conflictors)
-        rhbplog.loginfo("\t%s: activation from plan: %2.3f", ref_behaviour, activation_plan)
+        if self.diagnostics:
+            rhbplog.loginfo("\t%s: activation from preconditions: %2.3f", ref_behaviour, activation_precondition)
+            rhbplog.loginfo("\t%s: activation from goals: %2.3f", ref_behaviour, activation_goals)
+            rhbplog.loginfo("\t%s: inhibition from goals: %2.3f", ref_behaviour, inhibition_goals)
+            rhbplog.loginfo("\t%s: activation from predecessors: %2.3f", ref_behaviour, activation_predecessors)
+            rhbplog.loginfo("\t%s: activation from successors: %2.3f", ref_behaviour, activation_successors)
+            rhbplog.loginfo("\t%s: inhibition from conflicted: %2.3f", ref_behaviour, inhibition_conflictors)
+            rhbplog.loginfo("\t%s: activation from plan: %2.3f", ref_behaviour, activation_plan)
 
         current_activation_step = activation_precondition \
                                   + activation_goals \
@@ -239,14 +429,17 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
                                   + activation_plan
 
         ref_behaviour.current_activation_step = current_activation_step
-        ref_behaviour.activation_components = [Activation('Precondition', activation_precondition),
-                                               Activation('Goal', activation_goals),
-                                               Activation('Goal-Inhibition', inhibition_goals),
-                                               Activation('Predecessors', activation_predecessors),
-                                               Activation('Successors', activation_successors),
-                                               Activation('Conflictors', inhibition_conflictors),
-                                               Activation('Plan', activation_plan),
-                                               ]
+        if self.diagnostics:
+            ref_behaviour.activation_components = [Activation('Precondition', activation_precondition),
+                                                   Activation('Goal', activation_goals),
+                                                   Activation('Goal-Inhibition', inhibition_goals),
+                                                   Activation('Predecessors', activation_predecessors),
+                                                   Activation('Successors', activation_successors),
+                                                   Activation('Conflictors', inhibition_conflictors),
+                                                   Activation('Plan', activation_plan),
+                                                   ]
+        elif ref_behaviour.activation_components:
+            ref_behaviour.activation_components = []  # do not publish outdated components later on
 
         return current_activation_step
 
@@ -286,8 +479,8 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
                 wish_name = wish.get_pddl_effect_name()
                 wish_indicator = wish.indicator
                 # Make a list of all behaviours that are positively correlated to a wish of a goal (those behaviours will get activation from the goal).
-                behavioursActivatedBySameGoal = [b for b in self._manager.operational_behaviours if any(
-                    map(lambda x: x * wish_indicator > 0.0, self._matching_effect_indicators(ref_behaviour=b, effect_name=wish_name)))]
+                behavioursActivatedBySameGoal = self._get_sharing_behaviours(_SUPPORTING_EFFECTS, wish_name,
+                                                                             wish_indicator)
                 amount_activated_behaviours = len(behavioursActivatedBySameGoal) if len(behavioursActivatedBySameGoal) > 0 else 1
                 for correlation_indicator in self._matching_effect_indicators(ref_behaviour=ref_behaviour, effect_name=wish_name):
                     if correlation_indicator * wish_indicator > 0.0:  # This means we affect the sensor in a way that is desirable by the goal
@@ -326,9 +519,8 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
                 # Make a list of all active behaviours that inhibit this goal.
                 # Such behaviours are either negatively correlated to the goals wish (would prevent us from reaching the goal)
                 # or the goal's condition has already been reached and the behaviour would undo it (goal's wish indicator is 0 but there is non-zero correlation of the behaviour to that particular sensor)
-                behavioursInhibitedBySameGoal = [b for b in self._manager.operational_behaviours if any(
-                    map(lambda x: x * wish_indicator < 0.0 or (x * wish_indicator == 0.0 and x != 0.0),
-                        self._matching_effect_indicators(ref_behaviour=b, effect_name=wish_name)))]
+                behavioursInhibitedBySameGoal = self._get_sharing_behaviours(_CONFLICTING_EFFECTS, wish_name,
+                                                                             wish_indicator)
                 amount_conflictor_behaviours = len(behavioursInhibitedBySameGoal) if len(
                     behavioursInhibitedBySameGoal) > 0 else 1
                 for correlation_indicator in self._matching_effect_indicators(ref_behaviour=ref_behaviour,
@@ -380,33 +572,31 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
         :type ref_behaviour: Behaviour
         """
         activatedByPredecessors = []
-        for behaviour in self._manager.operational_behaviours:
-            if behaviour == ref_behaviour or not behaviour.executable:  # ignore ourselves and non-executable predecessors
-                continue
-            for wish in ref_behaviour.wishes:  # this is what we wish from a predecessor
-                wish_name = wish.get_pddl_effect_name()
-                wish_indicator = wish.indicator
-                # Make a list of all behaviours that share my wish (those will also get activated by the same predecessor). TODO could be improved by just counting --> less memory
-                behavioursThatShareThisWish = [b for b in self._manager.operational_behaviours if
-                                               any(map(lambda x: x * wish_indicator > 0.0, self._matching_wishes_indicators(ref_behaviour=b, effect_name=wish_name)))]
-                amount_wish_sharing_behaviours = len(behavioursThatShareThisWish) if len(behavioursThatShareThisWish) > 0 else 1
-                # correlations that the behaviour (potential predecessor) has to the sensor of this wish
-                for correlation_indicators in self._matching_effect_indicators(ref_behaviour=behaviour,
-                                                                               effect_name=wish_name):
-                    # If a predecessor can satisfy my precondition
-                    if correlation_indicators * behaviour.preconditionSatisfaction * wish_indicator > 0.0:
-                        totalActivation = correlation_indicators * wish_indicator * (
-                            behaviour.activation / self._manager.totalActivation) * self._predecessor_bias
-                        if self._extensive_logging:
-                            rhbplog.logdebug(
-                                "Calculating activation from predecessors for %s. There is/are %d active successor(s) of %s via %s: %s with total activation of %f",
-                                ref_behaviour.name, amount_wish_sharing_behaviours, behaviour.name, wish_name,
-                                behavioursThatShareThisWish, totalActivation)
-                        # The activation we get is the likeliness that our predecessor fulfills the preconditions soon.
-                        # behavioursThatShareThisWish knows how many more behaviours will get activation from this
-                        # predecessor so we distribute it equally
-                        activatedByPredecessors.append(
-                            (behaviour, wish_name, totalActivation / amount_wish_sharing_behaviours))
+        for wish_position, wish in enumerate(ref_behaviour.wishes):  # this is what we wish from a predecessor
+            wish_name = wish.get_pddl_effect_name()
+            wish_indicator = wish.indicator
+            # Make a list of all behaviours that share my wish (those will also get activated by the same predecessor).
+            behavioursThatShareThisWish = self._get_sharing_behaviours(_SHARED_WISHES, wish_name, wish_indicator)
+            amount_wish_sharing_behaviours = len(behavioursThatShareThisWish) if len(behavioursThatShareThisWish) > 0 else 1
+            # correlations that the behaviours (potential predecessors) have to the sensor of this wish
+            for position, behaviour, correlation_indicators in self._effect_index.get(wish_name, ()):
+                if behaviour == ref_behaviour or not behaviour.executable:  # ignore ourselves and non-executable predecessors
+                    continue
+                # If a predecessor can satisfy my precondition
+                if correlation_indicators * behaviour.preconditionSatisfaction * wish_indicator > 0.0:
+                    totalActivation = correlation_indicators * wish_indicator * (
+                        behaviour.activation / self._manager.totalActivation) * self._predecessor_bias
+                    if self._extensive_logging:
+                        rhbplog.logdebug(
+                            "Calculating activation from predecessors for %s. There is/are %d active successor(s) of %s via %s: %s with total activation of %f",
+                            ref_behaviour.name, amount_wish_sharing_behaviours, behaviour.name, wish_name,
+                            behavioursThatShareThisWish, totalActivation)
+                    # The activation we get is the likeliness that our predecessor fulfills the preconditions soon.
+                    # behavioursThatShareThisWish knows how many more behaviours will get activation from this
+                    # predecessor so we distribute it equally
+                    activatedByPredecessors.append(((position, wish_position),
+                                                    (behaviour, wish_name, totalActivation / amount_wish_sharing_behaviours)))
+        activatedByPredecessors = self._restore_behaviour_order(activatedByPredecessors)
         return (0.0,) if len(activatedByPredecessors) == 0 else (
             reduce(lambda x, y: x + y, (x[2] for x in activatedByPredecessors)), activatedByPredecessors)
 
@@ -418,30 +608,30 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
         :type ref_behaviour: Behaviour
         """
         activatedBySuccessors = []
-        for behaviour in self._manager.operational_behaviours:
-            if behaviour == ref_behaviour or behaviour.executable:  # ignore ourselves and successors that are already executable
-                continue
-            for effect in ref_behaviour.correlations:  # this is what can give to a successor
-                effect_name = effect.get_pddl_effect_name()
-                effect_indicator = effect.indicator
-                # Make a list of all behaviours that are correlated to the same same sensor in the same way as we are. Those are also predecessors like us an get credit from the same successor.
-                behavioursThatShareOurCorrelation = [b for b in self._manager.operational_behaviours if any(
-                    map(lambda x: x * effect_indicator > 0.0, self._matching_effect_indicators(ref_behaviour=b, effect_name=effect_name)))]
-                amount_behaviours_sharing_correlation = len(behavioursThatShareOurCorrelation) if len(behavioursThatShareOurCorrelation) > 0 else 1
-                for wish_indicator in self._matching_wishes_indicators(ref_behaviour=behaviour, effect_name=effect_name):  # if we affect other behaviour's wishes somehow
-                    if wish_indicator * effect_indicator > 0:  # if we are a predecessor so we get activation from that successor
-                        totalActivation = wish_indicator * effect_indicator * (
-                            behaviour.activation / self._manager.totalActivation) * self._successor_bias
-                        if self._extensive_logging:
-                            rhbplog.logdebug(
-                                "Calculating activation from successors for %s. There is/are %d active predecessor(s) of %s via %s: %s and a total activation score of %f",
-                                ref_behaviour.name, amount_behaviours_sharing_correlation, behaviour.name, effect_name,
-                                behavioursThatShareOurCorrelation, totalActivation)
-                        # The activation we get is our expected contribution to the fulfillment of our successors
-                        # precondition. Actually only the value is needed but it is a tuple for debug purposes.
-                        # amount_behaviours_sharing_correlation is used to distribute activation among all predecessors
-                        activatedBySuccessors.append(
-                            (behaviour, effect_name, totalActivation / amount_behaviours_sharing_correlation))
+        for effect_position, effect in enumerate(ref_behaviour.correlations):  # this is what can give to a successor
+            effect_name = effect.get_pddl_effect_name()
+            effect_indicator = effect.indicator
+            # Make a list of all behaviours that are correlated to the same same sensor in the same way as we are. Those are also predecessors like us an get credit from the same successor.
+            behavioursThatShareOurCorrelation = self._get_sharing_behaviours(_SUPPORTING_EFFECTS, effect_name,
+                                                                             effect_indicator)
+            amount_behaviours_sharing_correlation = len(behavioursThatShareOurCorrelation) if len(behavioursThatShareOurCorrelation) > 0 else 1
+            for position, behaviour, wish_indicator in self._wish_index.get(effect_name, ()):  # if we affect other behaviour's wishes somehow
+                if behaviour == ref_behaviour or behaviour.executable:  # ignore ourselves and successors that are already executable
+                    continue
+                if wish_indicator * effect_indicator > 0:  # if we are a predecessor so we get activation from that successor
+                    totalActivation = wish_indicator * effect_indicator * (
+                        behaviour.activation / self._manager.totalActivation) * self._successor_bias
+                    if self._extensive_logging:
+                        rhbplog.logdebug(
+                            "Calculating activation from successors for %s. There is/are %d active predecessor(s) of %s via %s: %s and a total activation score of %f",
+                            ref_behaviour.name, amount_behaviours_sharing_correlation, behaviour.name, effect_name,
+                            behavioursThatShareOurCorrelation, totalActivation)
+                    # The activation we get is our expected contribution to the fulfillment of our successors
+                    # precondition. Actually only the value is needed but it is a tuple for debug purposes.
+                    # amount_behaviours_sharing_correlation is used to distribute activation among all predecessors
+                    activatedBySuccessors.append(((position, effect_position),
+                                                  (behaviour, effect_name, totalActivation / amount_behaviours_sharing_correlation)))
+        activatedBySuccessors = self._restore_behaviour_order(activatedBySuccessors)
         return (0.0,) if len(activatedBySuccessors) == 0 else (
             reduce(lambda x, y: x + y, (x[2] for x in activatedBySuccessors)), activatedBySuccessors)
 
@@ -453,66 +643,62 @@ class BaseActivationAlgorithm(AbstractActivationAlgorithm):
         :type ref_behaviour: Behaviour
         """
         inhibitionFromConflictors = []
-        for behaviour in self._manager.operational_behaviours:
-            if behaviour == ref_behaviour:  # ignore ourselves
-                continue
-            for effect in ref_behaviour.correlations:  # this is what we do to sensors
-                effect_name = effect.get_pddl_effect_name()
-                effect_indicator = effect.indicator
-                for wish_indicator in self._matching_wishes_indicators(ref_behaviour=behaviour,
-                                                                       effect_name=effect_name):
-                    # Make a list of all behaviours that have the same bad influence on other behaviours as we have.
-                    # Such behaviours are either also negatively correlated another behaviour's wish as we are
-                    # or would undo an already satisfied precondition of other behaviours as we would.
-                    behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation = [b for b in
-                                                                                          self._manager.operational_behaviours
-                                                                                          if any(
-                            map(lambda x: x * wish_indicator < 0.0 or (x * wish_indicator == 0.0 and x != 0.0),
-                                self._matching_effect_indicators(ref_behaviour=b, effect_name=effect_name)))]
-                    amount_behaviours_sharing_conflict = len(
-                        behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation) \
-                        if len(behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation) > 0 else 1
-                    if wish_indicator * effect_indicator < 0.0:  # if we make an existing conflict stronger
-                        # We want the inhibition to be stronger if the condition that we would worsen is almost true.
-                        # So we take -(1 - abs(wish * correlation)) as the amount of total inhibition created by this
-                        # (for all wishes*effect != 1), in the other case we take a fixed small inhibition of -0.1
-                        # conflict and divide it by the number of conflictors
-                        if abs(wish_indicator * effect_indicator) == 1:  # without this condition it would result in an inhibition of 0
-                            totalInhibition = -0.1  # just take a fixed small inhibition here
-                        else:
-                            totalInhibition = -(1 - abs(wish_indicator * effect_indicator))
-                        totalInhibition = totalInhibition * (behaviour.activation / self._manager.totalActivation) * \
-                                          self._conflictor_bias  # TODO somehow strange that we use the conflictor bias here
-                        if self._extensive_logging:
-                            rhbplog.logdebug(
-                                "Calculating inhibition from conflicted for %s. %s is worsened via %s by %d behaviour(s): %s with a total score of %f",
-                                ref_behaviour.name, behaviour.name, effect_name,
-                                amount_behaviours_sharing_conflict,
-                                behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation, totalInhibition)
-                        # Actually only the value is needed but it is a tuple for debug purposes. The length of
-                        # behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation says how many more
-                        # behaviours cause the same conflict to this conflictor so its inhibition shall be distributed
-                        # among them.
-                        inhibitionFromConflictors.append(
-                            (behaviour, effect_name, totalInhibition / amount_behaviours_sharing_conflict))
-                    # if we would change the currently existing good state for that behaviour (wish is zero but we have
-                    # non-zero correlation to it)
-                    elif wish_indicator == 0:
-                        totalInhibition = -abs(effect_indicator) * (
-                            behaviour.activation / self._manager.totalActivation) * self._conflictor_bias
-                        if self._extensive_logging:
-                            rhbplog.logdebug(
-                                "Calculating inhibition from conflicted for %s. %s is undone via %s (wish: %f) by %d behaviour(s): %s by a total score of %f",
-                                ref_behaviour.name, behaviour.name, effect_name, wish_indicator,
-                                amount_behaviours_sharing_conflict,
-                                behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation, totalInhibition)
-                        # The inhibition experienced is my bad influence (my correlation to this effect_name) times the
-                        # wish of the other behaviour concerning this effect_name. Actually only the value is needed
-                        # but it is a tuple for debug purposes.
-                        # amount_behaviours_sharing_conflict knows how many more behaviours cause the same harm to this
-                        # conflictor so its inhibition shall be distributed among them.
-                        inhibitionFromConflictors.append(
-                            (behaviour, effect_name, totalInhibition / amount_behaviours_sharing_conflict))
+        for effect_position, effect in enumerate(ref_behaviour.correlations):  # this is what we do to sensors
+            effect_name = effect.get_pddl_effect_name()
+            effect_indicator = effect.indicator
+            for position, behaviour, wish_indicator in self._wish_index.get(effect_name, ()):
+                if behaviour == ref_behaviour:  # ignore ourselves
+                    continue
+                # Make a list of all behaviours that have the same bad influence on other behaviours as we have.
+                # Such behaviours are either also negatively correlated another behaviour's wish as we are
+                # or would undo an already satisfied precondition of other behaviours as we would.
+                behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation = self._get_sharing_behaviours(
+                    _CONFLICTING_EFFECTS, effect_name, wish_indicator)
+                amount_behaviours_sharing_conflict = len(
+                    behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation) \
+                    if len(behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation) > 0 else 1
+                if wish_indicator * effect_indicator < 0.0:  # if we make an existing conflict stronger
+                    # We want the inhibition to be stronger if the condition that we would worsen is almost true.
+                    # So we take -(1 - abs(wish * correlation)) as the amount of total inhibition created by this
+                    # (for all wishes*effect != 1), in the other case we take a fixed small inhibition of -0.1
+                    # conflict and divide it by the number of conflictors
+                    if abs(wish_indicator * effect_indicator) == 1:  # without this condition it would result in an inhibition of 0
+                        totalInhibition = -0.1  # just take a fixed small inhibition here
+                    else:
+                        totalInhibition = -(1 - abs(wish_indicator * effect_indicator))
+                    totalInhibition = totalInhibition * (behaviour.activation / self._manager.totalActivation) * \
+                                      self._conflictor_bias  # TODO somehow strange that we use the conflictor bias here
+                    if self._extensive_logging:
+                        rhbplog.logdebug(
+                            "Calculating inhibition from conflicted for %s. %s is worsened via %s by %d behaviour(s): %s with a total score of %f",
+                            ref_behaviour.name, behaviour.name, effect_name,
+                            amount_behaviours_sharing_conflict,
+                            behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation, totalInhibition)
+                    # Actually only the value is needed but it is a tuple for debug purposes. The length of
+                    # behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation says how many more
+                    # behaviours cause the same conflict to this conflictor so its inhibition shall be distributed
+                    # among them.
+                    inhibitionFromConflictors.append(((position, effect_position),
+                                                      (behaviour, effect_name, totalInhibition / amount_behaviours_sharing_conflict)))
+                # if we would change the currently existing good state for that behaviour (wish is zero but we have
+                # non-zero correlation to it)
+                elif wish_indicator == 0:
+                    totalInhibition = -abs(effect_indicator) * (
+                        behaviour.activation / self._manager.totalActivation) * self._conflictor_bias
+                    if self._extensive_logging:
+                        rhbplog.logdebug(
+                            "Calculating inhibition from conflicted for %s. %s is undone via %s (wish: %f) by %d behaviour(s): %s by a total score of %f",
+                            ref_behaviour.name, behaviour.name, effect_name, wish_indicator,
+                            amount_behaviours_sharing_conflict,
+                            behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation, totalInhibition)
+                    # The inhibition experienced is my bad influence (my correlation to this effect_name) times the
+                    # wish of the other behaviour concerning this effect_name. Actually only the value is needed
+                    # but it is a tuple for debug purposes.
+                    # amount_behaviours_sharing_conflict knows how many more behaviours cause the same harm to this
+                    # conflictor so its inhibition shall be distributed among them.
+                    inhibitionFromConflictors.append(((position, effect_position),
+                                                      (behaviour, effect_name, totalInhibition / amount_behaviours_sharing_conflict)))
+        inhibitionFromConflictors = self._restore_behaviour_order(inhibitionFromConflictors)
         return (0.0,) if len(inhibitionFromConflictors) == 0 else (
             reduce(lambda x, y: x + y, (x[2] for x in inhibitionFromConflictors)), inhibitionFromConflictors)
 
@@ -594,8 +780,8 @@ class UniformActivationAlgorithm(BaseActivationAlgorithm):
                 wish_indicator = wish.indicator
                 # Make a list of all behaviours that are positively correlated to a wish of a goal (those behaviours
                 # will get activation from the goal).
-                behaviours_activated_by_same_goal = [b for b in self._manager.operational_behaviours if any(
-                    map(lambda x: x * wish_indicator > 0.0, self._matching_effect_indicators(ref_behaviour=b, effect_name=wish_name)))]
+                behaviours_activated_by_same_goal = self._get_sharing_behaviours(_SUPPORTING_EFFECTS, wish_name,
+                                                                                 wish_indicator)
                 amount_activated_behaviours = len(behaviours_activated_by_same_goal) if len(behaviours_activated_by_same_goal) > 0 else 1
                 for correlation_indicator in self._matching_effect_indicators(ref_behaviour=ref_behaviour, effect_name=wish_name):
                     # The following condition checks if we affect the sensor in a way that is desirable by the goal
@@ -637,9 +823,8 @@ class UniformActivationAlgorithm(BaseActivationAlgorithm):
                 # Such behaviours are either negatively correlated to the goals wish (would prevent us from reaching the
                 #  goal) or the goal's condition has already been reached and the behaviour would undo it (goal's wish
                 # indicator is 0 but there is non-zero correlation of the behaviour to that particular sensor)
-                behaviours_inhibited_by_same_goal = [b for b in self._manager.operational_behaviours if any(
-                    map(lambda x: x * wish_indicator < 0.0 or (x * wish_indicator == 0.0 and x != 0.0),
-                        self._matching_effect_indicators(ref_behaviour=b, effect_name=wish_name)))]
+                behaviours_inhibited_by_same_goal = self._get_sharing_behaviours(_CONFLICTING_EFFECTS, wish_name,
+                                                                                 wish_indicator)
                 amount_conflictor_behaviours = len(behaviours_inhibited_by_same_goal) if len(
                     behaviours_inhibited_by_same_goal) > 0 else 1
                 for correlation_indicator in self._matching_effect_indicators(ref_behaviour=ref_behaviour,
@@ -675,33 +860,31 @@ class UniformActivationAlgorithm(BaseActivationAlgorithm):
         :type ref_behaviour: Behaviour
         """
         activated_by_predecessors = []
-        for behaviour in self._manager.operational_behaviours:
-            if behaviour == ref_behaviour or not behaviour.executable:  # ignore ourselves and non-executable predecessors
-                continue
-            for wish in ref_behaviour.wishes:  # this is what we wish from a predecessor
-                wish_name = wish.get_pddl_effect_name()
-                wish_indicator = wish.indicator
-                # Make a list of all behaviours that share my wish (those will also get activated by the same predecessor). TODO could be improved by just counting --> less memory
-                behavioursThatShareThisWish = [b for b in self._manager.operational_behaviours if
-                                               any(map(lambda x: x * wish_indicator > 0.0, self._matching_wishes_indicators(ref_behaviour=b, effect_name=wish_name)))]
-                amount_wish_sharing_behaviours = len(behavioursThatShareThisWish) if len(behavioursThatShareThisWish) > 0 else 1
-                # correlations that the behaviour (potential predecessor) has to the sensor of this wish
-                for correlation_indicators in self._matching_effect_indicators(ref_behaviour=behaviour,
-                                                                               effect_name=wish_name):
-                    # If a predecessor can satisfy my precondition
-                    if correlation_indicators * behaviour.preconditionSatisfaction * wish_indicator > 0.0:
-                        total_activation = sqrt(correlation_indicators ** 2 + wish_indicator ** 2) * (
-                            behaviour.activation / self._manager.totalActivation) * self._predecessor_bias
-                        if self._extensive_logging:
-                            rhbplog.logdebug(
-                                "Calculating activation from predecessors for %s. There is/are %d active successor(s) of %s via %s: %s with total activation of %f",
-                                ref_behaviour.name, amount_wish_sharing_behaviours, behaviour.name, wish_name,
-                                behavioursThatShareThisWish, total_activation)
-                        # The activation we get is the likeliness that our predecessor fulfills the preconditions soon.
-                        # behavioursThatShareThisWish knows how many more behaviours will get activation from this
-                        # predecessor so we distribute it equally
-                        activated_by_predecessors.append(
-                            (behaviour, wish_name, total_activation / amount_wish_sharing_behaviours))
+        for wish_position, wish in enumerate(ref_behaviour.wishes):  # this is what we wish from a predecessor
+            wish_name = wish.get_pddl_effect_name()
+            wish_indicator = wish.indicator
+            # Make a list of all behaviours that share my wish (those will also get activated by the same predecessor).
+            behavioursThatShareThisWish = self._get_sharing_behaviours(_SHARED_WISHES, wish_name, wish_indicator)
+            amount_wish_sharing_behaviours = len(behavioursThatShareThisWish) if len(behavioursThatShareThisWish) > 0 else 1
+            # correlations that the behaviours (potential predecessors) have to the sensor of this wish
+            for position, behaviour, correlation_indicators in self._effect_index.get(wish_name, ()):
+                if behaviour == ref_behaviour or not behaviour.executable:  # ignore ourselves and non-executable predecessors
+                    continue
+                # If a predecessor can satisfy my precondition
+                if correlation_indicators * behaviour.preconditionSatisfaction * wish_indicator > 0.0:
+                    total_activation = sqrt(correlation_indicators ** 2 + wish_indicator ** 2) * (
+                        behaviour.activation / self._manager.totalActivation) * self._predecessor_bias
+                    if self._extensive_logging:
+                        rhbplog.logdebug(
+                            "Calculating activation from predecessors for %s. There is/are %d active successor(s) of %s via %s: %s with total activation of %f",
+                            ref_behaviour.name, amount_wish_sharing_behaviours, behaviour.name, wish_name,
+                            behavioursThatShareThisWish, total_activation)
+                    # The activation we get is the likeliness that our predecessor fulfills the preconditions soon.
+                    # behavioursThatShareThisWish knows how many more behaviours will get activation from this
+                    # predecessor so we distribute it equally
+                    activated_by_predecessors.append(((position, wish_position),
+                                                      (behaviour, wish_name, total_activation / amount_wish_sharing_behaviours)))
+        activated_by_predecessors = self._restore_behaviour_order(activated_by_predecessors)
         return (0.0,) if len(activated_by_predecessors) == 0 else \
             (reduce(lambda x, y: x + y, (x[2] for x in activated_by_predecessors)), activated_by_predecessors)
 
@@ -713,31 +896,31 @@ class UniformActivationAlgorithm(BaseActivationAlgorithm):
         :type ref_behaviour: Behaviour
         """
         activated_by_successors = []
-        for behaviour in self._manager.operational_behaviours:
-            if behaviour == ref_behaviour or behaviour.executable:  # ignore ourselves and successors that are already executable
-                continue
-            for effect in ref_behaviour.correlations:  # this is what can give to a successor
-                effect_name = effect.get_pddl_effect_name()
-                effect_indicator = effect.indicator
-                # Make a list of all behaviours that are correlated to the same same sensor in the same way as we are. Those are also predecessors like us an get credit from the same successor.
-                behaviours_with_same_correlation = [b for b in self._manager.operational_behaviours if any(
-                    map(lambda x: x * effect_indicator > 0.0, self._matching_effect_indicators(ref_behaviour=b, effect_name=effect_name)))]
-                amount_behaviours_sharing_correlation = len(behaviours_with_same_correlation) if len(behaviours_with_same_correlation) > 0 else 1
-                for wish_indicator in self._matching_wishes_indicators(ref_behaviour=behaviour, effect_name=effect_name):  # if we affect other behaviour's wishes somehow
-                    if wish_indicator * effect_indicator > 0:  # if we are a predecessor so we get activation from that successor
-                        total_activation = sqrt(wish_indicator ** 2 + effect_indicator ** 2) * (
-                            behaviour.activation / self._manager.totalActivation) * self._successor_bias
-                        if self._extensive_logging:
-                            rhbplog.logdebug("Calculating activation from successors for %s. There is/are %d active "
-                                             "predecessor(s) of %s via %s: %s and a total activation score of %f",
-                                             ref_behaviour.name, amount_behaviours_sharing_correlation, behaviour.name,
-                                             effect_name,
-                                             behaviours_with_same_correlation, total_activation)
-                        # The activation we get is our expected contribution to the fulfillment of our successors
-                        # precondition. Actually only the value is needed but it is a tuple for debug purposes.
-                        # amount_behaviours_sharing_correlation is used to distribute activation among all predecessors
-                        activated_by_successors.append(
-                            (behaviour, effect_name, total_activation / amount_behaviours_sharing_correlation))
+        for effect_position, effect in enumerate(ref_behaviour.correlations):  # this is what can give to a successor
+            effect_name = effect.get_pddl_effect_name()
+            effect_indicator = effect.indicator
+            # Make a list of all behaviours that are correlated to the same same sensor in the same way as we are. Those are also predecessors like us an get credit from the same successor.
+            behaviours_with_same_correlation = self._get_sharing_behaviours(_SUPPORTING_EFFECTS, effect_name,
+                                                                            effect_indicator)
+            amount_behaviours_sharing_correlation = len(behaviours_with_same_correlation) if len(behaviours_with_same_correlation) > 0 else 1
+            for position, behaviour, wish_indicator in self._wish_index.get(effect_name, ()):  # if we affect other behaviour's wishes somehow
+                if behaviour == ref_behaviour or behaviour.executable:  # ignore ourselves and successors that are already executable
+                    continue
+                if wish_indicator * effect_indicator > 0:  # if we are a predecessor so we get activation from that successor
+                    total_activation = sqrt(wish_indicator ** 2 + effect_indicator ** 2) * (
+                        behaviour.activation / self._manager.totalActivation) * self._successor_bias
+                    if self._extensive_logging:
+                        rhbplog.logdebug("Calculating activation from successors for %s. There is/are %d active "
+                                         "predecessor(s) of %s via %s: %s and a total activation score of %f",
+                                         ref_behaviour.name, amount_behaviours_sharing_correlation, behaviour.name,
+                                         effect_name,
+                                         behaviours_with_same_correlation, total_activation)
+                    # The activation we get is our expected contribution to the fulfillment of our successors
+                    # precondition. Actually only the value is needed but it is a tuple for debug purposes.
+                    # amount_behaviours_sharing_correlation is used to distribute activation among all predecessors
+                    activated_by_successors.append(((position, effect_position),
+                                                    (behaviour, effect_name, total_activation / amount_behaviours_sharing_correlation)))
+        activated_by_successors = self._restore_behaviour_order(activated_by_successors)
         return (0.0,) if len(activated_by_successors) == 0 else \
             (reduce(lambda x, y: x + y, (x[2] for x in activated_by_successors)), activated_by_successors)
 
@@ -749,48 +932,44 @@ class UniformActivationAlgorithm(BaseActivationAlgorithm):
         :type ref_behaviour: Behaviour
         """
         inhibition_from_conflictors = []
-        for behaviour in self._manager.operational_behaviours:
-            if behaviour == ref_behaviour:  # ignore ourselves
-                continue
-            for effect in ref_behaviour.correlations:  # this is what we do to sensors
-                effect_name = effect.get_pddl_effect_name()
-                effect_indicator = effect.indicator
-                for wish_indicator in self._matching_wishes_indicators(ref_behaviour=behaviour,
-                                                                       effect_name=effect_name):
-                    # Make a list of all behaviours that have the same bad influence on other behaviours as we have.
-                    # Such behaviours are either also negatively correlated another behaviour's wish as we are
-                    # or would undo an already satisfied precondition of other behaviours as we would.
-                    behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation = [b for b in
-                                                                                          self._manager.operational_behaviours
-                                                                                          if any(
-                            map(lambda x: x * wish_indicator < 0.0 or (x * wish_indicator == 0.0 and x != 0.0),
-                                self._matching_effect_indicators(ref_behaviour=b, effect_name=effect_name)))]
-                    amount_behaviours_sharing_conflict = len(
-                        behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation) \
-                        if len(behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation) > 0 else 1
-
-                    # first term: if we make an existing conflict stronger
-                    # second term: if we would change the currently existing good state for that behaviour
-                    #              (wish is zero but we have non-zero correlation to it)
-                    if wish_indicator * effect_indicator < 0.0 \
-                            or wish_indicator * effect_indicator == 0.0 and wish_indicator == 0:
-
-                        total_inhibition = - sqrt(wish_indicator ** 2 + effect_indicator ** 2) * \
-                                           (behaviour.activation / self._manager.totalActivation) * \
-                                           self._conflictor_bias  # TODO somehow strange that we use the conflictor bias here
-                        if self._extensive_logging:
-                            rhbplog.logdebug(
-                                "Calculating inhibition from conflicted for %s. %s is worsened via %s by %d behaviour(s): %s with a total score of %f",
-                                ref_behaviour.name, behaviour.name, effect_name,
-                                amount_behaviours_sharing_conflict,
-                                behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation, total_inhibition)
-                        # Actually only the value is needed but it is a tuple for debug purposes. The length of
-                        # behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation says how many more
-                        # behaviours cause the same conflict to this conflictor so its inhibition shall be distributed
-                        # among them.
-                        inhibition_from_conflictors.append(
-                            (behaviour, effect_name, total_inhibition / amount_behaviours_sharing_conflict))
-
+        for effect_position, effect in enumerate(ref_behaviour.correlations):  # this is what we do to sensors
+            effect_name = effect.get_pddl_effect_name()
+            effect_indicator = effect.indicator
+            for position, behaviour, wish_indicator in self._wish_index.get(effect_name, ()):
+                if behaviour == ref_behaviour:  # ignore ourselves
+                    continue
+                # Make a list of all behaviours that have the same bad influence on other behaviours as we have.
+                # Such behaviours are either also negatively correlated another behaviour's wish as we are
+                # or would undo an already satisfied precondition of other behaviours as we would.
+                behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation = self._get_sharing_behaviours(
+                    _CONFLICTING_EFFECTS, effect_name, wish_indicator)
+                amount_behaviours_sharing_conflict = len(
+                    behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation) \
+                    if len(behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation) > 0 else 1
+
+                # first term: if we make an existing conflict stronger
+                # second term: if we would change the currently existing good state for that behaviour
+                #              (wish is zero but we have non-zero correlation to it)
+                if wish_indicator * effect_indicator < 0.0 \
+                        or wish_indicator * effect_indicator == 0.0 and wish_indicator == 0:
+
+                    total_inhibition = - sqrt(wish_indicator ** 2 + effect_indicator ** 2) * \
+                                       (behaviour.activation / self._manager.totalActivation) * \
+                                       self._conflictor_bias  # TODO somehow strange that we use the conflictor bias here
+                    if self._extensive_logging:
+                        rhbplog.logdebug(
+                            "Calculating inhibition from conflicted for %s. %s is worsened via %s by %d behaviour(s): %s with a total score of %f",
+                            ref_behaviour.name, behaviour.name, effect_name,
+                            amount_behaviours_sharing_conflict,
+                            behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation, total_inhibition)
+                    # Actually only the value is needed but it is a tuple for debug purposes. The length of
+                    # behavioursThatConflictWithThatBehaviourBecauseOfTheSameCorrelation says how many more
+                    # behaviours cause the same conflict to this conflictor so its inhibition shall be distributed
+                    # among them.
+                    inhibition_from_conflictors.append(((position, effect_position),
+                                                        (behaviour, effect_name, total_inhibition / amount_behaviours_sharing_conflict)))
+
+        inhibition_from_conflictors = self._restore_behaviour_order(inhibition_from_conflictors)
         return (0.0,) if len(inhibition_from_conflictors) == 0 else \
             (reduce(lambda x, y: x + y, (x[2] for x in inhibition_from_conflictors)), inhibition_from_conflictors)
 
@@ -14,8 +14,9 @@ from std_srvs.srv import Empty, EmptyResponse
 from rhbp_core.msg import Status
 from rhbp_core.srv import AddBehaviour, GetStatus, GetStatusResponse, Enable, EnableResponse, SetInteger, \
     SetIntegerResponse, GetPDDL, GetPDDLResponse, RemoveBehaviour
-from .pddl import PDDL, mergeStatePDDL, create_valid_pddl_name
+from .pddl import PDDL, PDDLState, create_valid_pddl_name
 from .condition_elements import Effect, Wish
+from .component_registry import ComponentRegistry, ComponentServiceProxy, StatusPublisher, MessageListRevision
 from utils.misc import FinalInitCaller, LogFileWriter
 from utils.deprecation import deprecated
 from utils.sensor_value_transformer import SensorValueTransformer
@@ -72,6 +73,10 @@ class Behaviour(object):
         self._behaviour_type = behaviour_type
         self.activation_components = []  # list(Activation) public as only used for logging
         self._sensor_values = []
+        self._correlations_revision = 0  # revision of the correlations, 0 if unknown
+        self._wishes_revision = 0  # revision of the wishes, 0 if unknown
+        self.__action_pddl = PDDL(statement="", predicates=[], functions=[])  # last received action PDDL
+        self.__action_pddl_revision = 0  # revision of the last received action PDDL, 0 if unknown
         Behaviour._instanceCounter += 1
 
         self._log_file_path_prefix = log_file_path_prefix
@@ -83,10 +88,20 @@ class Behaviour(object):
                 rhbplog.logerr("Failed to create log files in behaviour '%s': %s", self._name,
                              traceback.format_exc())
 
+        # connections to the services of the actual behaviour node, they are established on first use or replaced by
+        # direct calls if the behaviour lives in the same process
+        self.__get_status_service = ComponentServiceProxy(self._service_prefix + Behaviour.SERVICE_NAME_GET_STATUS,
+                                                          GetStatus, timeout=self.SERVICE_TIMEOUT)
+        self.__get_pddl_service = ComponentServiceProxy(self._service_prefix + Behaviour.SERVICE_NAME_GET_PDDL,
+                                                        GetPDDL)
+        self.__start_service = ComponentServiceProxy(self._service_prefix + Behaviour.SERVICE_NAME_START, Empty)
+        self.__stop_service = ComponentServiceProxy(self._service_prefix + Behaviour.SERVICE_NAME_STOP, Empty)
+
         if (self.__requires_execution_steps):
-            rospy.wait_for_service(self._service_prefix + Behaviour.SERVICE_NAME_EXECUTION_STEP)
-            self.__execution_step_service = rospy.ServiceProxy(self._service_prefix + Behaviour.SERVICE_NAME_EXECUTION_STEP,
-                                                               Empty)
+            self.__execution_step_service = ComponentServiceProxy(
+                self._service_prefix + Behaviour.SERVICE_NAME_EXECUTION_STEP, Empty)
+            if not self.__execution_step_service.local:
+                rospy.wait_for_service(self.__execution_step_service.name)
         else:
             self.__execution_step_service = None
 
@@ -104,46 +119,64 @@ class Behaviour(object):
         '''
         This method fetches the status from the actual behaviour node via GetStatus service call
         '''
+        status = self.request_status(current_step)
+        if status is not None:
+            self.update_status(status)
+
+    def request_status(self, current_step):
+        '''
+        This method requests the status from the actual behaviour node via GetStatus service call without applying it.
+        Only service timeouts are directly handled, which makes it safe to call it concurrently for different behaviours.
+        :return: the Status message or None in case of errors
+        '''
         self._justFinished = False
-        service_name = self._service_prefix + Behaviour.SERVICE_NAME_GET_STATUS
         try:
-
-            rhbplog.logdebug("Waiting for service %s", service_name)
-            rospy.wait_for_service(service_name, timeout=self.SERVICE_TIMEOUT)
+            return self.__get_status_service(current_step=current_step,
+                                             correlations_revision=self._correlations_revision,
+                                             wishes_revision=self._wishes_revision).status
         except rospy.ROSInterruptException:  # ros shutdown
             self._handle_service_timeout(logging_enabled=False)
-            return
-        except rospy.ROSException:
+        except rospy.ServiceException:
+            rhbplog.logerr("ROS service exception in 'fetchStatus' of behaviour '%s': %s", self._name, traceback.format_exc())
+        except rospy.ROSException:  # timeout while waiting for the service
             self._handle_service_timeout(logging_enabled=True)
-            return
-        try:
-            getStatusRequest = rospy.ServiceProxy(service_name, GetStatus)
-            status = getStatusRequest(current_step=current_step).status
-            self._activationFromPreconditions = status.activation
+        return None
+
+    def update_status(self, status):
+        '''
+        This method applies a status message of the actual behaviour node, e.g. received by fetchStatus() or a batched
+        status request of the manager
+        :param status: the Status message
+        '''
+        self._justFinished = False
+        self._activationFromPreconditions = status.activation
+        # already parsed correlations and wishes are reused if the revision has not changed
+        if not status.correlations_revision or status.correlations_revision != self._correlations_revision:
             self._correlations = [Effect.from_msg(correlation) for correlation in status.correlations]
-            self._preconditionSatisfaction = status.satisfaction
-            self._readyThreshold = status.threshold
-            self._sensor_values = status.sensor_values # for rl
+            self._correlations_revision = status.correlations_revision
+        self._preconditionSatisfaction = status.satisfaction
+        self._readyThreshold = status.threshold
+        self._sensor_values = status.sensor_values # for rl
+        if not status.wishes_revision or status.wishes_revision != self._wishes_revision:
             self._wishes = [Wish.from_wish_msg(wish) for wish in status.wishes]
-            if self._isExecuting is True and status.isExecuting is False:
-                rhbplog.loginfo("%s finished. resetting activation", self._name)
-                if self._reset_activation:
-                    self._activation = 0.0
-                self._executionTime = -1
-                self._justFinished = True
-            self._isExecuting = status.isExecuting
-            self._active = status.active
-            self._priority = status.priority
-            self._interruptable = status.interruptable
-            self._enabled = status.enabled
-            self._executionTimeout = status.executionTimeout
-            if self._name != status.name:
-                rhbplog.logerr("%s fetched a status message from a different behaviour: %s. This cannot happen!", self._name, status.name)
-            rhbplog.logdebug("%s reports the following status:\nactivation %s\ncorrelations %s\nprecondition satisfaction %s\n ready threshold %s\nwishes %s\nactive %s\npriority %d\ninterruptable %s",
-                             self._name, self._activationFromPreconditions, self._correlations, self._preconditionSatisfaction,
-                             self._readyThreshold, self._wishes, self._active, self._priority, self._interruptable)
-        except rospy.ServiceException as e:
-            rhbplog.logerr("ROS service exception in 'fetchStatus' of behaviour '%s': %s", self._name, traceback.format_exc())
+            self._wishes_revision = status.wishes_revision
+        if self._isExecuting is True and status.isExecuting is False:
+            rhbplog.loginfo("%s finished. resetting activation", self._name)
+            if self._reset_activation:
+                self._activation = 0.0
+            self._executionTime = -1
+            self._justFinished = True
+        self._isExecuting = status.isExecuting
+        self._active = status.active
+        self._priority = status.priority
+        self._interruptable = status.interruptable
+        self._enabled = status.enabled
+        self._executionTimeout = status.executionTimeout
+        if self._name != status.name:
+            rhbplog.logerr("%s fetched a status message from a different behaviour: %s. This cannot happen!", self._name, status.name)
+        rhbplog.logdebug("%s reports the following status:\nactivation %s\ncorrelations %s\nprecondition satisfaction %s\n ready threshold %s\nwishes %s\nactive %s\npriority %d\ninterruptable %s",
+                         self._name, self._activationFromPreconditions, self._correlations, self._preconditionSatisfaction,
+                         self._readyThreshold, self._wishes, self._active, self._priority, self._interruptable)
 
     def _handle_service_timeout(self, logging_enabled=True):
         """
@@ -163,13 +196,15 @@ class Behaviour(object):
         It returns a tuple of (action_pddl, state_pddl).
         :param update_computation: set to true if you want to force sensor/function state updates.
         '''
-        service_name = self._service_prefix + Behaviour.SERVICE_NAME_GET_PDDL
-        rhbplog.logdebug("Waiting for service %s", service_name)
-        rospy.wait_for_service(service_name)
         try:
-            getPDDLRequest = rospy.ServiceProxy(service_name, GetPDDL)
-            pddl = getPDDLRequest(update_computation=update_computation)
-            return (PDDL(statement=pddl.actionStatement, predicates=pddl.actionPredicates, functions=pddl.actionFunctions), \
+            pddl = self.__get_pddl_service(update_computation=update_computation,
+                                           action_revision=self.__action_pddl_revision)
+            # the action PDDL is only transmitted and recreated if it has changed
+            if not pddl.actionRevision or pddl.actionRevision != self.__action_pddl_revision:
+                self.__action_pddl = PDDL(statement=pddl.actionStatement, predicates=pddl.actionPredicates,
+                                          functions=pddl.actionFunctions)
+                self.__action_pddl_revision = pddl.actionRevision
+            return (self.__action_pddl, \
                    PDDL(statement=pddl.stateStatement, predicates=pddl.statePredicates, functions=pddl.stateFunctions))
         except rospy.ServiceException:
             rhbplog.logerr("ROS service exception in 'fetchPDDL' of behaviour '%s': %s", self._name, traceback.format_exc())
@@ -182,22 +217,15 @@ class Behaviour(object):
         assert not self._isExecuting
         self._isExecuting = True
         self._executionTime = 0
-        service_name = self._service_prefix + Behaviour.SERVICE_NAME_START
         try:
-            try:
-                rhbplog.logdebug("Waiting for service %s", service_name)
-                rospy.wait_for_service(service_name)
-            except rospy.ROSInterruptException:  # ros shutdown
-                self._handle_service_timeout(logging_enabled=False)
-                return
-            except rospy.ROSException:
-                self._handle_service_timeout(logging_enabled=True)
-                return
-            startRequest = rospy.ServiceProxy(service_name, Empty)
-            startRequest()
+            self.__start_service()
             rhbplog.loginfo("Started %s", self._name)
+        except rospy.ROSInterruptException:  # ros shutdown
+            self._handle_service_timeout(logging_enabled=False)
         except rospy.ServiceException:
             rhbplog.logerr("ROS service exception in 'start' of behaviour '%s': %s", self._name, traceback.format_exc())
+        except rospy.ROSException:
+            self._handle_service_timeout(logging_enabled=True)
 
     def stop(self, reset_activation=True):
         '''
@@ -207,27 +235,20 @@ class Behaviour(object):
         '''
         assert self._isExecuting
         self._executionTime = -1
-        service_name = self._service_prefix + Behaviour.SERVICE_NAME_STOP
         if reset_activation:
             self.reset_activation()
 
         try:
-            try:
-                rhbplog.logdebug("Waiting for service %s", service_name)
-                rospy.wait_for_service(service_name)
-            except rospy.ROSInterruptException:  # ros shutdown
-                self._handle_service_timeout(logging_enabled=False)
-                return
-            except rospy.ROSException:
-                self._handle_service_timeout(logging_enabled=True)
-                return
-            stopRequest = rospy.ServiceProxy(service_name, Empty)
-            stopRequest()
+            self.__stop_service()
             self._isExecuting = False
             rhbplog.logdebug("Stopped %s", self._name)
+        except rospy.ROSInterruptException:  # ros shutdown
+            self._handle_service_timeout(logging_enabled=False)
         except rospy.ServiceException:
             rhbplog.logerr("ROS service exception in 'stop' of behaviour '%s': %s", self._name, traceback.format_exc())
             self._isExecuting = True  # not successfully stopped, hence its still running
+        except rospy.ROSException:
+            self._handle_service_timeout(logging_enabled=True)
 
     def reset_activation(self):
         self._reset_activation = True
@@ -246,6 +267,14 @@ class Behaviour(object):
     @property
     def correlations(self):
         return self._correlations
+
+    @property
+    def correlations_revision(self):
+        return self._correlations_revision
+
+    @property
+    def wishes_revision(self):
+        return self._wishes_revision
     
     @property
     def activation(self):
@@ -358,6 +387,10 @@ class Behaviour(object):
     def behaviour_type(self):
         return self._behaviour_type
 
+    @property
+    def service_prefix(self):
+        return self._service_prefix
+
     
     def __str__(self):
         return self._name
@@ -402,6 +435,10 @@ class BehaviourBase(object):
         self._interruptable = kwargs["interruptable"] if "interruptable" in kwargs else True
         # This is the threshold that the preconditions must reach in order for this behaviour to be executable.
         self._actionCost = kwargs["actionCost"] if "actionCost" in kwargs else 1.0
+        # the action PDDL is cached and only regenerated if the effects, preconditions, readyThreshold or actionCost
+        # have changed
+        self._action_pddl_revision = MessageListRevision()
+        self._action_pddl_cache = None  # tuple(revision, action PDDL)
         # The priority indicators are unsigned ints. The higher the more important
         self._priority = kwargs["priority"] if "priority" in kwargs else 0
         # This determines whether the manager will treat it as an error and re-plan if the behaviour is running but
@@ -425,6 +462,11 @@ class BehaviourBase(object):
         """
         Init all required ROS services that are provided by the behaviour
         """
+        # revisions allow to skip unchanged correlations and wishes in the status messages, they have to exist before
+        # the status service and registry entry make the status callback reachable
+        self._correlations_revision = MessageListRevision()
+        self._wishes_revision = MessageListRevision()
+
         service_prefix = self._planner_prefix + '/' + self._name + '/'
         self._getStatusService = rospy.Service(service_prefix + Behaviour.SERVICE_NAME_GET_STATUS, GetStatus,
                                                self._get_status_callback)
@@ -441,12 +483,22 @@ class BehaviourBase(object):
 
         self._registered = False  # keeps track of behaviour registration state
 
+        # pushes the status to managers running in push mode, created on registration if required
+        self._status_publisher = None
+
         if self._requires_execution_steps:
             self.__execution_step_service = rospy.Service(service_prefix + Behaviour.SERVICE_NAME_EXECUTION_STEP, Empty,
                                                           self.do_step_callback)
         else:
             self.__execution_step_service = None
 
+        # makes the status available through the aggregated status service of this node and allows managers of the
+        # same process to call the services directly
+        local_services = [self._getStatusService, self._startService, self._stopService, self._pddlService]
+        if self.__execution_step_service:
+            local_services.append(self.__execution_step_service)
+        ComponentRegistry.register(self._getStatusService.resolved_name, self, services=local_services)
+
     def final_init(self):
         """
         Ensure registration after the entire initialisation (including sub classes) is done
@@ -476,6 +528,11 @@ class BehaviourBase(object):
                                     "if you use the correct 'planner_prefix'. Current prefix:'%s'", self._name,
                                     service_name, self._planner_prefix)
 
+            if not self._status_publisher and StatusPublisher.is_push_enabled(self._planner_prefix):
+                self._status_publisher = StatusPublisher(self._planner_prefix,
+                                                         StatusPublisher.TOPIC_NAME_BEHAVIOUR_STATUS,
+                                                         self._get_status_callback)
+
             register_behaviour = rospy.ServiceProxy(service_name, AddBehaviour)
             register_behaviour(self._name, self._independentFromPlanner, self._requires_execution_steps, self.TYPE_STRING)
             self._registered = True
@@ -504,6 +561,10 @@ class BehaviourBase(object):
             rhbplog.logwarn("Behaviour %s unregister() failed.", self._name)
 
         if terminate_services:
+            ComponentRegistry.unregister(self._getStatusService.resolved_name)
+            if self._status_publisher:
+                self._status_publisher.shutdown()
+                self._status_publisher = None
             self._getStatusService.shutdown()
             self._startService.shutdown()
             self._stopService.shutdown()
@@ -623,6 +684,31 @@ class BehaviourBase(object):
         """
         This method should produce a valid PDDL action snippet suitable for FastDownward (http://www.fast-downward.org/PddlSupport)
         """
+        _revision, pddl = self._get_cached_action_pddl()
+        return pddl
+
+    def _get_cached_action_pddl(self):
+        """
+        Get the action PDDL from the cache, it is only created again if the effects, the preconditions (e.g. depending
+        on the current sensor value), the readyThreshold or the actionCost have changed
+        :return: tuple(revision of the action PDDL, action PDDL)
+        """
+        preconds = [x.getPreconditionPDDL(self._readyThreshold) for x in self._preconditions if not x.optional] # do not use optional preconditions for planning
+        key = (tuple((x.sensor_name, x.indicator, x.sensor_type, x.condition) for x in self._correlations),
+               tuple(x.statement for x in preconds), self._readyThreshold, self._actionCost)
+        revision = self._action_pddl_revision.update(key)
+        cache = self._action_pddl_cache
+        if not cache or cache[0] != revision:
+            cache = (revision, self._create_action_pddl(preconds))
+            self._action_pddl_cache = cache
+        return cache
+
+    def _create_action_pddl(self, preconds):
+        """
+        Create the action PDDL
+        :param preconds: list of precondition PDDLs
+        :return: action PDDL
+        """
         effects = [x.getEffectPDDL() for x in self._correlations]
         if len(effects) < 1:
             if not self._independentFromPlanner:
@@ -631,7 +717,6 @@ class BehaviourBase(object):
 
         action_name = create_valid_pddl_name(self._name)
         pddl = PDDL(statement="(:action {0}\n:parameters ()\n".format(action_name), functions="costs")
-        preconds = [x.getPreconditionPDDL(self._readyThreshold) for x in self._preconditions if not x.optional] # do not use optional preconditions for planning
         pddl.predicates = set(itertools.chain.from_iterable(map(lambda x: x.predicates, preconds))) # unites all predicates in preconditions
         pddl.functions = pddl.functions.union(*map(lambda x: x.functions, preconds)) # unites all functions in preconditions
         if len(preconds) > 1:
@@ -649,12 +734,12 @@ class BehaviourBase(object):
         return pddl
     
     def getStatePDDL(self):
-        pddl = PDDL()
+        state = PDDLState()
         for p in self._preconditions:
             if not p.optional:  # do not use optional preconditions for planning
                 for s in p.getStatePDDL():  # it is a list because it may come from a composed condition
-                    pddl = mergeStatePDDL(s, pddl)
-        return pddl                      
+                    state.add_pddl(s)
+        return state.get_pddl()                      
 
     def _pddl_callback(self, msg):
         try:
@@ -668,16 +753,20 @@ class BehaviourBase(object):
             if self._independentFromPlanner and len(self._correlations) > 0:
                 # Since the correlations arent setted in constructor once right place for warning is here
                 rhbplog.logwarn('Behavior {0} has effects but is independent from planner'.format(self._name))
-            actions = self.getActionPDDL() # TODO: this may be cached as it does not change unless the effects are changed during runtime
+            action_revision, actions = self._get_cached_action_pddl()
 
             if not actions.empty:
                 state = self.getStatePDDL() #do not use state PDDL of empty actions (e.g. independent from planner)
             else:
                 state = PDDL()
 
-            return GetPDDLResponse(**{"actionStatement": actions.statement,
-                                      "actionPredicates": list(actions.predicates),
-                                      "actionFunctions": list(actions.functions),
+            # the action PDDL is skipped if the requester already knows it
+            action_known = msg.action_revision == action_revision
+
+            return GetPDDLResponse(**{"actionStatement": "" if action_known else actions.statement,
+                                      "actionPredicates": [] if action_known else list(actions.predicates),
+                                      "actionFunctions": [] if action_known else list(actions.functions),
+                                      "actionRevision": action_revision,
                                       "stateStatement": state.statement,
                                       "statePredicates": list(state.predicates),
                                       "stateFunctions": list(state.functions)
@@ -696,15 +785,21 @@ class BehaviourBase(object):
             # TODO possible improvement is providing computeSatisfaction and computeActivation with a precalulated list of satisfactions
             satisfaction = self.computeSatisfaction()
 
+            correlations, correlations_revision = self._correlations_revision.get_delta(
+                [x.get_msg() for x in self._correlations], request.correlations_revision)
+            wishes, wishes_revision = self._wishes_revision.get_delta(self.computeWishes(), request.wishes_revision)
+
             # this would eliminate the doubled calculation of it
             status = Status(**{
                                "name"         : self._name, # this is sent for sanity check and planner status messages only
                                "activation"   : satisfaction,
                                # "activation": self.computeActivation(),  TODO should be removed in the future, but needs checks if always suitable
-                               "correlations" : [x.get_msg() for x in self._correlations],
+                               "correlations" : correlations,
+                               "correlations_revision": correlations_revision,
                                "satisfaction" : satisfaction,
                                "threshold"    : self._readyThreshold,
-                               "wishes"       : self.computeWishes(),
+                               "wishes"       : wishes,
+                               "wishes_revision": wishes_revision,
                                "isExecuting"  : self._isExecuting,
                                "executionTimeout" : self._executionTimeout,
                                "active"       : self._active,  # if any of the above methods failed this property has been set to False by now
@@ -0,0 +1,483 @@
+'''
+Created on 18.10.2026
+
+@author: hrabia
+'''
+
+import random
+import threading
+import time
+import traceback
+import weakref
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+import rosgraph
+import rospy
+from rospy.impl.tcpros_service import convert_return_to_response
+from rospy.msg import args_kwds_to_message
+
+from std_msgs.msg import UInt32
+from rhbp_core.msg import Status
+from rhbp_core.srv import GetStatusBatch, GetStatusBatchResponse, GetStatusRequest
+
+from utils.ros_helpers import PersistentServiceProxy
+
+import utils.rhbp_logging
+rhbplog = utils.rhbp_logging.LogManager(logger_name=utils.rhbp_logging.LOGGER_DEFAULT_NAME + '.components')
+
+
+class ComponentRegistry(object):
+    """
+    Process wide registry of all behaviour and goal implementations (BehaviourBase, GoalBase) living in this node.
+    The registry provides one aggregated GetStatusBatch service per node, which allows a manager to collect the status
+    of all components of this node with a single service call instead of one GetStatus call per component.
+    Furthermore, the registered services allow managers running in the same process to call the service handlers
+    directly (see ComponentServiceProxy).
+    """
+
+    SERVICE_NAME_GET_STATUS_BATCH = 'GetStatusBatch'
+
+    _components = {}  # resolved GetStatus service name -> component
+    _component_services = {}  # resolved GetStatus service name -> list of resolved names of all component services
+    _local_services = {}  # resolved service name -> rospy.Service
+    _lock = threading.Lock()
+    _batch_service = None
+
+    @classmethod
+    def register(cls, status_service_name, component, services=()):
+        """
+        Register a component, the aggregated service is created with the first registration
+        :param status_service_name: resolved name of the GetStatus service of the component
+        :param component: object providing _get_status_callback()
+        :param services: list of rospy.Service objects of the component that can be called in-process
+        """
+        with cls._lock:
+            cls._components[status_service_name] = component
+            for service in services:
+                cls._local_services[service.resolved_name] = service
+            cls._component_services[status_service_name] = [service.resolved_name for service in services]
+            if not cls._batch_service:
+                cls._batch_service = rospy.Service(cls.get_batch_service_name(rospy.get_name()), GetStatusBatch,
+                                                   cls._get_status_batch_callback)
+
+    @classmethod
+    def unregister(cls, status_service_name):
+        """
+        Remove a component from the registry
+        :param status_service_name: resolved name of the GetStatus service of the component
+        """
+        with cls._lock:
+            cls._components.pop(status_service_name, None)
+            for service_name in cls._component_services.pop(status_service_name, []):
+                cls._local_services.pop(service_name, None)
+
+    @classmethod
+    def get_local_service(cls, service_name):
+        """
+        :param service_name: resolved name of a service
+        :return: the rospy.Service object if the service is provided by a component of this process, otherwise None
+        """
+        return cls._local_services.get(service_name)
+
+    @classmethod
+    def get_batch_service_name(cls, node_name):
+        """
+        :param node_name: resolved name of the node hosting the components
+        :return: name of the aggregated status service of the given node
+        """
+        return node_name + '/' + cls.SERVICE_NAME_GET_STATUS_BATCH
+
+    @classmethod
+    def _get_status_batch_callback(cls, request):
+        with cls._lock:
+            components = [cls._components.get(name) for name in request.status_services]
+
+        statuses = []
+        for index, component in enumerate(components):
+            response = None
+            if component:
+                status_request = GetStatusRequest(current_step=request.current_step,
+                                                  correlations_revision=request.correlations_revisions[index],
+                                                  wishes_revision=request.wishes_revisions[index])
+                # the status callbacks catch and log their own exceptions and return None in case of errors
+                response = component._get_status_callback(status_request)
+            statuses.append(response.status if response else Status())
+        return GetStatusBatchResponse(statuses=statuses)
+
+
+class ComponentServiceProxy(PersistentServiceProxy):
+    """
+    Service proxy for the services of behaviours and goals. If the component is living in the same process the
+    service handler is called directly, which avoids the serialisation and the loopback connection. Otherwise a
+    persistent ROS service connection is used.
+    The local calls behave like service calls, in particular failing handlers result in a rospy.ServiceException.
+    """
+
+    def __init__(self, name, service_class, timeout=None):
+        """
+        :param name: name of the service
+        :param service_class: service type class
+        :param timeout: timeout in seconds for waiting for a remote service, None for waiting forever
+        """
+        super(ComponentServiceProxy, self).__init__(rospy.resolve_name(name), service_class, timeout=timeout)
+
+    def __call__(self, *args, **kwargs):
+        service = ComponentRegistry.get_local_service(self._name)
+        if service:
+            return self._call_local(service, args, kwargs)
+        return super(ComponentServiceProxy, self).__call__(*args, **kwargs)
+
+    @property
+    def local(self):
+        """
+        :return: True if the service is provided by a component of this process
+        """
+        return ComponentRegistry.get_local_service(self._name) is not None
+
+    def _call_local(self, service, args, kwargs):
+        request = args_kwds_to_message(service.request_class, args, kwargs)
+        try:
+            response = service.handler(request)
+        except Exception as e:
+            raise rospy.ServiceException("error processing request of service [%s]: %s" % (self._name, e))
+        if response is None:
+            raise rospy.ServiceException("service [%s] responded with an error" % self._name)
+        return convert_return_to_response(response, service.response_class)
+
+
+class MessageListRevision(object):
+    """
+    Keeps track of the revision of a list of messages (e.g. correlations or wishes of a status) in order to send the
+    list only to requesters that do not already know the current revision. Any other comparable value can be tracked
+    as well.
+    """
+
+    MAX_REVISION = 2 ** 32 - 1  # uint32
+
+    def __init__(self):
+        # random start to avoid that a requester confuses the revisions of a restarted component with older ones
+        self._revision = random.randint(1, self.MAX_REVISION)
+        self._messages = []
+        self._lock = threading.Lock()
+
+    def update(self, messages):
+        """
+        Update the revision with the current messages
+        :param messages: current list of messages
+        :return: current revision
+        """
+        with self._lock:
+            if messages != self._messages:
+                self._messages = messages
+                self._revision = self._revision % self.MAX_REVISION + 1  # 0 is reserved for unknown
+            return self._revision
+
+    def get_delta(self, messages, known_revision):
+        """
+        Update the revision with the current messages
+        :param messages: current list of messages
+        :param known_revision: revision known by the requester, 0 if unknown
+        :return: tuple(list of messages or empty list if the requester knows the revision, current revision)
+        """
+        revision = self.update(messages)
+        return ([] if known_revision == revision else messages), revision
+
+
+class StatusFetcher(object):
+    """
+    Manager side counterpart of the ComponentRegistry, which collects the status of all behaviours and goals.
+    If batching is enabled, the proxies are grouped by the node hosting their implementation and the status of every
+    group is fetched with one GetStatusBatch call. Components without a hosting node that provides the batch service
+    are queried individually.
+    The requests can be issued concurrently from a bounded thread pool. The received status messages are always applied
+    in the order of the given component list after all requests have finished.
+    """
+
+    STATUS_SERVICE_NAME = 'GetStatus'  # the name is identical for behaviours and goals
+
+    SERVICE_TIMEOUT = 2
+
+    REGROUP_INTERVAL = 5.0  # seconds to wait before looking up unresolved components again
+
+    def __init__(self, batching=True, threads=0):
+        """
+        :param batching: True for using aggregated status requests per hosting node
+        :param threads: amount of threads for concurrent requests, 0 for sequential requests
+        """
+        self._batching = batching
+        self._threads = threads
+        self._pool = None
+        self._hosting_nodes = weakref.WeakKeyDictionary()  # component -> name of the hosting node or None
+        self._batch_services = {}  # node name -> PersistentServiceProxy
+        self._groups = OrderedDict()  # node name -> list of components, grouping of the last fetch
+        self._unresolved = False  # True if batchable components could not be assigned to a node
+        self._last_grouping = 0.0
+        self._last_duration = 0.0
+
+    def invalidate(self):
+        """
+        Force a new lookup of the hosting nodes before the next fetch
+        """
+        self._hosting_nodes.clear()
+
+    def close(self):
+        """
+        Stop the worker threads
+        """
+        if self._pool:
+            self._pool.terminate()
+            self._pool = None
+
+    @property
+    def last_duration(self):
+        """
+        :return: duration of the last fetch_status() call in seconds
+        """
+        return self._last_duration
+
+    def fetch_status(self, components, current_step):
+        """
+        Fetch and apply the status of all given components
+        :param components: list of behaviour and goal proxies
+        :param current_step: current step of the manager
+        """
+        start_time = time.time()
+
+        if any(c not in self._hosting_nodes for c in components) or \
+                (self._unresolved and time.time() - self._last_grouping > self.REGROUP_INTERVAL):
+            self._update_hosting_nodes(components)
+
+        self._groups = OrderedDict()
+        single = []
+        for component in components:
+            node_name = self._hosting_nodes.get(component)
+            if node_name:
+                self._groups.setdefault(node_name, []).append(component)
+            else:
+                single.append(component)
+
+        jobs = [(self._request_group_status, node_name, self._batch_services[node_name], group, current_step)
+                for node_name, group in self._groups.iteritems()]
+        jobs.extend((self._request_single_status, component, current_step) for component in single)
+
+        if self._threads > 0 and len(jobs) > 1:
+            if not self._pool:
+                self._pool = ThreadPool(processes=self._threads)
+            results = self._pool.map(_run_job, jobs)
+        else:
+            results = [_run_job(job) for job in jobs]
+
+        # merge in a deterministic order independent of the completion order of the requests
+        received = {}
+        for result in results:
+            received.update(result)
+        for component in components:
+            if component in received:
+                status = received[component]
+                if status is not None:
+                    component.update_status(status)
+            else:
+                component.fetchStatus(current_step)
+
+        self._last_duration = time.time() - start_time
+
+    def _request_group_status(self, node_name, batch_service, group, current_step):
+        """
+        Request the status of all components of one node
+        :return: dict component -> Status or None
+        """
+        try:
+            statuses = batch_service(current_step=current_step,
+                                     status_services=[self._get_status_service_name(c) for c in group],
+                                     correlations_revisions=[getattr(c, 'correlations_revision', 0)
+                                                             for c in group],
+                                     wishes_revisions=[getattr(c, 'wishes_revision', 0) for c in group]).statuses
+        except (rospy.ServiceException, rospy.ROSException):
+            rhbplog.logwarn("Batched status request to node '%s' failed, falling back to single requests: %s",
+                            node_name, traceback.format_exc())
+            self.invalidate()
+            statuses = [Status()] * len(group)
+        result = {}
+        for component, status in zip(group, statuses):
+            result[component] = status if status.name else component.request_status(current_step)
+        return result
+
+    def _request_single_status(self, component, current_step):
+        """
+        Request the status of a component, components that are not able to provide the status without applying it
+        are skipped and fetched while merging the results
+        :return: dict component -> Status or None
+        """
+        if hasattr(component, 'request_status'):
+            return {component: component.request_status(current_step)}
+        return {}
+
+    def _get_status_service_name(self, component):
+        return rospy.resolve_name(component.service_prefix + self.STATUS_SERVICE_NAME)
+
+    def _update_hosting_nodes(self, components):
+        """
+        Assign the components to their hosting nodes with the help of the ROS master
+        :param components: list of behaviour and goal proxies
+        """
+        self._unresolved = False
+        self._last_grouping = time.time()
+
+        # components of this process are requested individually, because their services are called directly
+        batchable = [c for c in components if self._batching and hasattr(c, 'update_status') and
+                     hasattr(c, 'service_prefix') and
+                     not ComponentRegistry.get_local_service(self._get_status_service_name(c))]
+        service_nodes = {}
+        if batchable:
+            try:
+                _publishers, _subscribers, services = rosgraph.Master(rospy.get_name()).getSystemState()
+                service_nodes = dict((name, nodes[0]) for name, nodes in services if nodes)
+            except Exception:
+                rhbplog.logwarn("Could not get system state from master, batched status requests are not used: %s",
+                                traceback.format_exc())
+
+        for component in components:
+            node_name = None
+            if component in batchable:
+                node_name = service_nodes.get(self._get_status_service_name(component))
+                if not node_name:
+                    self._unresolved = True
+            batch_service_name = ComponentRegistry.get_batch_service_name(node_name) if node_name else None
+            if batch_service_name in service_nodes:
+                if node_name not in self._batch_services:
+                    self._batch_services[node_name] = PersistentServiceProxy(batch_service_name, GetStatusBatch,
+                                                                             timeout=self.SERVICE_TIMEOUT)
+                self._hosting_nodes[component] = node_name
+            else:
+                self._hosting_nodes[component] = None
+
+
+def _run_job(job):
+    """
+    Helper for executing a job tuple (callable, arguments...) in the thread pool
+    """
+    return job[0](*job[1:])
+
+
+class StatusPublisher(object):
+    """
+    Publishes the status of a behaviour or goal implementation for managers running in push mode.
+    The status is computed whenever the manager triggers a new step and only published if it has changed or the last
+    publication is HEARTBEAT_INTERVAL triggers ago.
+    """
+
+    TOPIC_NAME_STATUS_TRIGGER = 'StatusTrigger'
+    TOPIC_NAME_BEHAVIOUR_STATUS = 'BehaviourStatus'
+    TOPIC_NAME_GOAL_STATUS = 'GoalStatus'
+
+    HEARTBEAT_INTERVAL = 10  # manager steps
+
+    def __init__(self, planner_prefix, topic_name, status_callback):
+        """
+        :param planner_prefix: prefix of the manager
+        :param topic_name: name of the status topic (TOPIC_NAME_BEHAVIOUR_STATUS or TOPIC_NAME_GOAL_STATUS)
+        :param status_callback: GetStatus service callback of the component
+        """
+        self._status_callback = status_callback
+        self._last_status = None
+        self._triggers_since_publication = 0
+        self._pub = rospy.Publisher(planner_prefix + '/' + topic_name, Status, queue_size=10, latch=True)
+        self._sub = rospy.Subscriber(planner_prefix + '/' + StatusPublisher.TOPIC_NAME_STATUS_TRIGGER, UInt32,
+                                     self._trigger_callback)
+
+    @staticmethod
+    def is_push_enabled(planner_prefix):
+        """
+        :param planner_prefix: prefix of the manager
+        :return: True if the manager runs in push mode, the manager announces the mode on its parameter server namespace
+        """
+        return rospy.get_param(planner_prefix + '/rhbp_manager/status_push', False)
+
+    def _trigger_callback(self, msg):
+        response = self._status_callback(GetStatusRequest(current_step=msg.data))
+        if not response:
+            return
+        status = response.status
+        self._triggers_since_publication += 1
+        if self._last_status:
+            status.step = self._last_status.step  # the step is not considered for the comparison
+            if status == self._last_status and self._triggers_since_publication < self.HEARTBEAT_INTERVAL:
+                return
+        status.step = msg.data
+        self._pub.publish(status)
+        self._last_status = status
+        self._triggers_since_publication = 0
+
+    def shutdown(self):
+        self._sub.unregister()
+        self._pub.unregister()
+
+
+class StatusCache(object):
+    """
+    Manager side cache of the status messages pushed by behaviours and goals with the StatusPublisher
+    """
+
+    MAX_AGE = 2 * StatusPublisher.HEARTBEAT_INTERVAL  # manager steps after a cached status is considered as outdated
+
+    def __init__(self, planner_prefix):
+        """
+        :param planner_prefix: prefix of the manager
+        """
+        self._behaviour_status = {}  # name -> Status
+        self._goal_status = {}  # name -> Status
+        self._valid_from = {}  # behaviour name -> first step of valid status messages
+        self._trigger_pub = rospy.Publisher(planner_prefix + '/' + StatusPublisher.TOPIC_NAME_STATUS_TRIGGER, UInt32,
+                                            queue_size=1)
+        self._behaviour_sub = rospy.Subscriber(planner_prefix + '/' + StatusPublisher.TOPIC_NAME_BEHAVIOUR_STATUS,
+                                               Status, self._behaviour_status_callback)
+        self._goal_sub = rospy.Subscriber(planner_prefix + '/' + StatusPublisher.TOPIC_NAME_GOAL_STATUS, Status,
+                                          self._goal_status_callback)
+
+    def _behaviour_status_callback(self, status):
+        self._behaviour_status[status.name] = status
+
+    def _goal_status_callback(self, status):
+        self._goal_status[status.name] = status
+
+    def trigger(self, step):
+        """
+        Request the computation of the status messages for the given step
+        :param step: the upcoming manager step
+        """
+        self._trigger_pub.publish(UInt32(step))
+
+    def invalidate(self, behaviour_name, step):
+        """
+        Ignore all cached status messages of the behaviour that are computed before the given step, e.g. because the
+        behaviour has been started or stopped
+        :param behaviour_name: name of the behaviour
+        :param step: first step of valid status messages
+        """
+        self._valid_from[behaviour_name] = step
+
+    def get_behaviour_status(self, name, current_step):
+        """
+        :return: most recent valid status of the behaviour or None
+        """
+        status = self._behaviour_status.get(name)
+        if status and status.step < self._valid_from.get(name, 0):
+            return None
+        return self._check_age(status, current_step)
+
+    def get_goal_status(self, name, current_step):
+        """
+        :return: most recent valid status of the goal or None
+        """
+        return self._check_age(self._goal_status.get(name), current_step)
+
+    def _check_age(self, status, current_step):
+        if status and current_step - status.step <= self.MAX_AGE:
+            return status
+        return None
+
+    def shutdown(self):
+        self._trigger_pub.unregister()
+        self._behaviour_sub.unregister()
+        self._goal_sub.unregister()
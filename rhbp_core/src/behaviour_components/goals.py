@@ -21,7 +21,8 @@ from .activators import BooleanActivator
 from behaviour_components.conditions import Condition
 from .conditions import Conditonal
 from .condition_elements import Wish
-from .pddl import PDDL, mergeStatePDDL
+from .component_registry import ComponentRegistry, ComponentServiceProxy, StatusPublisher, MessageListRevision
+from .pddl import PDDL, PDDLState
 from .sensors import TopicSensor
 from utils.misc import FinalInitCaller
 from utils.deprecation import deprecated
@@ -250,11 +251,11 @@ class Goal(object):
         return " ".join([x.getPreconditionPDDL(self._satisfaction_threshold).statement for x in self._conditions])
 
     def getStatePDDL(self):
-        pddl = PDDL()
+        state = PDDLState()
         for c in self._conditions:
             for s in c.getStatePDDL():  # it is a list
-                pddl = mergeStatePDDL(s, pddl)
-        return pddl
+                state.add_pddl(s)
+        return state.get_pddl()
 
     def _enable_callback(self, request):
         '''
@@ -346,73 +347,99 @@ class GoalProxy(AbstractGoalRepresentation):
         self.sensor_values = []
         self.__old_PDDL = (PDDL(statement=name), PDDL(statement="", predicates=[], functions=[]))
         self.__consecutive_timeouts = 0
+        self.__wishes_revision = 0  # revision of the wishes, 0 if unknown
+
+        # connections to the services of the actual goal node, they are established on first use or replaced by direct
+        # calls if the goal lives in the same process
+        self.__get_pddl_service = ComponentServiceProxy(self._service_prefix + GoalProxy.SERVICE_NAME_FETCH_PDDL,
+                                                        GetPDDL, timeout=self.SERVICE_TIMEOUT)
+        self.__get_status_service = ComponentServiceProxy(self._service_prefix + GoalProxy.SERVICE_NAME_GET_STATUS,
+                                                          GetStatus, timeout=self.SERVICE_TIMEOUT)
+        self.__enable_service = ComponentServiceProxy(self._service_prefix + Goal.SERVICE_NAME_ENABLE, Enable,
+                                                      timeout=self.SERVICE_TIMEOUT)
 
     def fetchPDDL(self, update_computation=False):
         '''
         This method fetches the PDDL from the actual goal node via GetPDDLservice call
         '''
         try:
-            service_name = self._service_prefix + GoalProxy.SERVICE_NAME_FETCH_PDDL
-            rhbplog.logdebug("Waiting for service %s", service_name)
-            rospy.wait_for_service(service_name, timeout=self.SERVICE_TIMEOUT)
+            pddl = self.__get_pddl_service(update_computation=update_computation)
             self.__consecutive_timeouts = 0
-        except rospy.ROSInterruptException:  # ros shutdown
-            self._handle_service_timeout(logging_enabled=False)
-            return self.__old_PDDL
-        except rospy.ROSException:
-            self._handle_service_timeout(logging_enabled=True)
-            return self.__old_PDDL
-        try:
-            getPDDLRequest = rospy.ServiceProxy(service_name, GetPDDL)
-            pddl = getPDDLRequest(update_computation=update_computation)
             self.__old_PDDL = (PDDL(statement=pddl.goalStatement),
                     PDDL(statement=pddl.stateStatement, predicates=pddl.statePredicates,
                          functions=pddl.stateFunctions))
-            return self.__old_PDDL
+        except rospy.ROSInterruptException:  # ros shutdown
+            self._handle_service_timeout(logging_enabled=False)
         except rospy.ServiceException:
             rhbplog.logerr("ROS service exception in 'fetchPDDL' of goal '%s': %s", self._name,
                          traceback.format_exc())
-            return self.__old_PDDL
+        except rospy.ROSException:  # timeout while waiting for the service
+            self._handle_service_timeout(logging_enabled=True)
+        return self.__old_PDDL
 
     def fetchStatus(self, current_step):
         """
         This method fetches the status from the actual goal node via GetStatus service call
         :param current_step: 
         """
+        status = self.request_status(current_step)
+        if status is not None:
+            self.update_status(status)
 
+    def request_status(self, current_step):
+        """
+        This method requests the status from the actual goal node via GetStatus service call without applying it.
+        Only service timeouts are directly handled, which makes it safe to call it concurrently for different goals.
+        :param current_step:
+        :return: the Status message or None in case of errors
+        """
         try:
-            service_name = self._service_prefix + GoalProxy.SERVICE_NAME_GET_STATUS
-            rhbplog.logdebug("Waiting for service %s", service_name)
-            rospy.wait_for_service(service_name, timeout=self.SERVICE_TIMEOUT)
+            status = self.__get_status_service(current_step=current_step,
+                                               wishes_revision=self.__wishes_revision).status
             self.__consecutive_timeouts = 0
+            return status
         except rospy.ROSInterruptException:  # ros shutdown
             self._handle_service_timeout(logging_enabled=False)
-            return
-        except rospy.ROSException:
-            self._handle_service_timeout(logging_enabled=True)
-            return
-
-        try:
-            get_status_request = rospy.ServiceProxy(service_name, GetStatus)
-            status = get_status_request(current_step).status
-            self._fulfillment = status.satisfaction
-            self._wishes = [Wish.from_wish_msg(wish) for wish in status.wishes]
-            self._active = status.active
-            self._enabled = status.enabled
-            self._permanent = status.permanent
-            self._priority = status.priority
-            self._satisfaction_threshold = status.threshold
-            self.sensor_values = status.sensor_values
-            if self._name != status.name:
-                rhbplog.logerr("%s fetched a status message from a different goal: %s. This cannot happen!",
-                               self._name,
-                               status.name)
-            rhbplog.logdebug("%s reports the following status:\nfulfillment %s\nwishes %s", self.name,
-                             self.fulfillment,
-                             self.wishes)
         except rospy.ServiceException:
             rhbplog.logerr("ROS service exception in 'fetchStatus' of goal '%s': %s", self._name,
                            traceback.format_exc())
+        except rospy.ROSException:  # timeout while waiting for the service
+            self._handle_service_timeout(logging_enabled=True)
+        return None
+
+    def update_status(self, status):
+        """
+        This method applies a status message of the actual goal node, e.g. received by fetchStatus() or a batched
+        status request of the manager
+        :param status: the Status message
+        """
+        self.__consecutive_timeouts = 0
+        self._fulfillment = status.satisfaction
+        # already parsed wishes are reused if the revision has not changed
+        if not status.wishes_revision or status.wishes_revision != self.__wishes_revision:
+            self._wishes = [Wish.from_wish_msg(wish) for wish in status.wishes]
+            self.__wishes_revision = status.wishes_revision
+        self._active = status.active
+        self._enabled = status.enabled
+        self._permanent = status.permanent
+        self._priority = status.priority
+        self._satisfaction_threshold = status.threshold
+        self.sensor_values = status.sensor_values
+        if self._name != status.name:
+            rhbplog.logerr("%s fetched a status message from a different goal: %s. This cannot happen!",
+                           self._name,
+                           status.name)
+        rhbplog.logdebug("%s reports the following status:\nfulfillment %s\nwishes %s", self.name,
+                         self.fulfillment,
+                         self.wishes)
+
+    @property
+    def service_prefix(self):
+        return self._service_prefix
+
+    @property
+    def wishes_revision(self):
+        return self.__wishes_revision
 
     def _handle_service_timeout(self, logging_enabled=True):
         """
@@ -433,24 +460,17 @@ class GoalProxy(AbstractGoalRepresentation):
     @AbstractGoalRepresentation.enabled.setter
     def enabled(self, value):
         # inform remote goal about new enabled state
-        service_name = self._service_prefix + Goal.SERVICE_NAME_ENABLE
-        rhbplog.logdebug("Waiting for service %s", service_name)
         try:
-            rospy.wait_for_service(service_name, timeout=self.SERVICE_TIMEOUT)
+            self.__enable_service(value)
             self.__consecutive_timeouts = 0
+            self._enabled = value
         except rospy.ROSInterruptException:  # ros shutdown
             self._handle_service_timeout(logging_enabled=False)
-            return
-        except rospy.ROSException:
-            self._handle_service_timeout(logging_enabled=True)
-            return
-        try:
-            enable_request = rospy.ServiceProxy(service_name, Enable)
-            enable_request(value)
-            self._enabled = value
         except rospy.ServiceException:
             rhbplog.logerr("ROS service exception in 'enabled' of goal '%s': %s", self._name,
                          traceback.format_exc())
+        except rospy.ROSException:  # timeout while waiting for the service
+            self._handle_service_timeout(logging_enabled=True)
 
 
 # TODO Rename to RemoteGoal
@@ -486,12 +506,21 @@ class GoalBase(Goal):
         self._sensor_transformer = SensorValueTransformer()
 
     def _init_services(self):
+        # the revision allows to skip unchanged wishes in the status messages, it has to exist before the status
+        # service and registry entry make the status callback reachable
+        self._wishes_revision = MessageListRevision()
         super(GoalBase, self)._init_services()
         self._service_prefix = self._planner_prefix + '/' + self._name + '/'
         self._getStatusService = rospy.Service(self._service_prefix + GoalProxy.SERVICE_NAME_GET_STATUS, GetStatus,
                                                self._get_status_callback)
         self._pddlService = rospy.Service(self._service_prefix + GoalProxy.SERVICE_NAME_FETCH_PDDL, GetPDDL,
                                           self._pddl_callback)
+        # makes the status available through the aggregated status service of this node and allows managers of the
+        # same process to call the services directly
+        ComponentRegistry.register(self._getStatusService.resolved_name, self,
+                                   services=[self._getStatusService, self._pddlService, self._enable_service])
+        # pushes the status to managers running in push mode, created on registration if required
+        self._status_publisher = None
 
     def final_init(self):
         """
@@ -527,6 +556,10 @@ class GoalBase(Goal):
                                     "you use the correct 'planner_prefix'. Current prefix:'%s'", self._name,
                                     service_name, self._planner_prefix)
 
+            if not self._status_publisher and StatusPublisher.is_push_enabled(self._planner_prefix):
+                self._status_publisher = StatusPublisher(self._planner_prefix, StatusPublisher.TOPIC_NAME_GOAL_STATUS,
+                                                         self._get_status_callback)
+
             add_goal = rospy.ServiceProxy(service_name, AddGoal)
             add_goal(self._name)
             self._registered = True
@@ -542,9 +575,13 @@ class GoalBase(Goal):
         """
         super(GoalBase, self)._cleanup_topics_services()
         if hasattr(self, '_getStatusService') and self._getStatusService:
+            ComponentRegistry.unregister(self._getStatusService.resolved_name)
             self._getStatusService.shutdown()
         if hasattr(self, '_pddlService') and self._pddlService:
             self._pddlService.shutdown()
+        if hasattr(self, '_status_publisher') and self._status_publisher:
+            self._status_publisher.shutdown()
+            self._status_publisher = None
 
     def unregister(self, terminate_services=True):
         """
@@ -606,11 +643,14 @@ class GoalBase(Goal):
             self.updateComputation(request.current_step)
             
             sensor_values = self._sensor_transformer.get_sensor_values(self._conditions)
+
+            wishes, wishes_revision = self._wishes_revision.get_delta(self.computeWishes(), request.wishes_revision)
             
             status = Status(**{
                 "name": self._name,
                 "satisfaction": self.computeSatisfaction(),
-                "wishes": self.computeWishes(),
+                "wishes": wishes,
+                "wishes_revision": wishes_revision,
                 "active": self._active,
                 "enabled": self._enabled,
                 "priority": self._priority,
@@ -4,8 +4,11 @@ Created on 23.04.2015
 @author: wypler, hrabia
 """
 
+import logging
 import sys
 import threading
+import time
+from Queue import Queue
 
 import rospy
 import itertools
@@ -18,12 +21,16 @@ from rhbp_core.srv import AddBehaviour, AddBehaviourResponse, AddGoal, AddGoalRe
 from rospy import ROSInterruptException
 from .behaviours import Behaviour
 from .goals import GoalProxy
-from .pddl import PDDL, mergeStatePDDL, tokenizePDDL, getStatePDDLchanges, predicateRegex, init_missing_functions, \
-    create_valid_pddl_name, aggregate_sensor_changes, parseStatePDDL
-from .planner import MetricFF
+from .pddl import PDDL, PDDLState, getStatePDDLchanges, create_valid_pddl_name, aggregate_sensor_changes
+from .pddl_model import PDDLDomain, PDDLModelError, COST_FUNCTION, evaluate_condition, expression_to_pddl, \
+    parse_condition
+from .planner import MetricFF, CachingPlanner, InstrumentedPlanner, PlanningDomain, PlanningJob, PlannerThread, \
+    PlanningSnapshot, RollingHistogram, submit_planning_function, create_goal_condition
+from .python_planner import PythonPlanner
+from .component_registry import StatusFetcher, StatusCache
 from .activation_algorithm import ActivationAlgorithmFactory
+from . import numpy_activation_algorithm  # registers the vectorised activation algorithms
 from utils.misc import LogFileWriter
-from copy import copy
 
 from dynamic_reconfigure.server import Server
 from dynamic_reconfigure.msg import Config as ConfigMsg
@@ -85,6 +92,28 @@ class Manager(object):
 
         rhbplog.loginfo("Using max_parallel_behaviours:%d", self.__max_parallel_behaviours)
 
+        # fetch the status of all behaviours and goals hosted by the same node with one aggregated service call
+        batch_status_fetching = kwargs['batch_status_fetching'] if 'batch_status_fetching' in kwargs else \
+            rospy.get_param(self._param_prefix + "/batch_status_fetching", True)
+
+        # amount of threads used for concurrent status requests, 0 for sequential requests
+        status_fetch_threads = kwargs['status_fetch_threads'] if 'status_fetch_threads' in kwargs else \
+            rospy.get_param(self._param_prefix + "/status_fetch_threads", 0)
+
+        rhbplog.loginfo("Using batch_status_fetching:%s, status_fetch_threads:%d", batch_status_fetching,
+                        status_fetch_threads)
+
+        self.__status_fetcher = StatusFetcher(batching=batch_status_fetching, threads=status_fetch_threads)
+
+        # in push mode behaviours and goals publish their status and the manager uses the latest received messages
+        # instead of requesting them, components without a valid pushed status are still requested
+        status_push = kwargs['status_push'] if 'status_push' in kwargs else \
+            rospy.get_param(self._param_prefix + "/status_push", False)
+        self.__status_cache = StatusCache(self._prefix) if status_push else None
+        if status_push:
+            # behaviours and goals only create their status publishers if they find the push mode on registration
+            rospy.set_param(self._param_prefix + "/status_push", True)
+
         self._stepCounter = 0
 
         self._step_lock = threading.Lock()
@@ -110,13 +139,114 @@ class Manager(object):
         self._plan_monitoring_behaviour_missing_influence = True
         self._plan_monitoring_unexpected_behaviour_finished = True
 
+        # try to repair the current plan before planning from scratch if the plan monitoring detects a deviation
+        self._plan_repair = kwargs['plan_repair'] if 'plan_repair' in kwargs else \
+            rospy.get_param(self._param_prefix + "/plan_repair", False)
+        # maximum length of a new plan prefix that rejoins the current plan, it is also the amount of tried rejoin points
+        self._plan_repair_max_prefix = kwargs['plan_repair_max_prefix'] if 'plan_repair_max_prefix' in kwargs else \
+            rospy.get_param(self._param_prefix + "/plan_repair_max_prefix", 3)
+        # pass the current plan as hint to the planner, a still valid remainder is kept unless the planner finds a
+        # cheaper plan
+        self._plan_hint = kwargs['plan_hint'] if 'plan_hint' in kwargs else \
+            rospy.get_param(self._param_prefix + "/plan_hint", False)
+        self.__domain_model = None  # PDDLDomain of the last repaired domain
+        self.__domain_model_pddl = None
+        self.__planning_domain = None, None  # tuple(PlanningDomain, planner that has loaded the domain)
+        self.__plan_repair_attempts = 0
+        self.__plan_repair_successes = 0
+
+        # time in seconds the planner may use per step, afterwards planning continues in the background and the manager
+        # keeps stepping with the previous plan, 0 for waiting for the planner in any case
+        self._planning_deadline = kwargs['planning_deadline'] if 'planning_deadline' in kwargs else \
+            rospy.get_param(self._param_prefix + "/planning_deadline", 0.0)
+        self.__planning_job = None  # planning in the background after the deadline has been exceeded
+        self.__planning_job_problem_key = None
+        self.__planning_job_start = None
+
+        # plan in a separate thread owned by the manager, steps only trigger planning and consume the results
+        background_planning = kwargs['background_planning'] if 'background_planning' in kwargs else \
+            rospy.get_param(self._param_prefix + "/background_planning", False)
+        self.__planner_thread = PlannerThread(name="PlannerThread" + self._prefix) if background_planning else None
+        self.__background_planning_job = None
+        self.__background_planning_revision = None
+        # revision of the planning problem, it is only incremented if the problem becomes incompatible to the
+        # previous one, see _get_planning_problem_key()
+        self.__planning_problem_revision = 0
+        self.__planning_problem_key = None
+
+        rhbplog.loginfo("Using planning_deadline:%f, background_planning:%s", self._planning_deadline,
+                        background_planning)
+
         self._plan = {}
         self._planExecutionIndex = 0
         self.__goalPDDLs = {}
         self.__last_domain_PDDL = ""
+        self.__domain_PDDL = None  # PDDL object with the predicates and functions of the last domain
+        self.__domain_key = None  # actions and functions the last domain was assembled from
         self._currently_pursued_goals = []
 
-        self.planner = MetricFF()
+        # amount of persistent planner processes that are reused for planning, 0 for forking a new process per plan.
+        # The processes live until unregister() is called, hence the pool is opt-in
+        planner_worker_pool_size = kwargs['planner_worker_pool_size'] if 'planner_worker_pool_size' in kwargs else \
+            rospy.get_param(self._param_prefix + "/planner_worker_pool_size", 0)
+
+        # timeout of a single planner call in seconds if worker processes are used, 0 for no timeout
+        planner_timeout = kwargs['planner_timeout'] if 'planner_timeout' in kwargs else \
+            rospy.get_param(self._param_prefix + "/planner_timeout", 0.0)
+
+        # amount of goal sequences that are planned concurrently in the priority goal sequence search, 1 for
+        # planning one sequence after another
+        self.__parallel_goal_sequences = kwargs['planner_parallel_goal_sequences'] \
+            if 'planner_parallel_goal_sequences' in kwargs else \
+            rospy.get_param(self._param_prefix + "/planner_parallel_goal_sequences", 1)
+
+        if planner_worker_pool_size > 0:
+            planner_worker_pool_size = max(planner_worker_pool_size, self.__parallel_goal_sequences)
+
+        rhbplog.loginfo("Using planner_worker_pool_size:%d, planner_timeout:%f, planner_parallel_goal_sequences:%d",
+                        planner_worker_pool_size, planner_timeout, self.__parallel_goal_sequences)
+
+        # used planner backend: 'metric_ff' or 'python' for the in-process planner
+        planner_name = kwargs['planner'] if 'planner' in kwargs else \
+            rospy.get_param(self._param_prefix + "/planner", 'metric_ff')
+
+        rhbplog.loginfo("Using planner: %s", planner_name)
+
+        if planner_name == 'python':
+            self.planner = PythonPlanner()
+        else:
+            if planner_name != 'metric_ff':
+                rhbplog.logwarn("Unknown planner '%s', using 'metric_ff'", planner_name)
+            self.planner = MetricFF(worker_pool_size=planner_worker_pool_size,
+                                    timeout=planner_timeout if planner_timeout > 0 else None)
+
+        # amount of most recent planner calls and plan searches that are considered in the telemetry histograms
+        planner_telemetry_window = kwargs['planner_telemetry_window'] if 'planner_telemetry_window' in kwargs else \
+            rospy.get_param(self._param_prefix + "/planner_telemetry_window", 100)
+
+        rhbplog.loginfo("Using planner_telemetry_window:%d", planner_telemetry_window)
+
+        # the telemetry measures the actual planner calls, cache hits are reported by the cache
+        self.__planner_telemetry = InstrumentedPlanner(planner=self.planner, window=planner_telemetry_window)
+        self.planner = self.__planner_telemetry
+        self.__planning_duration = RollingHistogram(InstrumentedPlanner.DURATION_BOUNDS, planner_telemetry_window)
+        self.__planning_goal_sequences = RollingHistogram((1, 2, 4, 8, 16, 32), planner_telemetry_window)
+        self.__last_planning_duration = 0.0
+        self.__last_planning_goal_sequences = 0
+
+        # amount of cached plans for recurring planning problems, 0 disables the cache
+        planner_cache_size = kwargs['planner_cache_size'] if 'planner_cache_size' in kwargs else \
+            rospy.get_param(self._param_prefix + "/planner_cache_size", 100)
+
+        # time in seconds after which a cached plan expires, 0 for no expiry
+        planner_cache_ttl = kwargs['planner_cache_ttl'] if 'planner_cache_ttl' in kwargs else \
+            rospy.get_param(self._param_prefix + "/planner_cache_ttl", 0.0)
+
+        rhbplog.loginfo("Using planner_cache_size:%d, planner_cache_ttl:%f", planner_cache_size, planner_cache_ttl)
+
+        if planner_cache_size > 0:
+            self.planner = CachingPlanner(planner=self.planner, size=planner_cache_size,
+                                          ttl=planner_cache_ttl if planner_cache_ttl > 0 else None)
 
         # create activation algorithm
         algorithm_name = kwargs['activation_algorithm'] if 'activation_algorithm' in kwargs else \
@@ -125,6 +255,13 @@ class Manager(object):
         rhbplog.loginfo("Using activation algorithm: %s", algorithm_name)
         self.activation_algorithm = ActivationAlgorithmFactory.create_algorithm(algorithm_name, self)
 
+        # 'auto': record and log the activation components only if the planner status is subscribed or debug logging is
+        # enabled, 'always' or 'never'
+        self._activation_diagnostics = kwargs['activation_diagnostics'] if 'activation_diagnostics' in kwargs else \
+            rospy.get_param(self._param_prefix + "/activation_diagnostics", 'auto')
+
+        rhbplog.loginfo("Using activation diagnostics: %s", self._activation_diagnostics)
+
         self.pause_counter = 0  # counts pause requests, step is only executed at pause_counter = 0
         self.__enable = enabled
 
@@ -179,6 +316,12 @@ class Manager(object):
         self.__plan_with_goal.shutdown()
         self.__statusPublisher.unregister()
         self.__pub_discover.unregister()
+        self.__status_fetcher.close()
+        if self.__planner_thread:
+            self.__planner_thread.shutdown()
+        self.planner.close()
+        if self.__status_cache:
+            self.__status_cache.shutdown()
 
     def __del__(self):
         self.unregister()
@@ -195,7 +338,10 @@ class Manager(object):
         self._planExecutionIndex = 0
         self.__goalPDDLs = {}
         self.__last_domain_PDDL = ""
+        self.__domain_key = None
         self._currently_pursued_goals = []
+        self.__planning_job = None
+        self.__background_planning_job = None
         self.__replanningNeeded = True
         self._totalActivation = 0.0  # pre-computed (in step()) sum all activations of operational behaviours
         self._activationThreshold = rospy.get_param(self._param_prefix + "/activationThreshold", 7.0)
@@ -212,46 +358,22 @@ class Manager(object):
         '''
         behaviourPDDLs = [behaviour.fetchPDDL(update_computation) for behaviour in behaviours]
         self.__goalPDDLs = {goal: goal.fetchPDDL(update_computation) for goal in goals}
-        pddl = PDDL()
-        # Get relevant domain information from behaviour pddls
-        for actionPDDL, state_pddl in behaviourPDDLs:
-            pddl.statement += actionPDDL.statement
-            pddl.predicates = pddl.predicates.union(actionPDDL.predicates)
-            pddl.functions = pddl.functions.union(actionPDDL.functions)
-            pddl.functions = pddl.functions.union(state_pddl.functions)
-        # Get relevant domain information from goal pddls
-        for goal, goal_pddl in self.__goalPDDLs.iteritems():
-            if goal_pddl is None:
-                continue
-            # pddl.statement and  pddl.predicates are not needed from goals for the domain description
-            actionPDDL, state_pddl = goal_pddl
-            pddl.functions = pddl.functions.union(actionPDDL.functions)
-            pddl.functions = pddl.functions.union(state_pddl.functions)
-        domainPDDLString = "(define (domain {0})\n".format(self._getDomainName())
-        # Update requirements if necessary
-        # Actually :fluents could just be :numeric-fluents, but this is not accepted by metric-ff
-        domainPDDLString += "(:requirements :strips :adl :equality :negation :conditional-effects :fluents)\n"
-        domainPDDLString += "(:predicates\n    " + "\n    ".join("({0})".format(x) for x in pddl.predicates) + ")\n"
-        domainPDDLString += "(:functions\n    " + "\n    ".join("({0})".format(x) for x in pddl.functions) + ")\n"
-        domainPDDLString += pddl.statement + ")"
-        merged_state_pddl = PDDL()
+        pddl, domainPDDLString = self._get_domain_pddl(behaviourPDDLs, self.__goalPDDLs.values())
+        merged_state = PDDLState()
         for _actionPDDL, state_pddl in behaviourPDDLs:
-            merged_state_pddl = mergeStatePDDL(state_pddl, merged_state_pddl)
+            merged_state.add_pddl(state_pddl)
         for v in self.__goalPDDLs.itervalues():
             if not v is None:
                 _goalPDDL, state_pddl = v
-                merged_state_pddl = mergeStatePDDL(state_pddl, merged_state_pddl)
+                merged_state.add_pddl(state_pddl)
 
-        merged_state_pddl = init_missing_functions(pddl, merged_state_pddl)
+        merged_state.init_missing_functions(pddl.functions)
 
-        # we parse the PDDL before negative predicates are filtered out
-        new_parsed_state_pddl = parseStatePDDL(merged_state_pddl)
+        # we take the values before negative predicates are filtered out
+        new_parsed_state_pddl = merged_state.values
 
         # filter out negative predicates. FF can't handle them!
-        state_pddl = PDDL(statement="\n\t\t".join(
-            filter(lambda x: predicateRegex.match(x) is None or predicateRegex.match(x).group(2) is None, tokenizePDDL(merged_state_pddl.statement)))
-        )# if the regex does not match it is a function (which is ok) and if the second group is None it is not negated
-         # (which is also ok)
+        state_pddl = merged_state.get_pddl(include_negative_predicates=False)
 
         # compute changes
         new_sensor_changes = getStatePDDLchanges(self.__previous_parsed_state_pddl, new_parsed_state_pddl)
@@ -260,36 +382,53 @@ class Manager(object):
         self.__sensorChanges = new_sensor_changes
         self.__previousStatePDDL = state_pddl
         self.__previous_parsed_state_pddl = new_parsed_state_pddl
-        self.__last_domain_PDDL = domainPDDLString
         return domainPDDLString, state_pddl
 
-    def _reset_sensor_changes(self):
-        self.__aggregated_sensor_changes = {}
-
-    def _create_problem_pddl(self, goals, state_pddl):
-        '''
-        This method creates the problem PDDL for a given set of goals.
-        It relies on the fact that self.fetchPDDL() has run before and filled the self.__goalPDDLs dictionary with the most recent responses from the actual goals and self.__previousStatePDDL with the CURRENT state PDDL
-        '''
-        goalConditions = (self.__goalPDDLs[goal][0].statement for goal in goals) # self.__goalPDDLs[goal][0] is the goalPDDL of goal's (goalPDDL, statePDDL) tuple
-        problemPDDLString = self._create_problem_pddl_string(" ".join(goalConditions), state_pddl)
+    def _get_domain_pddl(self, behaviour_pddls, goal_pddls):
+        """
+        Get the domain description, it is only assembled again if any action PDDL or the set of functions has changed
+        :param behaviour_pddls: list of (action PDDL, state PDDL) tuples of the behaviours
+        :param goal_pddls: list of (goal PDDL, state PDDL) tuples of the goals, None entries are ignored
+        :return: tuple(PDDL object with the domain predicates and functions, domain PDDL string)
+        """
+        functions = set()
+        for _actionPDDL, state_pddl in behaviour_pddls:
+            functions.update(state_pddl.functions)
+        # pddl.statement and  pddl.predicates are not needed from goals for the domain description
+        for goal_pddl in goal_pddls:
+            if goal_pddl is None:
+                continue
+            goalPDDL, state_pddl = goal_pddl
+            functions.update(goalPDDL.functions)
+            functions.update(state_pddl.functions)
 
-        return problemPDDLString
+        # the behaviours provide the same action PDDL objects as long as they have not changed, hence comparing the
+        # statements is cheap
+        domain_key = (tuple(actionPDDL.statement for actionPDDL, _state_pddl in behaviour_pddls), frozenset(functions))
+        if domain_key == self.__domain_key:
+            return self.__domain_PDDL, self.__last_domain_PDDL
 
-    def _create_problem_pddl_string(self, goal_conditions_string, state_pddl):
-        """
-        Creates a problem PDDL-String for a given String, that contains all goal statements
+        pddl = PDDL(functions=list(functions))
+        # Get relevant domain information from behaviour pddls
+        for actionPDDL, _state_pddl in behaviour_pddls:
+            pddl.statement += actionPDDL.statement
+            pddl.predicates = pddl.predicates.union(actionPDDL.predicates)
+            pddl.functions = pddl.functions.union(actionPDDL.functions)
+        domainPDDLString = "(define (domain {0})\n".format(self._getDomainName())
+        # Update requirements if necessary
+        # Actually :fluents could just be :numeric-fluents, but this is not accepted by metric-ff
+        domainPDDLString += "(:requirements :strips :adl :equality :negation :conditional-effects :fluents)\n"
+        domainPDDLString += "(:predicates\n    " + "\n    ".join("({0})".format(x) for x in pddl.predicates) + ")\n"
+        domainPDDLString += "(:functions\n    " + "\n    ".join("({0})".format(x) for x in pddl.functions) + ")\n"
+        domainPDDLString += pddl.statement + ")"
 
-        :param goal_conditions_string: string containing all goal statements separated by a space
-        :param state_pddl: current State PDDL object.
-        :return: problemPDDLString
-        """
+        self.__domain_key = domain_key
+        self.__domain_PDDL = pddl
+        self.__last_domain_PDDL = domainPDDLString
+        return pddl, domainPDDLString
 
-        problemPDDLString = "(define (problem problem-{0})\n\t(:domain {0})\n\t(:init \n\t\t{1}\n\t)\n".format(
-            self._getDomainName(), state_pddl.statement)
-        problemPDDLString += "\t(:goal (and {0}))\n\t(:metric minimize (costs))\n".format(goal_conditions_string)
-        problemPDDLString += ")\n"
-        return problemPDDLString
+    def _reset_sensor_changes(self):
+        self.__aggregated_sensor_changes = {}
 
     def _log_pddl_files(self, domainPDDLString, problemPDDLString, goals):
 
@@ -301,13 +440,15 @@ class Manager(object):
         problemLog = LogFileWriter(path=self.__log_file_path_prefix, filename=filename, extension=".pddl")
         problemLog.write(problemPDDLString)
 
-    def _generate_priority_goal_sequences(self):
+    def _generate_priority_goal_sequences(self, goals=None):
         '''
         This is a generator that generates goal sequences with descending priorities.
         It yields sorted lists with the most important goal at the front and strips away one element from the back at each iteration.
         After the most important goal was the only remaining element in the list the same process repeats for the second most important goals and so on.
+        :param goals: goals to generate the sequences from, default are the operational goals
         '''
-        sortedGoals = sorted(self._operational_goals, key=lambda x: x.priority, reverse=True)
+        sortedGoals = sorted(self._operational_goals if goals is None else goals, key=lambda x: x.priority,
+                             reverse=True)
         numElements = len(sortedGoals)
         for i in xrange(0, numElements, 1):
             for j in xrange(numElements, i, -1):
@@ -387,36 +528,12 @@ class Manager(object):
             # The reduction will eliminate goals of inferior priority until the highest priority goal is tried alone.
             # If that cannot be reached the search goes backwards and tries all other goals with lower priorities in
             # descending order until a reachable goal is found.
-            for goal_sequence in self._generate_priority_goal_sequences():
-                problem_pddl = ""
-                try:
-                    rhbplog.logdebug("trying to reach goals %s", goal_sequence)
-                    problem_pddl = self._create_problem_pddl(goal_sequence, state_pddl)
-
-                    tmp_plan = self.planner.plan(domain_pddl, problem_pddl)
-                    if tmp_plan and "cost" in tmp_plan and tmp_plan["cost"] != -1.0:
-                        rhbplog.loginfo("FOUND PLAN: %s", tmp_plan)
-                        self._plan = tmp_plan
-                        self.__replanningNeeded = False
-                        self._planExecutionIndex = 0
-                        self._reset_sensor_changes()
-                        self._currently_pursued_goals = goal_sequence
-                        break
-                    else:
-                        rhbplog.loginfo("PROBLEM IMPOSSIBLE")
-                        # resetting the plan to avoid that we try to follow an impossible plan.
-                        self._planExecutionIndex = 0
-                        self._plan = {}
-                    if self._create_log_files:
-                        self._log_pddl_files(domain_pddl, problem_pddl, goal_sequence)
-                except Exception as e:
-                    rhbplog.logerr("PLANNER ERROR: %s. Generating PDDL log files for step %d", e, self._stepCounter)
-                    self.__replanningNeeded = True  # in case of planning exceptions try again next iteration
-                    self._planExecutionIndex = 0
-                    self._plan = {}
-                    self._log_pddl_files(domain_pddl, problem_pddl, goal_sequence)
-            if not self._plan:
-                self._currently_pursued_goals = []
+            # deviations from the plan might be solved by a plan repair, changed goals or behaviours require planning
+            if self.__replanningNeeded or not self._plan_repair or not self._repair_plan(domain_pddl, state_pddl):
+                if self.__planner_thread:
+                    self._plan_in_planner_thread(domain_pddl, state_pddl)
+                else:
+                    self._plan_goal_sequences_with_deadline(domain_pddl, state_pddl)
         else:
             rhbplog.loginfo("### NOT PLANNING ### because replanning needed: %s\n"
                             "planIndex: %s, unexpected_behaviour_finished:%s, all_changes_were_not_expected:%s, "
@@ -425,6 +542,463 @@ class Manager(object):
                             all_changes_were_not_expected, planned_behaviour_effects_realised,
                             executed_behaviours_missing_effect_influence)
 
+    def _repair_plan(self, domain_pddl, state_pddl):
+        """
+        Try to keep the remaining part of the current plan after a deviation, see _find_plan_repair()
+        :param domain_pddl: domain PDDL string
+        :param state_pddl: state PDDL object
+        :return: True if the plan has been repaired
+        """
+        if not self._plan or not self._plan.get("actions") or not self._currently_pursued_goals:
+            return False
+
+        self.__plan_repair_attempts += 1
+        try:
+            repaired_plan = self._find_plan_repair(domain_pddl, state_pddl)
+        except Exception as e:  # unsupported PDDL or planner errors
+            rhbplog.logwarn("Plan repair failed: %s", e)
+            repaired_plan = None
+
+        if repaired_plan is None:
+            rhbplog.loginfo("Plan repair not possible (repaired %d of %d)", self.__plan_repair_successes,
+                            self.__plan_repair_attempts)
+            return False
+
+        self.__plan_repair_successes += 1
+        self._plan = repaired_plan
+        self._planExecutionIndex = 0
+        self._reset_sensor_changes()
+        rhbplog.loginfo("REPAIRED PLAN: %s (repaired %d of %d)", repaired_plan, self.__plan_repair_successes,
+                        self.__plan_repair_attempts)
+        return True
+
+    def _find_plan_repair(self, domain_pddl, state_pddl):
+        """
+        Find a plan that reaches the currently pursued goals from the current state and keeps as much as possible of
+        the remaining plan. At first, the remaining plan is checked for a later step from which the remaining actions
+        are still applicable and reach the goals (skip ahead). Otherwise, a short new prefix is planned that establishes
+        the precondition of one of the next plan steps and rejoins the old plan.
+        :param domain_pddl: domain PDDL string
+        :param state_pddl: state PDDL object
+        :return: plan dictionary or None
+        """
+        if domain_pddl != self.__domain_model_pddl:
+            self.__domain_model = PDDLDomain.from_pddl(domain_pddl)
+            self.__domain_model_pddl = domain_pddl
+        domain = self.__domain_model
+
+        goal_statements = []
+        for goal in self._currently_pursued_goals:
+            if goal not in self.__goalPDDLs:
+                return None
+            goal_statements.append(self.__goalPDDLs[goal][0].statement)
+        goal_condition = parse_condition("(and " + " ".join(goal_statements) + ")")
+
+        state = self.__previous_parsed_state_pddl
+        actions = self._plan["actions"]
+        remaining_actions = [actions[index] for index in sorted(actions) if index >= self._planExecutionIndex]
+
+        plan = self._skip_ahead(domain, remaining_actions, state, goal_condition)
+        if plan:
+            return plan
+
+        # rejoin the plan with a new prefix
+        for rejoin_index in xrange(min(len(remaining_actions), self._plan_repair_max_prefix)):
+            action = domain.actions.get(remaining_actions[rejoin_index])
+            if action is None:  # the plan does not fit to the domain any longer
+                return None
+            if not action.precondition:
+                continue
+            prefix_plan = self.planner.plan_problem(self._get_planning_domain(domain_pddl), state_pddl.statement,
+                                                    expression_to_pddl(action.precondition))
+            if not self._is_plan_feasible(prefix_plan) or len(prefix_plan["actions"]) > self._plan_repair_max_prefix:
+                continue
+            prefix = [prefix_plan["actions"][index] for index in sorted(prefix_plan["actions"])]
+            plan = self._validate_plan(domain, prefix + remaining_actions[rejoin_index:], state, goal_condition)
+            if plan:
+                rhbplog.logdebug("Plan repair rejoins the plan at action %d with prefix %s", rejoin_index, prefix)
+                return plan
+        return None
+
+    @staticmethod
+    def _skip_ahead(domain, action_names, state, goal_condition):
+        """
+        Find the shortest remainder of a plan that is still applicable and reaches the goals, the empty remainder is
+        used if the goals are already reached
+        :param domain: PDDLDomain
+        :param action_names: list of the remaining action names of the plan
+        :param state: dict {name: value} of the current state
+        :param goal_condition: parsed goal expression
+        :return: plan dictionary or None
+        """
+        for rejoin_index in xrange(len(action_names), -1, -1):
+            plan = Manager._validate_plan(domain, action_names[rejoin_index:], state, goal_condition)
+            if plan:
+                rhbplog.logdebug("Plan repair skips %d actions", rejoin_index)
+                return plan
+        return None
+
+    @staticmethod
+    def _validate_plan(domain, action_names, state, goal_condition):
+        """
+        :param domain: PDDLDomain
+        :param action_names: list of action names
+        :param state: dict {name: value} of the current state
+        :param goal_condition: parsed goal expression
+        :return: plan dictionary if the actions are applicable one after another and reach the goals, otherwise None
+        """
+        final_state = domain.simulate(action_names, state)
+        if final_state is None or not evaluate_condition(goal_condition, final_state):
+            return None
+        cost = (final_state.get(COST_FUNCTION) or 0.0) - (state.get(COST_FUNCTION) or 0.0)
+        return {"cost": cost, "actions": dict(enumerate(action_names))}
+
+    def _plan_goal_sequences_with_deadline(self, domain_pddl, state_pddl):
+        """
+        Search the plan for the most preferred feasible goal sequence. If a planning deadline is configured and the
+        search takes longer, it continues in the background while the manager keeps stepping with the previous plan.
+        The result is adopted in a later step if it is still compatible with the current planning problem, see
+        _get_planning_problem_key().
+        :param domain_pddl: domain PDDL string
+        :param state_pddl: state PDDL object
+        """
+        goals = list(self._operational_goals)
+        goal_statements = {goal: self.__goalPDDLs[goal][0].statement for goal in goals}
+        problem_key = self._get_planning_problem_key(domain_pddl, goal_statements)
+
+        if self.__planning_job:
+            if not self.__planning_job.done():
+                rhbplog.loginfo("### PLANNING IN BACKGROUND ### since %fs",
+                                (rospy.get_rostime() - self.__planning_job_start).to_sec())
+                return
+            planning_job = self.__planning_job
+            self.__planning_job = None
+            if problem_key == self.__planning_job_problem_key:
+                rhbplog.loginfo("Adopting result of background planning")
+                self._apply_planning_result(planning_job)
+                return
+            rhbplog.loginfo("Discarding result of background planning because the planning problem has changed")
+
+        planning_domain = self._load_planning_domain(domain_pddl, state_pddl, goals, goal_statements)
+        if planning_domain is None:
+            return
+
+        if self._planning_deadline <= 0:
+            try:
+                result = self._search_plan(planning_domain, state_pddl, goals, goal_statements,
+                                           hint=self._get_plan_hint())
+            except Exception as e:
+                rhbplog.logerr("PLANNER ERROR: %s", e)
+                result = None, None, True, None
+            self._apply_planning_result(result)
+            return
+
+        planning_job = submit_planning_function(self._search_plan, planning_domain, state_pddl, goals,
+                                                goal_statements, hint=self._get_plan_hint())
+        if planning_job.wait(timeout=self._planning_deadline):
+            self._apply_planning_result(planning_job)
+        else:
+            rhbplog.loginfo("Planning deadline of %fs exceeded, continue planning in background",
+                            self._planning_deadline)
+            self.__planning_job = planning_job
+            self.__planning_job_problem_key = problem_key
+            self.__planning_job_start = rospy.get_rostime()
+            self.__replanningNeeded = True  # check for the result in the next step
+
+    def _plan_in_planner_thread(self, domain_pddl, state_pddl):
+        """
+        Trigger the plan search in the planner thread and adopt its results. Results for a superseded revision of the
+        planning problem are dropped.
+        :param domain_pddl: domain PDDL string
+        :param state_pddl: state PDDL object
+        """
+        goals = list(self._operational_goals)
+        goal_statements = {goal: self.__goalPDDLs[goal][0].statement for goal in goals}
+        problem_key = self._get_planning_problem_key(domain_pddl, goal_statements)
+        if problem_key != self.__planning_problem_key:
+            self.__planning_problem_key = problem_key
+            self.__planning_problem_revision += 1
+
+        planning_job = self.__background_planning_job
+        if planning_job and planning_job.done():
+            self.__background_planning_job = None
+            if self.__background_planning_revision == self.__planning_problem_revision:
+                rhbplog.logdebug("Adopting result of planner thread after %fs", self.__planner_thread.latency)
+                self._apply_planning_result(planning_job)
+                return
+            rhbplog.loginfo("Dropping stale result of planner thread for revision %d, current revision %d",
+                            self.__background_planning_revision, self.__planning_problem_revision)
+
+        if not self.__background_planning_job or \
+                self.__background_planning_revision != self.__planning_problem_revision:
+            planning_domain = self._load_planning_domain(domain_pddl, state_pddl, goals, goal_statements)
+            if planning_domain is None:
+                return
+            self.__background_planning_job = self.__planner_thread.submit(self._search_plan, planning_domain,
+                                                                          state_pddl, goals, goal_statements,
+                                                                          hint=self._get_plan_hint())
+            self.__background_planning_revision = self.__planning_problem_revision
+        rhbplog.loginfo("### PLANNING IN BACKGROUND ### revision %d, queue depth %d",
+                        self.__planning_problem_revision, self.__planner_thread.queue_depth)
+        self.__replanningNeeded = True  # check for the result in the next step
+
+    def _get_planning_problem_key(self, domain_pddl, goal_statements):
+        """
+        Create a key for the compatibility of planning problems. Problems are considered compatible if the domain,
+        the goals and the predicates of the state are the same. Numeric functions usually change while the planner is
+        running, deviations of the plan that are caused by them are detected by the plan monitoring.
+        :param domain_pddl: domain PDDL string
+        :param goal_statements: dict goal -> goal PDDL statement
+        :return: hashable key
+        """
+        predicates = frozenset((name, value) for name, value in self.__previous_parsed_state_pddl.iteritems()
+                               if isinstance(value, bool))
+        goals = frozenset((goal.name, statement) for goal, statement in goal_statements.iteritems())
+        return domain_pddl, goals, predicates
+
+    def _apply_planning_result(self, result):
+        """
+        Use the result of a plan search and record its telemetry
+        :param result: tuple(plan, goal_sequence, planner_failed, telemetry) like returned by _search_plan() or a
+                       PlanningJob providing such result
+        """
+        if isinstance(result, PlanningJob):
+            try:
+                result = result.result()
+            except Exception as e:
+                rhbplog.logerr("PLANNER ERROR: %s", e)
+                result = None, None, True, None
+
+        plan, goal_sequence, planner_failed, telemetry = result
+        if telemetry:
+            self.__last_planning_duration, self.__last_planning_goal_sequences = telemetry
+            self.__planning_duration.add(self.__last_planning_duration)
+            self.__planning_goal_sequences.add(self.__last_planning_goal_sequences)
+        if plan:
+            self._adopt_plan(plan, goal_sequence)
+        else:
+            if planner_failed:
+                self.__replanningNeeded = True  # in case of planning exceptions try again next iteration
+            # resetting the plan to avoid that we try to follow an impossible plan.
+            self._planExecutionIndex = 0
+            self._plan = {}
+            self._currently_pursued_goals = []
+
+    def _search_plan(self, planning_domain, state_pddl, goals, goal_statements, hint=None):
+        """
+        Search the plan for the most preferred feasible goal sequence. The method does not modify the state of the
+        manager, hence it can also be called in a separate thread. The telemetry is recorded by
+        _apply_planning_result().
+        :param planning_domain: PlanningDomain, see _get_planning_domain()
+        :param state_pddl: state PDDL object
+        :param goals: goals that should be reached
+        :param goal_statements: dict goal -> goal PDDL statement
+        :param hint: list of action names passed as hint to the planner, see _get_plan_hint()
+        :return: tuple(plan or None, reached goal sequence or None, True if the planner failed for any goal sequence,
+                 tuple(duration in seconds, amount of tried goal sequences))
+        """
+        start = time.time()
+        goal_sequences = self._generate_priority_goal_sequences(goals)
+        if self.__parallel_goal_sequences > 1:
+            plan, goal_sequence, planner_failed, tried_goal_sequences = self._plan_goal_sequences_in_parallel(
+                planning_domain, state_pddl, goal_sequences, goal_statements, hint=hint)
+        else:
+            plan, goal_sequence, planner_failed, tried_goal_sequences = self._plan_goal_sequences(
+                planning_domain, state_pddl, goal_sequences, goal_statements, hint=hint)
+        duration = time.time() - start
+
+        rhbplog.loginfo("Plan search took %fs for %d goal sequences, domain size: %d, state size: %d", duration,
+                        tried_goal_sequences, len(planning_domain.domain_pddl), len(state_pddl.statement))
+
+        return plan, goal_sequence, planner_failed, (duration, tried_goal_sequences)
+
+    def _get_plan_hint(self):
+        """
+        :return: action names of the current plan or None if plan hints are disabled or there is no plan. The planner
+                 uses the shortest remainder of the plan that still reaches the goals.
+        """
+        if not self._plan_hint or not self._plan or not self._plan.get("actions"):
+            return None
+        actions = self._plan["actions"]
+        return [actions[index] for index in sorted(actions)]
+
+    def _get_planning_domain(self, domain_pddl):
+        """
+        Get the planner handle of the domain, the domain is only loaded again by the planner if it has changed
+        :param domain_pddl: domain PDDL string
+        :return: PlanningDomain
+        """
+        planning_domain, planner = self.__planning_domain
+        if planning_domain is None or planning_domain.domain_pddl != domain_pddl or planner is not self.planner:
+            planning_domain = self.planner.load_domain(domain_pddl)
+            self.__planning_domain = planning_domain, self.planner
+        return planning_domain
+
+    def _load_planning_domain(self, domain_pddl, state_pddl, goals, goal_statements):
+        """
+        Get the planner handle of the domain like _get_planning_domain(). A domain the planner is not able to load, e.g.
+        because of unsupported constructs, is handled like a failed plan search.
+        :param domain_pddl: domain PDDL string
+        :param state_pddl: state PDDL object
+        :param goals: goals that should be reached
+        :param goal_statements: dict goal -> goal PDDL statement
+        :return: PlanningDomain or None if the domain could not be loaded
+        """
+        try:
+            return self._get_planning_domain(domain_pddl)
+        except Exception as e:
+            rhbplog.logerr("PLANNER ERROR: %s. Generating PDDL log files for step %d", e, self._stepCounter)
+            goal_condition = self._create_goal_sequence_condition(goals, goal_statements)
+            self._log_pddl_files(domain_pddl, PlanningDomain(domain_pddl).create_problem_pddl(state_pddl.statement,
+                                                                                              goal_condition),
+                                 goals)
+            self._apply_planning_result((None, None, True, None))
+            return None
+
+    @staticmethod
+    def _create_goal_sequence_condition(goal_sequence, goal_statements):
+        return create_goal_condition(goal_statements[goal] for goal in goal_sequence)
+
+    def _plan_goal_sequences(self, planning_domain, state_pddl, goal_sequences, goal_statements, hint=None):
+        """
+        Plan the goal sequences one after another until a feasible plan is found
+        :param planning_domain: PlanningDomain
+        :param state_pddl: state PDDL object
+        :param goal_sequences: goal sequences in the order of preference
+        :param goal_statements: dict goal -> goal PDDL statement
+        :param hint: list of action names passed as hint to the planner
+        :return: tuple like _search_plan() with the amount of tried goal sequences as additional last element
+        """
+        planner_failed = False
+        tried_goal_sequences = 0
+        for goal_sequence in goal_sequences:
+            tried_goal_sequences += 1
+            goal_condition = self._create_goal_sequence_condition(goal_sequence, goal_statements)
+            try:
+                rhbplog.logdebug("trying to reach goals %s", goal_sequence)
+                tmp_plan = self.planner.plan_problem(planning_domain, state_pddl.statement, goal_condition, hint=hint)
+                if self._is_plan_feasible(tmp_plan):
+                    return tmp_plan, goal_sequence, planner_failed, tried_goal_sequences
+                else:
+                    rhbplog.loginfo("PROBLEM IMPOSSIBLE")
+                if self._create_log_files:
+                    self._log_pddl_files(planning_domain.domain_pddl,
+                                         planning_domain.create_problem_pddl(state_pddl.statement, goal_condition),
+                                         goal_sequence)
+            except Exception as e:
+                rhbplog.logerr("PLANNER ERROR: %s. Generating PDDL log files for step %d", e, self._stepCounter)
+                planner_failed = True
+                self._log_pddl_files(planning_domain.domain_pddl,
+                                     planning_domain.create_problem_pddl(state_pddl.statement, goal_condition),
+                                     goal_sequence)
+        return None, None, planner_failed, tried_goal_sequences
+
+    def _plan_goal_sequences_in_parallel(self, planning_domain, state_pddl, goal_sequences, goal_statements,
+                                         hint=None):
+        """
+        Plan several goal sequences concurrently, the sequences are submitted in their order of preference. The result
+        is the same as with _plan_goal_sequences(): the plan of the most preferred feasible goal sequence.
+        A feasible sequence makes all less preferred sequences obsolete, including its own subsets, hence their jobs
+        are cancelled. An infeasible sequence implies that all its supersets are infeasible as well, because a plan for
+        a superset would also reach the sequence, so their jobs are cancelled or not even started.
+        :param planning_domain: PlanningDomain
+        :param state_pddl: state PDDL object
+        :param goal_sequences: goal sequences in the order of preference
+        :param goal_statements: dict goal -> goal PDDL statement
+        :param hint: list of action names passed as hint to the planner
+        :return: tuple like _search_plan() with the amount of submitted goal sequences as additional last element
+        """
+        goal_sequences = list(goal_sequences)
+        goal_sets = [frozenset(goal.name for goal in goal_sequence) for goal_sequence in goal_sequences]
+        feasibility = [None] * len(goal_sequences)  # None: unknown, True: feasible, False: infeasible or failed
+        plans = {}
+        goal_conditions = {}
+        jobs = {}  # index of the goal sequence -> running planning job
+        finished_jobs = Queue()
+        candidate_count = len(goal_sequences)  # only sequences with a lower index are still relevant
+        planner_failed = False
+        tried_goal_sequences = 0
+
+        try:
+            while True:
+                best_index = next((i for i in xrange(candidate_count) if feasibility[i] is not False), None)
+                if best_index is None or feasibility[best_index]:
+                    break
+
+                # fill the free planner slots in the order of preference
+                for i in xrange(best_index, candidate_count):
+                    if len(jobs) >= self.__parallel_goal_sequences:
+                        break
+                    if feasibility[i] is None and i not in jobs:
+                        rhbplog.logdebug("trying to reach goals %s", goal_sequences[i])
+                        goal_conditions[i] = self._create_goal_sequence_condition(goal_sequences[i], goal_statements)
+                        jobs[i] = self.planner.submit_problem(planning_domain, state_pddl.statement,
+                                                              goal_conditions[i], hint=hint)
+                        tried_goal_sequences += 1
+                        jobs[i].add_done_callback(lambda job, index=i: finished_jobs.put((index, job)))
+
+                index, job = finished_jobs.get()
+                if jobs.get(index) is not job:  # cancelled in the meantime
+                    continue
+                del jobs[index]
+
+                try:
+                    tmp_plan = job.result()
+                except Exception as e:
+                    rhbplog.logerr("PLANNER ERROR: %s. Generating PDDL log files for step %d", e, self._stepCounter)
+                    planner_failed = True
+                    feasibility[index] = False  # no pruning because nothing is known about the feasibility
+                    self._log_pddl_files(planning_domain.domain_pddl,
+                                         planning_domain.create_problem_pddl(state_pddl.statement,
+                                                                             goal_conditions[index]),
+                                         goal_sequences[index])
+                    continue
+
+                if self._is_plan_feasible(tmp_plan):
+                    feasibility[index] = True
+                    plans[index] = tmp_plan
+                    candidate_count = index + 1
+                    for i in [i for i in jobs if i >= candidate_count]:
+                        jobs.pop(i).cancel()
+                else:
+                    rhbplog.loginfo("PROBLEM IMPOSSIBLE: %s", goal_sequences[index])
+                    for i in xrange(candidate_count):
+                        if feasibility[i] is None and goal_sets[i] >= goal_sets[index]:
+                            feasibility[i] = False
+                            if i in jobs:
+                                jobs.pop(i).cancel()
+                    if self._create_log_files:
+                        self._log_pddl_files(planning_domain.domain_pddl, planning_domain.create_problem_pddl(
+                            state_pddl.statement, goal_conditions[index]), goal_sequences[index])
+        finally:
+            for job in jobs.itervalues():
+                job.cancel()
+
+        if best_index is not None:
+            return plans[best_index], goal_sequences[best_index], planner_failed, tried_goal_sequences
+        return None, None, planner_failed, tried_goal_sequences
+
+    @staticmethod
+    def _is_plan_feasible(plan):
+        """
+        :param plan: plan dictionary returned by the planner
+        :return: True if the plan reaches the goals
+        """
+        return bool(plan) and "cost" in plan and plan["cost"] != -1.0
+
+    def _adopt_plan(self, plan, goal_sequence):
+        """
+        Use the given plan from now on
+        :param plan: feasible plan dictionary
+        :param goal_sequence: the goals reached by the plan
+        """
+        rhbplog.loginfo("FOUND PLAN: %s", plan)
+        self._plan = plan
+        self.__replanningNeeded = False
+        self._planExecutionIndex = 0
+        self._reset_sensor_changes()
+        self._currently_pursued_goals = goal_sequence
+
     def _finished_unexpected_behaviour(self, increment_planning_step):
         """
         # The method tracks progress on the plan and finds out if an unexpected behaviour finished.
@@ -660,7 +1234,8 @@ class Manager(object):
 
                     ### if the behaviour got here it really is ready to be started ###
                     rhbplog.loginfo("STARTING BEHAVIOUR %s", behaviour.name)
-                    behaviour.start()                                
+                    behaviour.start()
+                    self._invalidate_pushed_status(behaviour)
 
                     amount_currently_selected_behaviours += 1
 
@@ -688,6 +1263,10 @@ class Manager(object):
 
         self._stepCounter += 1
 
+        if self.__status_cache:
+            # behaviours and goals compute their status for the next step in the meantime
+            self.__status_cache.trigger(self._stepCounter)
+
     def _publish_planner_status(self, currently_influenced_sensors):
         """
         Collect all information for the plannerStatusMessage and publish it
@@ -738,6 +1317,24 @@ class Manager(object):
         if self._plan and "actions" in self._plan:
             plannerStatusMessage.plan = self._plan['actions'].values()
         plannerStatusMessage.plan_index = self._planExecutionIndex
+        plannerStatusMessage.status_fetch_duration = self.status_fetch_duration
+        plannerStatusMessage.plan_repair_attempts = self.__plan_repair_attempts
+        plannerStatusMessage.plan_repair_successes = self.__plan_repair_successes
+        plannerStatusMessage.planning_duration = self.__last_planning_duration
+        plannerStatusMessage.planning_goal_sequences = self.__last_planning_goal_sequences
+        last_planner_call = self.__planner_telemetry.last_call
+        if last_planner_call:
+            plannerStatusMessage.planner_call_duration = last_planner_call['duration']
+            if last_planner_call['evaluated_states'] is not None:
+                plannerStatusMessage.planner_evaluated_states = last_planner_call['evaluated_states']
+            plannerStatusMessage.planner_problem_size = last_planner_call['problem_size']
+        if isinstance(self.planner, CachingPlanner):
+            cache_statistics = self.planner.get_statistics()
+            plannerStatusMessage.plan_cache_hits = cache_statistics['hits']
+            plannerStatusMessage.plan_cache_misses = cache_statistics['misses']
+        if self.__planner_thread:
+            plannerStatusMessage.planner_queue_depth = self.__planner_thread.queue_depth
+            plannerStatusMessage.planner_latency = self.__planner_thread.latency
         self.__statusPublisher.publish(plannerStatusMessage)
 
     def update_activation(self, plan_if_necessary=True):
@@ -746,19 +1343,20 @@ class Manager(object):
         :param plan_if_necessary: enable or disable potentially required planning
         """
         self._totalActivation = 0.0
-        ### collect information about behaviours ###
+        ### collect information about behaviours and goals ###
+        self._fetch_status()
         for behaviour in self._behaviours:
-            behaviour.fetchStatus(self._stepCounter)
             if behaviour.operational:
                 self._totalActivation += behaviour.activation
         if self._totalActivation == 0.0:
             self._totalActivation = 1.0  # the behaviours are going to divide by this value so make sure it is non-zero
-        rhbplog.logdebug("############# GOAL STATES #############")
-        ### collect information about goals ###
+        debug_logging = rhbplog.is_enabled_for(logging.DEBUG)
+        if debug_logging:
+            rhbplog.logdebug("############# GOAL STATES #############")
         for goal in self._goals:
-            goal.fetchStatus(self._stepCounter)
-            rhbplog.logdebug("%s: enabled: %s, operational: %s, fulfillment: %f, wishes %s", goal.name, goal.enabled,
-                             goal.operational, goal.fulfillment, goal.wishes)
+            if debug_logging:
+                rhbplog.logdebug("%s: enabled: %s, operational: %s, fulfillment: %f, wishes %s", goal.name,
+                                 goal.enabled, goal.operational, goal.fulfillment, goal.wishes)
             # Deactivate non-permanent and satisfied goals
             if goal.enabled and not goal.permanent and goal.satisfied:
                 goal.enabled = False
@@ -772,6 +1370,7 @@ class Manager(object):
         ### use the symbolic planner if necessary ###
         if plan_if_necessary:
             self._plan_if_necessary()
+        self.activation_algorithm.diagnostics = self._is_activation_diagnostics_enabled(debug_logging=debug_logging)
         self.activation_algorithm.step_preparation()
         ### log behaviour stuff ###
         rhbplog.logdebug("########## BEHAVIOUR  STATES ##########")
@@ -787,11 +1386,48 @@ class Manager(object):
         self.calculate_final_behaviour_activations()
         rhbplog.loginfo("current activation threshold: %f", self._activationThreshold)
 
+    def _is_activation_diagnostics_enabled(self, debug_logging):
+        """
+        :param debug_logging: True if debug messages are logged
+        :return: True if the activation components of the behaviours are recorded and logged in this step
+        """
+        if self._activation_diagnostics == 'always':
+            return True
+        if self._activation_diagnostics == 'never':
+            return False
+        return debug_logging or self.__statusPublisher.get_num_connections() > 0
+
+    def _fetch_status(self):
+        """
+        Update the status of all behaviours and goals, either with batched requests per hosting node or with one
+        request per behaviour/goal. Depending on the configuration the requests are issued concurrently.
+        """
+        if self.__status_cache:
+            components = []
+            for behaviour in self._behaviours:
+                status = self.__status_cache.get_behaviour_status(behaviour.name, self._stepCounter)
+                if status:
+                    behaviour.update_status(status)
+                else:
+                    components.append(behaviour)
+            for goal in self._goals:
+                status = self.__status_cache.get_goal_status(goal.name, self._stepCounter)
+                if status:
+                    goal.update_status(status)
+                else:
+                    components.append(goal)
+        else:
+            components = self._behaviours + self._goals
+        self.__status_fetcher.fetch_status(components, self._stepCounter)
+        rhbplog.logdebug("Fetching the status took %f seconds", self.__status_fetcher.last_duration)
+
     def calculate_final_behaviour_activations(self):
         ### commit the activation computed in this step ###
+        debug_logging = rhbplog.is_enabled_for(logging.DEBUG)
         for behaviour in self._behaviours:
             self.activation_algorithm.commit_behaviour_activation(ref_behaviour=behaviour)
-            rhbplog.logdebug("activation of %s after this step: %f", behaviour.name, behaviour.activation)
+            if debug_logging:
+                rhbplog.logdebug("activation of %s after this step: %f", behaviour.name, behaviour.activation)
 
     def handle_interfering_correlations(self, behaviour, currently_influenced_sensors):
         """
@@ -879,6 +1515,7 @@ class Manager(object):
             return False
 
         behaviour.stop(reset_activation)
+        self._invalidate_pushed_status(behaviour)
         try:
             self.__executedBehaviours.remove(behaviour)  # remove it from the list of executed behaviours
         except ValueError as e:
@@ -887,6 +1524,14 @@ class Manager(object):
         rhbplog.logdebug("Stopped %s still running behaviours: %s", behaviour.name, self.__executedBehaviours)
         return True
 
+    def _invalidate_pushed_status(self, behaviour):
+        """
+        Ignore pushed status messages of a started or stopped behaviour that have been computed before the change
+        :param behaviour: the started or stopped behaviour
+        """
+        if self.__status_cache:
+            self.__status_cache.invalidate(behaviour.name, self._stepCounter + 1)
+
     def add_goal(self, goal):
         '''
         :param goal: The new goal
@@ -998,6 +1643,9 @@ class Manager(object):
             "plan_monitoring_behaviour_missing_influence", self._plan_monitoring_behaviour_missing_influence)
         self._plan_monitoring_unexpected_behaviour_finished = config.get(
             "plan_monitoring_unexpected_behaviour_finished", self._plan_monitoring_unexpected_behaviour_finished)
+        self._planning_deadline = config.get("planning_deadline", self._planning_deadline)
+        self._plan_repair = config.get("plan_repair", self._plan_repair)
+        self._plan_hint = config.get("plan_hint", self._plan_hint)
 
         self.activation_algorithm.update_config(**config)
 
@@ -1063,6 +1711,26 @@ class Manager(object):
         """
         return self._operational_goals
 
+    def get_planning_telemetry(self):
+        """
+        Statistics of the recent plan searches and planner calls, e.g. for tuning the planner configuration
+        :return: dict with the fields 'planning_duration' and 'planning_goal_sequences' (histogram summaries of the plan
+                 searches, see RollingHistogram.get_summary()), 'planner' (see InstrumentedPlanner.get_statistics())
+                 and 'plan_cache' (see CachingPlanner.get_statistics(), None if the cache is disabled)
+        """
+        return {'planning_duration': self.__planning_duration.get_summary(),
+                'planning_goal_sequences': self.__planning_goal_sequences.get_summary(),
+                'planner': self.__planner_telemetry.get_statistics(),
+                'plan_cache': self.planner.get_statistics() if isinstance(self.planner, CachingPlanner) else None}
+
+    @property
+    def status_fetch_duration(self):
+        """
+        duration of the status fetching of behaviours and goals in the last step
+        :return: duration in seconds
+        """
+        return self.__status_fetcher.last_duration
+
     @property
     def totalActivation(self):
         return self._totalActivation
@@ -1101,6 +1769,7 @@ class Manager(object):
             behaviour = self.__executedBehaviours[0]
             self.__executedBehaviours.remove(behaviour)  # remove it from the list of executed behaviours
             behaviour.stop(True)
+            self._invalidate_pushed_status(behaviour)
         for behaviour in self._behaviours:
             behaviour.reset_activation()
 
@@ -1117,43 +1786,54 @@ class Manager(object):
                 return False
         return True
 
-    def plan_with_additional_goal(self, goal_statement):
+    def create_planning_snapshot(self):
         """
-        Uses the PDDL-planer to make a plan for the last used combination of
-        operational goals and one additional goal statement
+        Capture domain, state and the conditions of the currently pursued goals once for several planning queries,
+        e.g. the plans needed for the cost evaluation of a delegated goal
 
         If fetchPDDL never was invoked before, it will be here (side effects on
         sensor changes etc (see _fetchPDDL()))
 
-        :param goal_statement: a proper PDDL goal statement
-        :type goal_statement: str
-        :return: a PDDL plan for currently pursued goals + goal statement
+        :return: snapshot of the current planning situation, its plans are impossible if the planner cannot load the
+                 domain
+        :rtype: PlanningSnapshot
         """
-
         with self._step_lock:
             if not self.__last_domain_PDDL or len(self._goals) == 0:
                 # first get the goals and behaviours we want to use for planning
                 behaviours = [x for x in self._behaviours if x.operational]
                 # take all goals
                 goals = [x for x in self._goals if x.operational]
-
                 domain_pddl, state_pddl = self._fetchPDDL(behaviours=behaviours, goals=goals, update_computation=True)
             else:
-                domain_pddl = copy(self.__last_domain_PDDL)
+                domain_pddl = self.__last_domain_PDDL  # the cached domain of the last _fetchPDDL()
                 state_pddl = self.__previousStatePDDL
 
             # self.__goalPDDLs[goal][0] is the goalPDDL of goal's (goalPDDL, statePDDL) tuple
-            current_goal_conditions = (self.__goalPDDLs[goal][0].statement for goal in self._currently_pursued_goals)
-            problem_pddl = self._create_problem_pddl_string(goal_conditions_string=" ".join(current_goal_conditions)
-                                                                                   + " " + goal_statement,
-                                                            state_pddl=state_pddl)
+            goal_statements = [self.__goalPDDLs[goal][0].statement for goal in self._currently_pursued_goals]
 
-        plan = self.planner.plan(domain_pddl=domain_pddl, problem_pddl=problem_pddl)
+            try:
+                planning_domain = self._get_planning_domain(domain_pddl)
+            except Exception as e:  # e.g. unsupported PDDL
+                rhbplog.logwarn("Domain could not be loaded, all plans of the planning snapshot are impossible: %s", e)
+                planning_domain = None
 
-        #if not (plan and "cost" in plan and plan["cost"] != -1.0):
-        #   rhbplog.logerr("%s ADDITIONAL) Plan: %s", self.prefix, plan)
+            return PlanningSnapshot(planner=self.planner, domain=planning_domain,
+                                    state_statement=state_pddl.statement, goal_statements=goal_statements)
 
-        return plan
+    def plan_with_additional_goal(self, goal_statement):
+        """
+        Uses the PDDL-planer to make a plan for the last used combination of
+        operational goals and one additional goal statement
+
+        If fetchPDDL never was invoked before, it will be here (side effects on
+        sensor changes etc (see _fetchPDDL()))
+
+        :param goal_statement: a proper PDDL goal statement
+        :type goal_statement: str
+        :return: a PDDL plan for currently pursued goals + goal statement
+        """
+        return self.create_planning_snapshot().plan_with_additional_goal(goal_statement)
 
     def plan_this_single_goal(self, goal_statement):
         """
@@ -1167,28 +1847,7 @@ class Manager(object):
         :type goal_statement: str
         :return: a PDDL plan for the given goal statement
         """
-        with self._step_lock:
-            if not self.__last_domain_PDDL or len(self._goals) == 0:
-                # first get the goals and behaviours we want to use for planning
-                behaviours = [x for x in self._behaviours if x.operational]
-                # take all goals
-                goals = [x for x in self._goals if x.operational]
-                domain_pddl, state_pddl = self._fetchPDDL(behaviours=behaviours, goals=goals, update_computation=True)
-            else:
-                domain_pddl = copy(self.__last_domain_PDDL)
-                state_pddl = self.__previousStatePDDL
-
-            problem_pddl = self._create_problem_pddl_string(goal_conditions_string=goal_statement,
-                                                            state_pddl=state_pddl)
-
-        # if not (plan and "cost" in plan and plan["cost"] != -1.0):
-        #   rhbplog.logerr("%s SINGLE) Domain: %s\n, Problem: %s\n", self.prefix, domain_pddl, problem_pddl)
-
-        plan = self.planner.plan(domain_pddl=domain_pddl, problem_pddl=problem_pddl)
-
-        # rhbplog.logerr("%s Plan: %s", self.prefix, plan)
-
-        return plan
+        return self.create_planning_snapshot().plan_this_single_goal(goal_statement)
 
     def __plan_with_registered_goals_callback(self, req):
         """
@@ -1242,13 +1901,18 @@ class Manager(object):
                 goals = goals if len(goals) > 0 else [x for x in self._goals if x.operational]
                 domain_pddl, state_pddl = self._fetchPDDL(behaviours=behaviours, goals=goals, update_computation=True)
             else:
-                domain_pddl = copy(self.__last_domain_PDDL)
+                domain_pddl = self.__last_domain_PDDL  # the cached domain of the last _fetchPDDL()
                 state_pddl = self.__previousStatePDDL
 
-            problem_pddl = self._create_problem_pddl(goals, state_pddl)
+            goal_condition = create_goal_condition(self.__goalPDDLs[goal][0].statement for goal in goals)
+            try:
+                planning_domain = self._get_planning_domain(domain_pddl)
+            except Exception as e:  # e.g. unsupported PDDL
+                rhbplog.logwarn("Planning with registered goals failed, domain could not be loaded: %s", e)
+                return []
 
         try:
-            plan = self.planner.plan(domain_pddl, problem_pddl)
+            plan = self.planner.plan_problem(planning_domain, state_pddl.statement, goal_condition)
             return plan['actions'].values()
         except:
             return []
@@ -0,0 +1,258 @@
+'''
+Created on 18.10.2026
+
+@author: hrabia
+'''
+from __future__ import division  # force floating point division when using plain /
+
+from .activation_algorithm import ActivationAlgorithmFactory, BaseActivationAlgorithm, UniformActivationAlgorithm
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class _EffectMatrix(object):
+    """
+    Sparse matrix (coordinate format) of the indicators of behaviours or goals per effect, a row can contain several
+    indicators for the same effect
+    """
+
+    def __init__(self, rows, columns, indicators):
+        """
+        :param rows: row (behaviour or goal) of each entry
+        :param columns: column (effect) of each entry
+        :param indicators: indicator of each entry
+        """
+        self.rows = np.asarray(rows, dtype=int)
+        self.columns = np.asarray(columns, dtype=int)
+        self.indicators = np.asarray(indicators, dtype=float)
+
+    @staticmethod
+    def from_effects(owners, get_effects, columns):
+        """
+        :param owners: list of behaviours or goals, the rows of the matrix
+        :param get_effects: function returning the list of correlations or wishes of an owner
+        :param columns: dict {effect name: column}, new effect names are added
+        :return: _EffectMatrix
+        """
+        rows = []
+        effect_columns = []
+        indicators = []
+        for row, owner in enumerate(owners):
+            for effect in get_effects(owner):
+                rows.append(row)
+                effect_columns.append(columns.setdefault(effect.get_pddl_effect_name(), len(columns)))
+                indicators.append(effect.indicator)
+        return _EffectMatrix(rows, effect_columns, indicators)
+
+    def select(self, mask):
+        """
+        :param mask: boolean array of the entries to keep
+        :return: _EffectMatrix
+        """
+        return _EffectMatrix(self.rows[mask], self.columns[mask], self.indicators[mask])
+
+    def join(self, other):
+        """
+        :return: tuple(entry positions in this matrix, entry positions in other) of all entry pairs of the same effect
+        """
+        return np.nonzero(self.columns[:, np.newaxis] == other.columns[np.newaxis, :])
+
+
+def _sum_per_row(rows, values, row_count):
+    """
+    :return: array with the sum of the values of each row
+    """
+    return np.bincount(rows, weights=values, minlength=max(row_count, 1))[:row_count]
+
+
+def _count_sharing_behaviours(queries, entries, conflicting, behaviour_count):
+    """
+    Count the behaviours that share an influence on an effect like BaseActivationAlgorithm._create_sharing_behaviours
+    :param queries: _EffectMatrix with the indicators that are compared
+    :param entries: _EffectMatrix with the correlations or wishes of the operational behaviours
+    :param conflicting: select correlations against the indicator or any correlation if the indicator is 0 instead of
+                        the ones in the direction of the indicator
+    :param behaviour_count: amount of rows of entries
+    :return: array with the amount of behaviours per query entry, at least 1 because it is used as divisor
+    """
+    query_positions, entry_positions = queries.join(entries)
+    x = entries.indicators[entry_positions]
+    product = x * queries.indicators[query_positions]
+    if conflicting:
+        selected = (product < 0.0) | ((product == 0.0) & (x != 0.0))
+    else:
+        selected = product > 0.0
+    # a behaviour with several matching indicators is only counted once
+    behaviour_count = max(behaviour_count, 1)
+    pairs = np.unique(query_positions[selected] * behaviour_count + entries.rows[entry_positions[selected]])
+    counts = np.bincount(pairs // behaviour_count, minlength=max(len(queries.indicators), 1))
+    return np.maximum(counts[:len(queries.indicators)], 1)
+
+
+class NumpyActivationAlgorithm(BaseActivationAlgorithm):
+    """
+    Vectorised implementation of the BaseActivationAlgorithm. The correlations and wishes of all behaviours and the
+    wishes of the goals are represented as sparse behaviour (goal) x effect matrices and the activation spreading of all
+    behaviours is computed with a few array operations in step_preparation().
+    The results are the same as the ones of the BaseActivationAlgorithm apart from floating point rounding because of
+    the different summation order. The components of the activation are only returned as value without the tuples
+    for debugging.
+    """
+
+    # the terms are already computed in step_preparation()
+    cache_spreading_terms = False
+
+    def __init__(self, manager, extensive_logging=False, create_log_files=False):
+        if np is None:
+            raise ImportError("The numpy activation algorithm requires numpy")
+        super(NumpyActivationAlgorithm, self).__init__(manager, extensive_logging=extensive_logging)
+        self._rows = {}  # behaviour -> position in the arrays of the activation components
+        self._activation_from_goals = None
+        self._inhibition_from_goals = None
+        self._activation_from_predecessors = None
+        self._activation_from_successors = None
+        self._inhibition_from_conflictors = None
+
+    def _get_activation_strength(self, indicator, other_indicator):
+        """
+        :return: array with the activation resulting from supporting indicators
+        """
+        return indicator * other_indicator
+
+    def _get_inhibition_strength(self, wish_indicator, correlation_indicator):
+        """
+        :return: array with the (negative) inhibition resulting from a worsened or undone wish
+        """
+        product = wish_indicator * correlation_indicator
+        # a worsened wish results in a stronger inhibition if it is almost fulfilled, see get_inhibition_from_goals
+        worsened = np.where(np.abs(product) == 1, -0.1, -(1 - np.abs(product)))
+        return np.where(product < 0.0, worsened, -np.abs(correlation_indicator))
+
+    def step_preparation(self):
+        # the index is still required for behaviours that are not registered in the manager
+        super(NumpyActivationAlgorithm, self).step_preparation()
+
+        # the operational behaviours come first, the others only receive activation
+        behaviours = list(self._manager.operational_behaviours)
+        operational_count = len(behaviours)
+        behaviours.extend(b for b in self._manager.behaviours if not b.operational)
+        self._rows = {behaviour: row for row, behaviour in enumerate(behaviours)}
+        count = len(behaviours)
+
+        goals = self._manager.operational_goals
+        columns = {}
+        correlations = _EffectMatrix.from_effects(behaviours, lambda b: b.correlations, columns)
+        wishes = _EffectMatrix.from_effects(behaviours, lambda b: b.wishes, columns)
+        goal_wishes = _EffectMatrix.from_effects(goals, lambda g: g.wishes, columns)
+        operational_correlations = correlations.select(correlations.rows < operational_count)
+        operational_wishes = wishes.select(wishes.rows < operational_count)
+
+        operational = behaviours[:operational_count]
+        executable = np.array([b.executable for b in operational], dtype=bool)
+        satisfaction = np.array([b.preconditionSatisfaction for b in operational], dtype=float)
+        activation_share = np.array([b.activation for b in operational], dtype=float) / self._manager.totalActivation
+        if self._apply_goal_priority_weights:
+            goal_weights = np.array([self._goal_priority_weights.get(g, 1.0) for g in goals], dtype=float)
+        else:
+            goal_weights = np.ones(len(goals), dtype=float)
+
+        # goals -> behaviours correlated to the goal wishes
+        goal_positions, positions = goal_wishes.join(correlations)
+        wish = goal_wishes.indicators[goal_positions]
+        correlation = correlations.indicators[positions]
+        rows = correlations.rows[positions]
+        weight = goal_weights[goal_wishes.rows[goal_positions]]
+
+        supporting = _count_sharing_behaviours(goal_wishes, operational_correlations, False, operational_count)
+        selected = correlation * wish > 0.0
+        values = self._get_activation_strength(correlation, wish) * weight * self._goal_bias \
+            / supporting[goal_positions]
+        self._activation_from_goals = _sum_per_row(rows[selected], values[selected], count)
+
+        conflicting = _count_sharing_behaviours(goal_wishes, operational_correlations, True, operational_count)
+        selected = (correlation * wish < 0.0) | ((correlation != 0) & (wish == 0))
+        values = self._get_inhibition_strength(wish, correlation) * weight * self._conflictor_bias \
+            / conflicting[goal_positions]
+        self._inhibition_from_goals = _sum_per_row(rows[selected], values[selected], count)
+
+        # executable predecessors -> behaviours with wishes the predecessors are correlated to
+        wish_positions, positions = wishes.join(operational_correlations)
+        wish = wishes.indicators[wish_positions]
+        correlation = operational_correlations.indicators[positions]
+        rows = wishes.rows[wish_positions]
+        predecessors = operational_correlations.rows[positions]
+
+        sharing = _count_sharing_behaviours(wishes, operational_wishes, False, operational_count)
+        selected = (predecessors != rows) & executable[predecessors] & \
+            (correlation * satisfaction[predecessors] * wish > 0.0)
+        values = self._get_activation_strength(correlation, wish) * activation_share[predecessors] * \
+            self._predecessor_bias / sharing[wish_positions]
+        self._activation_from_predecessors = _sum_per_row(rows[selected], values[selected], count)
+
+        # successors and conflicted behaviours -> behaviours correlated to their wishes
+        positions, wish_positions = correlations.join(operational_wishes)
+        correlation = correlations.indicators[positions]
+        wish = operational_wishes.indicators[wish_positions]
+        rows = correlations.rows[positions]
+        others = operational_wishes.rows[wish_positions]
+
+        supporting = _count_sharing_behaviours(correlations, operational_correlations, False, operational_count)
+        selected = (others != rows) & ~executable[others] & (wish * correlation > 0)
+        values = self._get_activation_strength(wish, correlation) * activation_share[others] * \
+            self._successor_bias / supporting[positions]
+        self._activation_from_successors = _sum_per_row(rows[selected], values[selected], count)
+
+        conflicting = _count_sharing_behaviours(operational_wishes, operational_correlations, True, operational_count)
+        selected = (others != rows) & ((wish * correlation < 0.0) | (wish == 0))
+        values = self._get_inhibition_strength(wish, correlation) * activation_share[others] * \
+            self._conflictor_bias / conflicting[wish_positions]
+        self._inhibition_from_conflictors = _sum_per_row(rows[selected], values[selected], count)
+
+    def _get_component(self, component, ref_behaviour):
+        """
+        :param component: array of an activation component computed in step_preparation()
+        :return: tuple(value,) or None if the behaviour was unknown in step_preparation()
+        """
+        row = self._rows.get(ref_behaviour)
+        return None if row is None else (float(component[row]),)
+
+    def get_activation_from_goals(self, ref_behaviour):
+        return self._get_component(self._activation_from_goals, ref_behaviour) or \
+            super(NumpyActivationAlgorithm, self).get_activation_from_goals(ref_behaviour)
+
+    def get_inhibition_from_goals(self, ref_behaviour):
+        return self._get_component(self._inhibition_from_goals, ref_behaviour) or \
+            super(NumpyActivationAlgorithm, self).get_inhibition_from_goals(ref_behaviour)
+
+    def get_activation_from_predecessors(self, ref_behaviour):
+        return self._get_component(self._activation_from_predecessors, ref_behaviour) or \
+            super(NumpyActivationAlgorithm, self).get_activation_from_predecessors(ref_behaviour)
+
+    def get_activation_from_successors(self, ref_behaviour):
+        return self._get_component(self._activation_from_successors, ref_behaviour) or \
+            super(NumpyActivationAlgorithm, self).get_activation_from_successors(ref_behaviour)
+
+    def get_inhibition_from_conflictors(self, ref_behaviour):
+        return self._get_component(self._inhibition_from_conflictors, ref_behaviour) or \
+            super(NumpyActivationAlgorithm, self).get_inhibition_from_conflictors(ref_behaviour)
+
+
+ActivationAlgorithmFactory.register_algorithm("numpy", NumpyActivationAlgorithm)
+
+
+class NumpyUniformActivationAlgorithm(NumpyActivationAlgorithm, UniformActivationAlgorithm):
+    """
+    Vectorised implementation of the UniformActivationAlgorithm, see NumpyActivationAlgorithm
+    """
+
+    def _get_activation_strength(self, indicator, other_indicator):
+        return np.sqrt(indicator ** 2 + other_indicator ** 2)
+
+    def _get_inhibition_strength(self, wish_indicator, correlation_indicator):
+        return -np.sqrt(wish_indicator ** 2 + correlation_indicator ** 2)
+
+
+ActivationAlgorithmFactory.register_algorithm("numpy_uniform", NumpyUniformActivationAlgorithm)
@@ -6,6 +6,7 @@ Created on 06.10.2015
 from __future__ import division # force floating point division when using plain /
 import re
 import rospy
+from collections import OrderedDict, namedtuple
 from copy import copy
 
 functionRegex = re.compile(r'\s*\(\s*=\s*\(\s*([a-zA-Z0-9_\.-]+)\s*\)\s*([-+]?[0-9]*\.?[0-9]+)\s*\)\s*')
@@ -63,79 +64,253 @@ def get_pddl_effect_name(sensor_name, activator_name):
     return sensor_name
 
 
+class PDDLToken(object):
+    """
+    First level s-expression of a PDDL fragment, e.g. a single fact of a state description. The nested expression and
+    the described fact are only parsed on first access.
+    """
+
+    __slots__ = ('text', '_expression', '_fact')
+
+    def __init__(self, text):
+        """
+        :param text: PDDL statement of the token including the enclosing braces
+        """
+        self.text = text
+        self._expression = None
+        self._fact = None
+
+    @property
+    def expression(self):
+        """
+        :return: nested lists of str atoms, e.g. ['=', ['name'], '1.0'] for '( = (name) 1.0 )'
+        """
+        if self._expression is None:
+            self._expression = _parse_expression(self.text)
+        return self._expression
+
+    @property
+    def fact(self):
+        """
+        :return: tuple(name, value) if the token is a fact of a state description, with a bool value for predicates and
+                 a float value for functions, otherwise (None, None)
+        """
+        if self._fact is None:
+            self._fact = _get_fact(self.expression)
+        return self._fact
+
+    def __repr__(self):
+        return "PDDLToken: " + self.text
+
+
+_bracketRegex = re.compile(r'[()]')
+_atomRegex = re.compile(r'\(|\)|[^\s()]+')
+
+_TOKEN_CACHE_SIZE = 1000  # amount of cached token lists of recently parsed statements
+_token_cache = {}  # statement -> list(PDDLToken)
+
+
+def parsePDDL(pddlString):
+    """
+    Split a PDDL fragment into its first level s-expressions with a single scan over the braces.
+    The results are cached because the same statements (e.g. of unchanged behaviours) are parsed again and again.
+    :param pddlString: PDDL fragment, e.g. a state description
+    :return: list(PDDLToken), the list must not be changed
+    """
+    tokens = _token_cache.get(pddlString)
+    if tokens is not None:
+        return tokens
+
+    tokens = []
+    depth = 0
+    start = 0  # like in former versions, everything between two tokens is added to the next one and stripped
+    for match in _bracketRegex.finditer(pddlString):
+        if match.group() == '(':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                tokens.append(PDDLToken(pddlString[start:match.end()].strip()))
+                start = match.end()
+    if depth != 0:
+        rospy.logwarn("incorrect PDDL (not matching brackets) passed to parsePDDL(): %s", pddlString)
+
+    if len(_token_cache) >= _TOKEN_CACHE_SIZE:
+        _token_cache.clear()
+    _token_cache[pddlString] = tokens
+    return tokens
+
+
+def _parse_expression(text):
+    """
+    Parse a single s-expression
+    :param text: PDDL statement
+    :return: nested lists of str atoms, the content of the first top level expression
+    """
+    stack = [[]]
+    for atom in _atomRegex.findall(text):
+        if atom == '(':
+            stack.append([])
+        elif atom == ')':
+            if len(stack) > 1:
+                expression = stack.pop()
+                stack[-1].append(expression)
+        else:
+            stack[-1].append(atom)
+    while len(stack) > 1:  # incomplete expression
+        expression = stack.pop()
+        stack[-1].append(expression)
+    for expression in stack[0]:
+        if isinstance(expression, list):
+            return expression
+    return stack[0]
+
+
+def _get_fact(expression):
+    """
+    Interpret an expression as fact of a state description: '(name)', '(not (name))' or '( = (name) value )'
+    :param expression: nested lists of str atoms
+    :return: tuple(name, value) or (None, None)
+    """
+    if len(expression) == 1 and not isinstance(expression[0], list):
+        return expression[0], True
+    if len(expression) == 2 and expression[0] == 'not' and isinstance(expression[1], list) and \
+            len(expression[1]) == 1 and not isinstance(expression[1][0], list):
+        return expression[1][0], False
+    if len(expression) == 3 and expression[0] == '=' and isinstance(expression[1], list) and \
+            len(expression[1]) == 1 and not isinstance(expression[2], list):
+        try:
+            return expression[1][0], float(expression[2])
+        except ValueError:
+            pass
+    return None, None
+
+
 def tokenizePDDL(pddlString):
     '''
     This function returns a list of first level tokens.
     Tokens are enclosed in braces.
     '''
-    if not re.search(r'\(', pddlString):
-        return []
-    tokens = []
-    snippet = ""
-    obr = 0
-    for c in pddlString:
-        snippet += c
-        if c == '(':
-            obr += 1
-        elif c == ')':
-            obr -= 1
-            if obr == 0:
-                tokens.append(snippet.strip())
-                snippet = ""
-    if obr != 0:
-        rospy.logwarn("incorrect PDDL (not matching brackets) passed to tokenizePDDL(): %s", pddlString)
-    return tokens
+    return [token.text for token in parsePDDL(pddlString)]
+
+
+class PDDLState(object):
+    """
+    Structured representation of a PDDL state description (the facts of the :init section). The state maps the names
+    of predicates and functions to their current value (bool for predicates, float for functions) and the time stamp of
+    the value. The PDDL statement is only generated once with get_pddl() after all merging is done.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # name -> StateEntry, the order is kept for the generated statement
+
+    @staticmethod
+    def from_pddl(pddl):
+        """
+        Create a state from a state PDDL object
+        :param pddl: state PDDL object
+        :return: PDDLState
+        """
+        state = PDDLState()
+        state.add_pddl(pddl)
+        return state
+
+    def add_pddl(self, pddl):
+        """
+        Merge all facts of a state PDDL object into this state
+        :param pddl: state PDDL object, all facts get the time stamp of the object
+        """
+        for token in parsePDDL(pddl.statement):
+            name, value = token.fact
+            if name is None:
+                rospy.logwarn("inconsistent PDDL data structure: statement %s does not describe a predicate or "
+                              "function", token.text)
+                name = token.text  # unknown statements are kept as they are
+            self.set(name=name, value=value, time_stamp=pddl.time_stamp, token=token.text)
+
+    def set(self, name, value, time_stamp, token=None):
+        """
+        Set the value of a predicate or function, an existing value is only replaced by a more recent one
+        :param name: name of the predicate or function
+        :param value: bool for predicates, float for functions and None for unknown statements
+        :param time_stamp: time stamp of the value
+        :param token: PDDL statement of the value, it is generated if not given
+        """
+        entry = self._entries.get(name)
+        if entry is None or (entry.time_stamp < time_stamp and entry.value != value):
+            self._entries[name] = StateEntry(value=value, time_stamp=time_stamp,
+                                             token=token if token else _create_state_token(name, value))
+
+    def init_missing_functions(self, function_names):
+        """
+        Initialise all given functions that do not have a value yet with 0
+        :param function_names: iterable of function names, e.g. the functions of the domain
+        """
+        for name in function_names:
+            if name not in self._entries:
+                self._entries[name] = StateEntry(value=0.0, time_stamp=rospy.Time(0), token="( = ({0}) 0)".format(name))
+
+    @property
+    def values(self):
+        """
+        :return: dict {sensor name <string> : value} of all predicates and functions
+        """
+        return {name: entry.value for name, entry in self._entries.iteritems() if entry.value is not None}
+
+    def get_pddl(self, include_negative_predicates=True, separator="\n\t\t"):
+        """
+        Generate the state PDDL object
+        :param include_negative_predicates: False for skipping negated predicates, e.g. because FF can't handle them
+        :param separator: separator of the statements
+        :return: state PDDL object
+        """
+        pddl = PDDL()
+        tokens = []
+        for name, entry in self._entries.iteritems():
+            if isinstance(entry.value, bool):
+                if not include_negative_predicates and not entry.value:
+                    continue
+                pddl.predicates.add(name)
+            elif entry.value is not None:
+                pddl.functions.add(name)
+            tokens.append(entry.token)
+        pddl.statement = separator.join(tokens)
+        return pddl
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+StateEntry = namedtuple('StateEntry', ['value', 'time_stamp', 'token'])
+
+
+def _create_state_token(name, value):
+    """
+    Generate the PDDL statement of a fact
+    :param name: name of the predicate or function
+    :param value: bool for predicates, float for functions
+    :return: str
+    """
+    if isinstance(value, bool):
+        return "({0})".format(name) if value else "(not ({0}))".format(name)
+    return "( = ({0}) {1:f} )".format(name, value)
 
 
 def mergeStatePDDL(PDDLone, PDDLtwo):
     '''
     This function merges PDDLone into PDDLtwo (in place)
+    Existing values of PDDLtwo are only replaced if PDDLone is more recent.
+    If you need to merge many PDDL objects, directly use a PDDLState and generate the PDDL once in the end.
     '''
-    #rospy.logwarn("PDDL1: %s, PDDL2: %s",str(PDDLone), str(PDDLtwo))
-    
-    for x in tokenizePDDL(PDDLone.statement):
-        # find out sensorName and type of currently processed token (must be declared in either functions or predicates sets)
-        sensorName = ""
-        statementIsPredicate = False
-        for sn in PDDLone.predicates:
-            if sn in x:
-                sensorName = sn
-                statementIsPredicate = True
-                break
-        if not sensorName:
-            for sn in PDDLone.functions:
-                if sn in x:
-                    sensorName = sn
-                    break
-        if not sensorName: # sanity check
-            rospy.logwarn("inconsistent PDDL data structure: statement %s does not contain any of the declared in predicates (%s) or functions (%s)", x, PDDLone.predicates, PDDLone.functions)
-        if statementIsPredicate:
-            if sensorName in PDDLtwo.predicates:
-                pddl_two_tokens = tokenizePDDL(PDDLtwo.statement)
-                if not x in pddl_two_tokens:
-                    if PDDLtwo.time_stamp < PDDLone.time_stamp:
-                        # rospy.logwarn("predicate '%s' declared differently than before %s vs %s", sensorName, x, PDDLtwo.statement)
-                        for pddl_two_token in pddl_two_tokens:
-                            if sensorName in pddl_two_token:
-                                PDDLtwo.statement = PDDLtwo.statement.replace(pddl_two_token, x)
-                                break
-            else:
-                PDDLtwo.predicates.add(sensorName)
-                PDDLtwo.statement += "\n\t\t{0}".format(x)
-        else: # statement is function
-            if sensorName in PDDLtwo.functions:
-                pddl_two_tokens = tokenizePDDL(PDDLtwo.statement)
-                if not x in pddl_two_tokens:  # test if we already have the same token
-                    # if it is not the same token, check if the one we have was more recently updated
-                    if PDDLtwo.time_stamp < PDDLone.time_stamp:
-                        # rospy.logwarn("function '%s' declared differently than before %s vs %s", sensorName, x, PDDLtwo.statement)
-                        for pddl_two_token in pddl_two_tokens:
-                            if sensorName in pddl_two_token:
-                                PDDLtwo.statement = PDDLtwo.statement.replace(pddl_two_token, x)
-                                break
-            else:
-                PDDLtwo.functions.add(sensorName)
-                PDDLtwo.statement += "\n\t\t{0}".format(x)
+    state = PDDLState.from_pddl(PDDLtwo)
+    state.add_pddl(PDDLone)
+    merged = state.get_pddl()
+    PDDLtwo.statement = merged.statement
+    PDDLtwo.predicates.update(merged.predicates)
+    PDDLtwo.functions.update(merged.functions)
     return PDDLtwo
 
 
@@ -159,21 +334,9 @@ def parseStatePDDL(pddl):
     '''
     This function creates a {sensor name <string> : value} dictionary of a state PDDL object.
     '''
-    state = {}
-    for token in tokenizePDDL(pddl.statement):
-        match = functionRegex.search(token)
-        if match: # it is a function value declaration
-            state[match.group(1)] = float(match.group(2))
-        else: # it must be a predicate
-            match = predicateRegex.search(token)
-            if match: # it actually is a predicate
-                if match.group(2): # it is negated
-                    state[match.group(3)] = False
-                else:
-                    state[match.group(3)] = True
-    return state
-            
-        
+    return PDDLState.from_pddl(pddl).values
+
+
 def getStatePDDLchanges(oldState, newState):
     """
     This function creates a {sensor name <string> : indicator <float [-1 - 1]} dictionary of state changes.
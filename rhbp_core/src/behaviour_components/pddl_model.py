@@ -0,0 +1,308 @@
+'''
+Created on 18.10.2026
+
+@author: hrabia
+'''
+from __future__ import division  # force floating point division when using plain /
+
+import operator
+
+from .pddl import parsePDDL, _parse_expression, _get_fact
+
+COST_FUNCTION = 'costs'
+
+_comparators = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '=': operator.eq,
+    '>=': operator.ge,
+    '>': operator.gt,
+}
+
+_arithmetic_operators = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+_assignment_operators = {
+    'assign': lambda old, value: value,
+    'increase': operator.add,
+    'decrease': operator.sub,
+    'scale-up': operator.mul,
+    'scale-down': operator.truediv,
+}
+
+
+class PDDLModelError(Exception):
+    """
+    Raised for PDDL constructs that are not supported by the model
+    """
+    pass
+
+
+def expression_to_pddl(expression):
+    """
+    Convert a parsed expression back into a PDDL statement
+    :param expression: nested lists of str atoms
+    :return: str
+    """
+    if isinstance(expression, list):
+        return "(" + " ".join(expression_to_pddl(e) for e in expression) + ")"
+    return expression
+
+
+def evaluate_numeric(expression, state):
+    """
+    Evaluate a numeric expression
+    :param expression: nested lists of str atoms, e.g. ['+', ['f'], '1.0']
+    :param state: dict {name: value} with bool values for predicates and float values for functions
+    :return: float or None if a function is undefined
+    """
+    if not isinstance(expression, list):
+        return float(expression)
+    if len(expression) == 1:  # function
+        value = state.get(expression[0])
+        return None if value is None or isinstance(value, bool) else value
+    if expression[0] == '-' and len(expression) == 2:
+        value = evaluate_numeric(expression[1], state)
+        return None if value is None else -value
+    arithmetic_operator = _arithmetic_operators.get(expression[0])
+    if arithmetic_operator is None or len(expression) != 3:
+        raise PDDLModelError("Unsupported numeric expression: " + expression_to_pddl(expression))
+    left = evaluate_numeric(expression[1], state)
+    right = evaluate_numeric(expression[2], state)
+    if left is None or right is None:
+        return None
+    try:
+        return arithmetic_operator(left, right)
+    except ZeroDivisionError:
+        return None
+
+
+def evaluate_condition(expression, state):
+    """
+    Evaluate a condition with closed world semantics, predicates that are not part of the state are false
+    :param expression: nested lists of str atoms or None for an empty condition
+    :param state: dict {name: value} with bool values for predicates and float values for functions
+    :return: bool
+    """
+    if not expression:
+        return True
+    head = expression[0]
+    if head == 'and':
+        return all(evaluate_condition(e, state) for e in expression[1:])
+    if head == 'or':
+        return any(evaluate_condition(e, state) for e in expression[1:])
+    if head == 'not':
+        return not evaluate_condition(expression[1], state)
+    if head == 'imply':
+        return not evaluate_condition(expression[1], state) or evaluate_condition(expression[2], state)
+    comparator = _comparators.get(head)
+    if comparator is not None and len(expression) == 3:
+        left = evaluate_numeric(expression[1], state)
+        right = evaluate_numeric(expression[2], state)
+        return left is not None and right is not None and comparator(left, right)
+    if len(expression) == 1 and not isinstance(head, list):  # predicate
+        return state.get(head) is True
+    raise PDDLModelError("Unsupported condition: " + expression_to_pddl(expression))
+
+
+def _collect_effects(expression, state, changes):
+    """
+    Determine the changes of an effect, all conditions and values refer to the state before the effect
+    """
+    if not expression:
+        return
+    head = expression[0]
+    if head == 'and':
+        for e in expression[1:]:
+            _collect_effects(e, state, changes)
+    elif head == 'when':
+        if evaluate_condition(expression[1], state):
+            _collect_effects(expression[2], state, changes)
+    elif head == 'not':
+        changes.append((expression[1][0], False))
+    elif head in _assignment_operators:
+        name = expression[1][0]
+        old_value = state.get(name)
+        value = evaluate_numeric(expression[2], state)
+        if old_value is None or isinstance(old_value, bool) or value is None:
+            changes.append((name, None))
+        elif head == 'assign':
+            changes.append((name, value))
+        else:
+            try:
+                changes.append((name, _assignment_operators[head](old_value, value)))
+            except ZeroDivisionError:
+                changes.append((name, None))
+    elif len(expression) == 1 and not isinstance(head, list):  # predicate
+        changes.append((head, True))
+    else:
+        raise PDDLModelError("Unsupported effect: " + expression_to_pddl(expression))
+
+
+def apply_effect(expression, state):
+    """
+    Apply an effect
+    :param expression: nested lists of str atoms
+    :param state: dict {name: value} with bool values for predicates and float values for functions
+    :return: new state dict
+    """
+    changes = []
+    _collect_effects(expression, state, changes)
+    new_state = dict(state)
+    # delete effects first, so that add effects win like in the PDDL semantics
+    for name, value in sorted(changes, key=lambda change: change[1] is not False):
+        if value is None:
+            new_state.pop(name, None)
+        else:
+            new_state[name] = value
+    return new_state
+
+
+class PDDLAction(object):
+    """
+    Ground action of a domain description
+    """
+
+    __slots__ = ('name', 'precondition', 'effect')
+
+    def __init__(self, name, precondition=None, effect=None):
+        """
+        :param name: action name
+        :param precondition: parsed precondition expression or None
+        :param effect: parsed effect expression or None
+        """
+        self.name = name
+        self.precondition = precondition
+        self.effect = effect
+
+    def is_applicable(self, state):
+        return evaluate_condition(self.precondition, state)
+
+    def apply(self, state):
+        """
+        :return: new state after the execution of the action, the action has to be applicable
+        """
+        return apply_effect(self.effect, state)
+
+    def __repr__(self):
+        return "PDDLAction: " + self.name
+
+
+class PDDLDomain(object):
+    """
+    Model of the actions of a domain description without parameters like the domains generated by the manager
+    """
+
+    def __init__(self, actions):
+        """
+        :param actions: list of PDDLAction
+        """
+        self.actions = {action.name: action for action in actions}
+
+    @staticmethod
+    def from_pddl(domain_pddl):
+        """
+        :param domain_pddl: domain description string
+        :return: PDDLDomain
+        """
+        actions = []
+        for token in parsePDDL(domain_pddl):
+            if token.expression and token.expression[0] == 'define':
+                for element in token.expression[1:]:
+                    if isinstance(element, list) and element and element[0] == ':action':
+                        actions.append(_parse_action(element))
+        return PDDLDomain(actions)
+
+    def simulate(self, action_names, state):
+        """
+        Execute a sequence of actions
+        :param action_names: list of action names
+        :param state: dict {name: value} with bool values for predicates and float values for functions
+        :return: final state dict or None if an action is unknown or not applicable
+        """
+        for name in action_names:
+            action = self.actions.get(name)
+            if action is None or not action.is_applicable(state):
+                return None
+            state = action.apply(state)
+        return state
+
+
+class PDDLProblem(object):
+    """
+    Model of a problem description
+    """
+
+    def __init__(self, state, goal):
+        """
+        :param state: dict {name: value} of the initial state with bool values for predicates and float values for
+                      functions
+        :param goal: parsed goal expression or None
+        """
+        self.state = state
+        self.goal = goal
+
+    @staticmethod
+    def from_pddl(problem_pddl):
+        """
+        :param problem_pddl: problem description string
+        :return: PDDLProblem
+        """
+        state = {}
+        goal = None
+        for token in parsePDDL(problem_pddl):
+            if token.expression and token.expression[0] == 'define':
+                for element in token.expression[1:]:
+                    if not isinstance(element, list) or not element:
+                        continue
+                    if element[0] == ':init':
+                        state = _parse_facts(element[1:])
+                    elif element[0] == ':goal' and len(element) > 1:
+                        goal = element[1]
+        return PDDLProblem(state, goal)
+
+
+def _parse_action(expression):
+    """
+    :param expression: parsed ':action' expression
+    :return: PDDLAction
+    """
+    name = expression[1]
+    fields = dict(zip(expression[2::2], expression[3::2]))
+    if fields.get(':parameters'):
+        raise PDDLModelError("Actions with parameters are not supported: " + name)
+    return PDDLAction(name=name, precondition=fields.get(':precondition'), effect=fields.get(':effect'))
+
+
+def _parse_facts(expressions):
+    """
+    :param expressions: parsed facts
+    :return: dict {name: value}
+    """
+    state = {}
+    for fact in expressions:
+        name, value = _get_fact(fact)
+        if name is None:
+            raise PDDLModelError("Unsupported initial fact: " + expression_to_pddl(fact))
+        state[name] = value
+    return state
+
+
+def parse_state(statement):
+    """
+    :param statement: PDDL statement of a state, e.g. the initial state of a problem
+    :return: dict {name: value} with bool values for predicates and float values for functions
+    """
+    return _parse_facts(token.expression for token in parsePDDL(statement))
+
+
+def parse_condition(statement):
+    """
+    :param statement: PDDL condition statement, e.g. a goal
+    :return: parsed expression
+    """
+    return _parse_expression(statement)
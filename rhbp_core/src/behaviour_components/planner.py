@@ -4,10 +4,357 @@ Created on 14.02.2017
 @author: hrabia
 '''
 
+import bisect
+import copy
+import hashlib
+import re
+import threading
+import time
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict, deque
+from Queue import Queue, Empty
 
 import ffp
 
+from .planner_workers import PlannerWorkerPool, PlannerWorkerStartError
+from .pddl_model import PDDLDomain, PDDLModelError, COST_FUNCTION, evaluate_condition, parse_condition, parse_state
+
+import utils.rhbp_logging
+rhbplog = utils.rhbp_logging.LogManager(logger_name=utils.rhbp_logging.LOGGER_DEFAULT_NAME + '.planning')
+
+
+class PlanningCancelledError(Exception):
+    """
+    Raised by PlanningJob.result() if the job has been cancelled
+    """
+    pass
+
+
+class PlanningJob(object):
+    """
+    Handle of an asynchronously solved planning problem, see Planner.submit()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done_event = threading.Event()
+        self._plan = None
+        self._exception = None
+        self._cancelled = False
+        self._cancel_handler = None
+        self._done_callbacks = []
+
+    def set_result(self, plan):
+        self._finish(plan=plan)
+
+    def set_exception(self, exception):
+        self._finish(exception=exception)
+
+    def _finish(self, plan=None, exception=None):
+        with self._lock:
+            if self._done_event.is_set():  # e.g. result of a cancelled job
+                return
+            self._plan = plan
+            self._exception = exception
+            self._done_event.set()
+            callbacks = self._done_callbacks
+            self._done_callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+    def set_cancel_handler(self, handler):
+        """
+        Set the function that stops the running planner if the job is cancelled
+        :param handler: function without arguments
+        :return: False if the job has already been cancelled
+        """
+        with self._lock:
+            if self._cancelled:
+                return False
+            self._cancel_handler = handler
+            return True
+
+    def cancel(self):
+        """
+        Cancel the job, it is done immediately
+        :return: False if the job was already done
+        """
+        with self._lock:
+            if self._done_event.is_set():
+                return False
+            self._cancelled = True
+            handler = self._cancel_handler
+        if handler:
+            handler()
+        self._finish(exception=PlanningCancelledError("Planning job has been cancelled"))
+        return True
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        return self._done_event.is_set()
+
+    def add_done_callback(self, callback):
+        """
+        :param callback: function that is called with the job as argument after the job is done
+        """
+        with self._lock:
+            if not self._done_event.is_set():
+                self._done_callbacks.append(callback)
+                return
+        callback(self)
+
+    def exception(self):
+        """
+        :return: the exception of a finished job or None
+        """
+        return self._exception
+
+    def wait(self, timeout=None):
+        """
+        Wait until the job is done without raising the exception of the planner
+        :param timeout: timeout in seconds, None for waiting forever
+        :return: True if the job is done
+        """
+        return self._done_event.wait(timeout)
+
+    def result(self, timeout=None):
+        """
+        Wait for the plan
+        :param timeout: timeout in seconds, None for waiting forever
+        :return: plan dictionary like returned by Planner.plan() or None if the timeout has been reached
+        :raises: the exception of the planner or PlanningCancelledError
+        """
+        self._done_event.wait(timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._plan
+
+
+def _start_job(job, function, *args, **kwargs):
+    """
+    Call the function in a separate thread and pass its result to the job
+    """
+    def run():
+        try:
+            job.set_result(function(*args, **kwargs))
+        except Exception as e:
+            job.set_exception(e)
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+
+
+def submit_planning_function(function, *args, **kwargs):
+    """
+    Run a function that is planning in some way asynchronously
+    :param function: the function, it is called with the given arguments
+    :return: PlanningJob providing the return value of the function
+    """
+    job = PlanningJob()
+    _start_job(job, function, *args, **kwargs)
+    return job
+
+
+class PlannerThread(object):
+    """
+    Thread that processes planning functions one after another. Only the most recently submitted request is relevant,
+    hence requests that are superseded by newer ones before they are started are cancelled.
+    """
+
+    def __init__(self, name="PlannerThread"):
+        self._requests = Queue()
+        self._busy = False
+        self.latency = 0.0  # seconds between submission and completion of the last finished request
+        self._thread = threading.Thread(target=self._run, name=name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Enqueue a planning function
+        :param function: the function, it is called with the given arguments in the planner thread
+        :return: PlanningJob providing the return value of the function
+        """
+        job = PlanningJob()
+        self._requests.put((job, time.time(), function, args, kwargs))
+        return job
+
+    @property
+    def queue_depth(self):
+        """
+        :return: amount of waiting and running requests
+        """
+        return self._requests.qsize() + (1 if self._busy else 0)
+
+    def shutdown(self):
+        self._requests.put(None)
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            while request is not None:  # skip superseded requests
+                try:
+                    newer_request = self._requests.get_nowait()
+                except Empty:
+                    break
+                request[0].cancel()
+                request = newer_request
+            if request is None:
+                break
+            job, submission_time, function, args, kwargs = request
+            if job.cancelled:
+                continue
+            self._busy = True
+            try:
+                job.set_result(function(*args, **kwargs))
+            except Exception as e:
+                job.set_exception(e)
+            finally:
+                self._busy = False
+            self.latency = time.time() - submission_time
+
+
+_domain_name_pattern = re.compile(r'\(\s*domain\s+([^\s()]+)', re.IGNORECASE)
+
+
+def _get_pddl_digest(pddl):
+    """
+    :return: hash of the whitespace normalised PDDL string
+    """
+    return hashlib.sha1(" ".join(pddl.split())).digest()
+
+
+class PlanningDomain(object):
+    """
+    Handle of a domain that has been loaded with Planner.load_domain(). Problems for this domain are only described by
+    their initial state and goal, hence a planner can reuse everything it has derived from the domain.
+    """
+
+    def __init__(self, domain_pddl, model=None):
+        """
+        :param domain_pddl: the PDDL domain string
+        :param model: planner specific preprocessed representation of the domain
+        """
+        self.domain_pddl = domain_pddl
+        self.model = model
+        match = _domain_name_pattern.search(domain_pddl)
+        self.name = match.group(1) if match else "UNNAMED"
+        self._digest = None
+        self._pddl_domain = None  # PDDLDomain for validating plans, created on demand
+
+    @property
+    def digest(self):
+        """
+        :return: hash of the whitespace normalised domain
+        """
+        if self._digest is None:
+            self._digest = _get_pddl_digest(self.domain_pddl)
+        return self._digest
+
+    def create_problem_pddl(self, state_statement, goal_statement):
+        """
+        :param state_statement: PDDL statement of the initial state
+        :param goal_statement: PDDL goal condition
+        :return: the PDDL problem string
+        """
+        return "(define (problem problem-{0})\n\t(:domain {0})\n\t(:init \n\t\t{1}\n\t)\n" \
+               "\t(:goal {2})\n\t(:metric minimize (costs))\n)\n".format(self.name, state_statement, goal_statement)
+
+    def validate_plan(self, action_names, state_statement, goal_statement):
+        """
+        Find the shortest suffix of a plan, e.g. of the previous plan, that is still applicable and reaches the goal
+        :param action_names: list of action names
+        :param state_statement: PDDL statement of the initial state
+        :param goal_statement: PDDL goal condition
+        :return: plan dictionary of the suffix or None if no suffix is valid
+        """
+        try:
+            if self._pddl_domain is None:
+                self._pddl_domain = PDDLDomain.from_pddl(self.domain_pddl)
+            state = parse_state(state_statement)
+            goal = parse_condition(goal_statement)
+            for start in xrange(len(action_names), -1, -1):
+                final_state = self._pddl_domain.simulate(action_names[start:], state)
+                if final_state is not None and evaluate_condition(goal, final_state):
+                    cost = (final_state.get(COST_FUNCTION) or 0.0) - (state.get(COST_FUNCTION) or 0.0)
+                    return {'cost': cost, 'actions': dict(enumerate(action_names[start:]))}
+        except PDDLModelError as e:
+            rhbplog.logdebug("Plan cannot be validated: %s", e)
+        return None
+
+
+def create_goal_condition(goal_statements):
+    """
+    :param goal_statements: iterable of goal PDDL statements
+    :return: PDDL goal condition that requires all statements
+    """
+    return "(and {0})".format(" ".join(goal_statements))
+
+
+class PlanningSnapshot(object):
+    """
+    Domain, state and goal conditions of a manager captured at one point in time. Several planning queries, e.g. for
+    the cost evaluation of a delegated goal, are answered for the snapshot without assembling domain and state again.
+    The snapshot is not modified by the queries, hence they can also run concurrently with the submit methods.
+    """
+
+    def __init__(self, planner, domain, state_statement, goal_statements):
+        """
+        :param planner: Planner that has loaded the domain
+        :param domain: PlanningDomain or None if the planner was not able to load the domain, then all queries result
+                       in impossible plans
+        :param state_statement: PDDL statement of the captured state
+        :param goal_statements: list of PDDL statements of the currently pursued goals
+        """
+        self.planner = planner
+        self.domain = domain
+        self.state_statement = state_statement
+        self.goal_statements = goal_statements
+
+    def plan(self, goal_statements):
+        """
+        :param goal_statements: list of PDDL goal statements that have to be reached all
+        :return: plan dictionary, see Planner.plan()
+        """
+        if self.domain is None:
+            return {'cost': -1.0, 'actions': {}}  # this is the indicator that the planning problem is impossible
+        return self.planner.plan_problem(self.domain, self.state_statement, create_goal_condition(goal_statements))
+
+    def submit(self, goal_statements):
+        """
+        Run plan() asynchronously
+        :return: PlanningJob
+        """
+        if self.domain is None:
+            job = PlanningJob()
+            job.set_result(self.plan(goal_statements))
+            return job
+        return self.planner.submit_problem(self.domain, self.state_statement, create_goal_condition(goal_statements))
+
+    def plan_with_additional_goal(self, goal_statement):
+        """
+        :param goal_statement: PDDL goal statement that is pursued in addition to the captured goals
+        :return: plan dictionary
+        """
+        return self.plan(self.goal_statements + [goal_statement])
+
+    def submit_with_additional_goal(self, goal_statement):
+        return self.submit(self.goal_statements + [goal_statement])
+
+    def plan_this_single_goal(self, goal_statement):
+        """
+        :param goal_statement: PDDL goal statement that is pursued instead of the captured goals
+        :return: plan dictionary
+        """
+        return self.plan([goal_statement])
+
+    def submit_single_goal(self, goal_statement):
+        return self.submit([goal_statement])
+
 
 class Planner:
     """
@@ -26,6 +373,81 @@ class Planner:
         """
         pass
 
+    def submit(self, domain_pddl, problem_pddl):
+        """
+        Run the planner asynchronously, by default plan() is called in a separate thread
+        :param domain_pddl: the PDDL domain string
+        :param problem_pddl: the PDDL problem string
+        :return: PlanningJob
+        """
+        return submit_planning_function(self.plan, domain_pddl, problem_pddl)
+
+    def load_domain(self, domain_pddl):
+        """
+        Load a domain once for planning several problems with plan_problem() and submit_problem()
+        :param domain_pddl: the PDDL domain string
+        :return: PlanningDomain
+        """
+        return PlanningDomain(domain_pddl)
+
+    def plan_problem(self, domain, state_statement, goal_statement, hint=None):
+        """
+        Run the planner for a loaded domain
+        :param domain: PlanningDomain returned by load_domain()
+        :param state_statement: PDDL statement of the initial state
+        :param goal_statement: PDDL goal condition
+        :param hint: optional list of action names, e.g. the previous plan. If a suffix of it still reaches the goal,
+                     it is returned unless the planner finds a cheaper plan. Its costs bound the search of planners
+                     that support a pure cost bound.
+        :return: plan dictionary, see plan()
+        """
+        return self._plan_with_hint(domain, state_statement, goal_statement, hint, self._plan_problem)
+
+    def submit_problem(self, domain, state_statement, goal_statement, hint=None):
+        """
+        Run plan_problem() asynchronously, by default in a separate thread
+        :return: PlanningJob
+        """
+        return submit_planning_function(self.plan_problem, domain, state_statement, goal_statement, hint)
+
+    @staticmethod
+    def _plan_with_hint(domain, state_statement, goal_statement, hint, plan_function):
+        """
+        :param plan_function: function(domain, state_statement, goal_statement, cost_bound) that runs the planner
+        :return: plan dictionary, see plan_problem()
+        """
+        hint_plan = domain.validate_plan(hint, state_statement, goal_statement) if hint else None
+        if hint_plan is None:
+            return plan_function(domain, state_statement, goal_statement, None)
+        if not hint_plan['actions'] or hint_plan['cost'] <= 0:  # there is no cheaper plan
+            return hint_plan
+
+        plan = plan_function(domain, state_statement, goal_statement, hint_plan['cost'])
+        if plan and plan.get('cost', -1.0) != -1.0 and plan['cost'] < hint_plan['cost']:
+            return plan
+        rhbplog.logdebug("Using the hint plan with costs %f", hint_plan['cost'])
+        return hint_plan
+
+    def _plan_problem(self, domain, state_statement, goal_statement, cost_bound):
+        """
+        Run the planner for a loaded domain, by default the problem is assembled and passed to plan()
+        :param cost_bound: costs of a known plan, hence more expensive plans are not needed, None if there is no bound
+        :return: plan dictionary, see plan()
+        """
+        return self.plan(domain.domain_pddl, domain.create_problem_pddl(state_statement, goal_statement))
+
+    def configuration_key(self):
+        """
+        :return: hashable representation of all settings that influence the resulting plans
+        """
+        return None
+
+    def close(self):
+        """
+        Release all resources of the planner
+        """
+        pass
+
 
 class MetricFFSearchMode(object):
     """
@@ -41,14 +463,339 @@ class MetricFFSearchMode(object):
 
 class MetricFF(Planner):
 
-    def __init__(self, search_mode=MetricFFSearchMode.EHC_H_A_STAR_EPSILON, upper_bound=1000):
+    def __init__(self, search_mode=MetricFFSearchMode.EHC_H_A_STAR_EPSILON, upper_bound=1000, worker_pool_size=0,
+                 timeout=None):
+        """
+        :param search_mode: see MetricFFSearchMode
+        :param upper_bound: upper cost bound of the plans
+        :param worker_pool_size: amount of persistent planner processes, 0 for forking a new process per plan (ffp)
+        :param timeout: timeout in seconds for a single plan in a worker process, None for no timeout
+        """
         self.search_mode = search_mode
         self.upper_bound = upper_bound
         self.cost_minimization = True
         self.weight = 5
         self.debug = 0
+        self._worker_pool = PlannerWorkerPool(size=worker_pool_size, timeout=timeout) if worker_pool_size > 0 else None
+
+    def _get_plan_arguments(self, domain_pddl, problem_pddl):
+        return dict(domainPDDL=domain_pddl, problemPDDL=problem_pddl, searchMode=self.search_mode,
+                    upperCostBound=self.upper_bound, weight=self.weight, costMinimization=self.cost_minimization,
+                    debug=self.debug)
+
+    def plan(self, domain_pddl, problem_pddl):
+        return self._plan(domain_pddl, problem_pddl)
+
+    def _plan_problem(self, domain, state_statement, goal_statement, cost_bound):
+        # the cost bound of a hint is not passed as upperCostBound, because Metric-FF also uses it as search depth
+        # limit of the EHC, which would prevent cheaper plans with more actions. The hint is still returned unless
+        # the found plan is cheaper.
+        return self._plan(domain.domain_pddl, domain.create_problem_pddl(state_statement, goal_statement))
+
+    def _plan(self, domain_pddl, problem_pddl):
+        kwargs = self._get_plan_arguments(domain_pddl, problem_pddl)
+        if self._worker_pool and self._worker_pool.available:
+            try:
+                return self._worker_pool.plan(**kwargs)
+            except PlannerWorkerStartError as e:
+                rhbplog.logwarn("Planner worker processes not available, falling back to ffp: %s", e)
+        return ffp.plan(**kwargs)
+
+    def submit(self, domain_pddl, problem_pddl):
+        """
+        Planning jobs are processed in parallel by the worker pool and cancelling a job stops its worker
+        """
+        if not self._worker_pool or not self._worker_pool.available:
+            return super(MetricFF, self).submit(domain_pddl, problem_pddl)
+        job = PlanningJob()
+        _start_job(job, self._plan_in_worker_pool, job, domain_pddl, problem_pddl)
+        return job
+
+    def submit_problem(self, domain, state_statement, goal_statement, hint=None):
+        """
+        Planning jobs are processed in parallel by the worker pool and cancelling a job stops its worker
+        """
+        if not self._worker_pool or not self._worker_pool.available:
+            return super(MetricFF, self).submit_problem(domain, state_statement, goal_statement, hint)
+        job = PlanningJob()
+
+        def plan_in_worker_pool(planning_domain, state, goal, cost_bound):  # see _plan_problem() for the cost bound
+            return self._plan_in_worker_pool(job, planning_domain.domain_pddl,
+                                             planning_domain.create_problem_pddl(state, goal))
+
+        _start_job(job, self._plan_with_hint, domain, state_statement, goal_statement, hint, plan_in_worker_pool)
+        return job
+
+    def _plan_in_worker_pool(self, job, domain_pddl, problem_pddl):
+        try:
+            return self._worker_pool.plan(job=job, **self._get_plan_arguments(domain_pddl, problem_pddl))
+        except PlannerWorkerStartError as e:
+            rhbplog.logwarn("Planner worker processes not available, falling back to ffp: %s", e)
+            return self._plan(domain_pddl, problem_pddl)
+
+    def configuration_key(self):
+        return self.search_mode, self.upper_bound, self.cost_minimization, self.weight
+
+    def close(self):
+        if self._worker_pool:
+            self._worker_pool.close()
+
+
+class CachingPlanner(Planner):
+    """
+    Planner wrapper that caches the results of another planner in a bounded LRU cache. The cache is keyed by a hash of
+    the whitespace normalised domain and problem, hence repeated planning requests for the same situation, e.g. caused
+    by oscillating states or repeated auctions, are answered without planning. Impossible problems are cached as well.
+    """
+
+    _MISSING = object()  # marker for plans that are not cached, None is a valid plan
+
+    def __init__(self, planner, size=100, ttl=None):
+        """
+        :param planner: the actually used planner
+        :param size: maximum amount of cached plans
+        :param ttl: time in seconds after which a cached plan expires, None for no expiry
+        """
+        self.planner = planner
+        self._size = size
+        self._ttl = ttl
+        self._cache = OrderedDict()  # key -> (time of insertion, plan), ordered from least to most recently used
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
     def plan(self, domain_pddl, problem_pddl):
-        return ffp.plan(domainPDDL=domain_pddl, problemPDDL=problem_pddl, searchMode=self.search_mode,
-                        upperCostBound=self.upper_bound, weight=self.weight, costMinimization=self.cost_minimization,
-                        debug=self.debug)
+        return self._plan_cached(self._create_key(_get_pddl_digest(domain_pddl), problem_pddl),
+                                 self.planner.plan, domain_pddl, problem_pddl)
+
+    def submit(self, domain_pddl, problem_pddl):
+        return self._submit_cached(self._create_key(_get_pddl_digest(domain_pddl), problem_pddl),
+                                   self.planner.submit, domain_pddl, problem_pddl)
+
+    def load_domain(self, domain_pddl):
+        return self.planner.load_domain(domain_pddl)
+
+    def plan_problem(self, domain, state_statement, goal_statement, hint=None):
+        key = self._create_key(domain.digest, domain.create_problem_pddl(state_statement, goal_statement), hint)
+        return self._plan_cached(key, self.planner.plan_problem, domain, state_statement, goal_statement, hint)
+
+    def submit_problem(self, domain, state_statement, goal_statement, hint=None):
+        key = self._create_key(domain.digest, domain.create_problem_pddl(state_statement, goal_statement), hint)
+        return self._submit_cached(key, self.planner.submit_problem, domain, state_statement, goal_statement, hint)
+
+    def _plan_cached(self, key, plan_function, *args):
+        now = time.time()
+        plan = self._lookup(key, now)
+        if plan is not self._MISSING:
+            return plan
+
+        plan = plan_function(*args)  # exceptions are not cached
+        self._store(key, now, plan)
+        return plan
+
+    def _submit_cached(self, key, submit_function, *args):
+        now = time.time()
+        plan = self._lookup(key, now)
+        if plan is not self._MISSING:
+            job = PlanningJob()
+            job.set_result(plan)
+            return job
+
+        def store(finished_job):
+            if finished_job.exception() is None:  # also excludes cancelled jobs
+                self._store(key, now, finished_job.result())
+
+        job = submit_function(*args)
+        job.add_done_callback(store)
+        return job
+
+    def _lookup(self, key, now):
+        """
+        :return: copy of the cached plan or _MISSING
+        """
+        with self._lock:
+            entry = self._cache.pop(key, None)
+            if entry is not None and (self._ttl is None or now - entry[0] < self._ttl):
+                self._cache[key] = entry  # move to the end
+                self.hits += 1
+                rhbplog.logdebug("Plan cache hit (hits:%d, misses:%d)", self.hits, self.misses)
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+            return self._MISSING
+
+    def _store(self, key, now, plan):
+        with self._lock:
+            self._cache[key] = (now, copy.deepcopy(plan))
+            while len(self._cache) > self._size:
+                self._cache.popitem(last=False)
+
+    def _create_key(self, domain_digest, problem_pddl, hint=None):
+        """
+        :param domain_digest: see PlanningDomain.digest
+        :param problem_pddl: the PDDL problem string
+        :param hint: hint of the planning request, the result of a hinted request can be the remainder of the hint
+        :return: cache key
+        """
+        return domain_digest, _get_pddl_digest(problem_pddl), tuple(hint) if hint else None, \
+            self.planner.configuration_key()
+
+    def clear(self):
+        """
+        Remove all cached plans
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def get_statistics(self):
+        """
+        :return: dict with the amount of cache hits, misses and cached plans
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache)}
+
+    def configuration_key(self):
+        return self.planner.configuration_key()
+
+    def close(self):
+        self.clear()
+        self.planner.close()
+
+
+class RollingHistogram(object):
+    """
+    Histogram of the most recent values of a measure
+    """
+
+    def __init__(self, bounds, window=100):
+        """
+        :param bounds: ascending upper bounds of the buckets, larger values are counted in an additional last bucket
+        :param window: amount of most recent values that are considered
+        """
+        self.bounds = list(bounds)
+        self._values = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, value):
+        with self._lock:
+            self._values.append(value)
+
+    def get_counts(self):
+        """
+        :return: list with the amount of values per bucket
+        """
+        with self._lock:
+            values = list(self._values)
+        counts = [0] * (len(self.bounds) + 1)
+        for value in values:
+            counts[bisect.bisect_left(self.bounds, value)] += 1
+        return counts
+
+    def get_summary(self):
+        """
+        :return: dict with the amount, mean and maximum of the values as well as the bucket bounds and counts
+        """
+        with self._lock:
+            values = list(self._values)
+        return {'count': len(values),
+                'mean': sum(values) / float(len(values)) if values else 0.0,
+                'max': max(values) if values else 0.0,
+                'bounds': self.bounds,
+                'counts': self.get_counts()}
+
+
+class InstrumentedPlanner(Planner):
+    """
+    Planner wrapper that measures the calls of another planner: wall time, evaluated states if the planner reports
+    them in the field 'evaluated_states' of the plan, and the size of the planning problems
+    """
+
+    DURATION_BOUNDS = (0.001, 0.01, 0.1, 1.0, 10.0)  # seconds
+    EVALUATED_STATES_BOUNDS = (10, 100, 1000, 10000, 100000)
+    PROBLEM_SIZE_BOUNDS = (1000, 10000, 100000, 1000000)  # characters of domain and problem
+
+    def __init__(self, planner, window=100):
+        """
+        :param planner: the actually used planner
+        :param window: amount of most recent calls that are considered in the histograms
+        """
+        self.planner = planner
+        self.duration = RollingHistogram(self.DURATION_BOUNDS, window)
+        self.evaluated_states = RollingHistogram(self.EVALUATED_STATES_BOUNDS, window)
+        self.problem_size = RollingHistogram(self.PROBLEM_SIZE_BOUNDS, window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.last_call = None  # dict with the measures of the last finished call
+
+    def plan(self, domain_pddl, problem_pddl):
+        return self._measure(len(domain_pddl) + len(problem_pddl), self.planner.plan, domain_pddl, problem_pddl)
+
+    def submit(self, domain_pddl, problem_pddl):
+        return self._measure_job(len(domain_pddl) + len(problem_pddl), self.planner.submit, domain_pddl, problem_pddl)
+
+    def load_domain(self, domain_pddl):
+        return self.planner.load_domain(domain_pddl)
+
+    def plan_problem(self, domain, state_statement, goal_statement, hint=None):
+        size = len(domain.domain_pddl) + len(state_statement) + len(goal_statement)
+        return self._measure(size, self.planner.plan_problem, domain, state_statement, goal_statement, hint)
+
+    def submit_problem(self, domain, state_statement, goal_statement, hint=None):
+        size = len(domain.domain_pddl) + len(state_statement) + len(goal_statement)
+        return self._measure_job(size, self.planner.submit_problem, domain, state_statement, goal_statement, hint)
+
+    def _measure(self, problem_size, plan_function, *args):
+        start = time.time()
+        try:
+            plan = plan_function(*args)
+        except Exception:
+            self._record(start, problem_size, None, failed=True)
+            raise
+        self._record(start, problem_size, plan)
+        return plan
+
+    def _measure_job(self, problem_size, submit_function, *args):
+        start = time.time()
+
+        def record(job):
+            if not job.cancelled:
+                exception = job.exception()
+                self._record(start, problem_size, job.result() if exception is None else None,
+                             failed=exception is not None)
+
+        job = submit_function(*args)
+        job.add_done_callback(record)
+        return job
+
+    def _record(self, start, problem_size, plan, failed=False):
+        duration = time.time() - start
+        evaluated_states = plan.get('evaluated_states') if plan else None
+        self.duration.add(duration)
+        self.problem_size.add(problem_size)
+        if evaluated_states is not None:
+            self.evaluated_states.add(evaluated_states)
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.failures += 1
+            self.last_call = {'duration': duration, 'evaluated_states': evaluated_states, 'problem_size': problem_size,
+                              'feasible': bool(plan) and plan.get('cost', -1.0) != -1.0}
+
+    def get_statistics(self):
+        """
+        :return: dict with the amount of calls and failures, the planner configuration, the measures of the last call
+                 and histograms of the recent calls
+        """
+        with self._lock:
+            statistics = {'calls': self.calls, 'failures': self.failures, 'last_call': self.last_call}
+        statistics['configuration'] = self.planner.configuration_key()
+        statistics['duration'] = self.duration.get_summary()
+        statistics['evaluated_states'] = self.evaluated_states.get_summary()
+        statistics['problem_size'] = self.problem_size.get_summary()
+        return statistics
+
+    def configuration_key(self):
+        return self.planner.configuration_key()
+
+    def close(self):
+        self.planner.close()
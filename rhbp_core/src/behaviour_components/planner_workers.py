@@ -0,0 +1,346 @@
+'''
+Created on 18.10.2026
+
+@author: hrabia
+'''
+
+import marshal
+import os
+import select
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import utils.rhbp_logging
+rhbplog = utils.rhbp_logging.LogManager(logger_name=utils.rhbp_logging.LOGGER_DEFAULT_NAME + '.planning')
+
+# exit codes used by Metric-FF for results that are not returned regularly
+FF_EXIT_GOALS_SATISFIED = 0x42
+FF_EXIT_UNSOLVABLE = 0xFF
+
+_HEADER = struct.Struct('!I')  # length of the following marshalled message
+
+
+class PlannerWorkerError(Exception):
+    """
+    Raised if planning in a worker process failed
+    """
+    pass
+
+
+class PlannerWorkerStartError(PlannerWorkerError):
+    """
+    Raised if a worker process is not able to load the planner
+    """
+    pass
+
+
+class PlannerWorker(object):
+    """
+    Long-lived process that loads the Metric-FF python module once and answers planning requests received over a pipe.
+    Metric-FF resets its global state at the beginning of every planning call. However, it terminates the process for
+    some results (all goals satisfied, unsolvable problems) and of course in case of crashes. Such results are
+    interpreted from the exit code like in ffp and the worker has to be replaced afterwards.
+    """
+
+    WORKER_COMMAND = 'from behaviour_components.planner_workers import run_worker; run_worker()'
+
+    def __init__(self):
+        self._process = subprocess.Popen([sys.executable, '-c', self.WORKER_COMMAND], stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, close_fds=True)
+        self._request_fd = self._process.stdin.fileno()
+        self._response_fd = self._process.stdout.fileno()
+        self._ready = False
+        self._cancelled = False
+        self.served_requests = 0
+
+    def plan(self, request, timeout=None):
+        """
+        Run the planner in the worker process
+        :param request: dict with the keyword arguments of ff.plan()
+        :param timeout: timeout in seconds, None for waiting forever
+        :return: plan dictionary or None
+        :raises PlannerWorkerError: if the planner failed, the worker timed out or could not be started
+        """
+        deadline = time.time() + timeout if timeout else None
+
+        if not self._ready:
+            message = self._receive(deadline)
+            if not message or message[0] != 'ready':
+                self.kill()
+                if self._cancelled:
+                    raise PlannerWorkerError("Planning request has been cancelled")
+                raise PlannerWorkerStartError("Planner worker could not be started: {0}".format(
+                    message[1] if message else "no response"))
+            self._ready = True
+
+        try:
+            _write_message(self._request_fd, request)
+        except OSError:  # the worker is not running any longer
+            return self._get_exit_result()
+
+        message = self._receive(deadline)
+        if message is None:
+            return self._get_exit_result()
+
+        self.served_requests += 1
+        status, result = message
+        if status == 'error':
+            raise PlannerWorkerError(result)
+        return result
+
+    def _receive(self, deadline):
+        try:
+            return _read_message(self._response_fd, deadline)
+        except _TimeoutError:
+            self.kill()
+            raise PlannerWorkerError("Planner worker timed out")
+
+    def _get_exit_result(self):
+        """
+        Interpret the exit code of a terminated worker like ffp does
+        :return: plan dictionary or None
+        """
+        returncode = self._process.wait()
+        if returncode == FF_EXIT_GOALS_SATISFIED:
+            return {'cost': 0.0, 'actions': {}}
+        elif returncode == FF_EXIT_UNSOLVABLE:
+            return {'cost': -1.0, 'actions': {}}  # this is the indicator that the planning problem is impossible
+        elif returncode == os.EX_OK:  # this might occur with an empty plan which was simplified to false
+            return None
+        elif returncode == 1:
+            raise PlannerWorkerError("Planner exited with failure.")
+        elif returncode < 0:
+            raise PlannerWorkerError("Planner exited abnormally. Signal: {0}".format(-returncode))
+        else:
+            raise PlannerWorkerError("Unexpected exit status: {0:x}".format(returncode))
+
+    @property
+    def alive(self):
+        return self._process.poll() is None
+
+    def close(self):
+        """
+        Terminate an idle worker, it stops after reading the end of its input
+        """
+        for stream in (self._process.stdin, self._process.stdout):
+            try:
+                stream.close()
+            except (IOError, OSError):  # broken pipe of a terminated worker
+                pass
+        self._process.wait()
+
+    def cancel(self):
+        """
+        Stop the currently processed request by killing the worker, the requesting thread receives an error
+        """
+        self._cancelled = True
+        try:
+            self._process.kill()
+        except OSError:  # terminated in the meantime
+            pass
+
+    def kill(self):
+        """
+        Terminate the worker immediately
+        """
+        if self.alive:
+            try:
+                self._process.kill()
+            except OSError:  # terminated in the meantime
+                pass
+        self.close()
+
+
+class PlannerWorkerPool(object):
+    """
+    Pool of planner worker processes, which are spawned in advance. A worker is replaced in the background after it has
+    terminated, timed out or served max_requests requests. Hence, the expensive process creation and the loading of the
+    planner usually do not delay a planning request.
+    """
+
+    def __init__(self, size=1, timeout=None, max_requests=100):
+        """
+        :param size: amount of worker processes
+        :param timeout: timeout in seconds for a single planning request, None for no timeout
+        :param max_requests: amount of requests after which a worker is replaced to limit the impact of memory leaks
+        """
+        self._size = size
+        self._timeout = timeout
+        self._max_requests = max_requests
+        self._idle_workers = []
+        self._worker_count = 0  # idle, busy and starting workers
+        self._spawners = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self.available = True  # False if the workers cannot be started at all
+        with self._condition:
+            for _ in xrange(size):
+                self._spawn_async()
+
+    def plan(self, job=None, **kwargs):
+        """
+        Plan in a worker process, the call blocks until a worker is available
+        :param job: optional object with a method set_cancel_handler(handler), see planner.PlanningJob. The handler
+                    stops the request by killing the used worker process.
+        :param kwargs: keyword arguments of ff.plan()
+        :return: plan dictionary or None
+        :raises PlannerWorkerError: if the planner failed, the request was cancelled or the pool is not available
+        """
+        worker = self._acquire()
+        try:
+            if job is not None and not job.set_cancel_handler(worker.cancel):
+                raise PlannerWorkerError("Planning request has been cancelled")
+            return worker.plan(kwargs, timeout=self._timeout)
+        except PlannerWorkerStartError:
+            self.available = False
+            raise
+        finally:
+            self._release(worker)
+
+    def close(self):
+        """
+        Terminate all idle workers, busy workers terminate after their current request
+        """
+        with self._condition:
+            self._closed = True
+            idle_workers = self._idle_workers
+            self._idle_workers = []
+            spawners = self._spawners
+            self._condition.notify_all()
+        for spawner in spawners:  # workers that are started in the meantime are closed by their spawner
+            spawner.join()
+        for worker in idle_workers:
+            worker.close()
+
+    def _acquire(self):
+        with self._condition:
+            while not self._idle_workers:
+                if self._closed or not self.available:
+                    raise PlannerWorkerError("Planner worker pool is not available")
+                if self._worker_count < self._size:
+                    self._spawn_async()
+                self._condition.wait()
+            return self._idle_workers.pop()
+
+    def _release(self, worker):
+        with self._condition:
+            if not self._closed and worker.alive and worker.served_requests < self._max_requests:
+                self._idle_workers.append(worker)
+                self._condition.notify()
+                return
+            self._worker_count -= 1
+            if not self._closed and self.available:
+                # the new process already loads the planner while we are not planning
+                self._spawn_async()
+        worker.close()
+
+    def _spawn_async(self):
+        """
+        Start a new worker in a separate thread, must be called with the condition acquired
+        """
+        self._worker_count += 1
+        spawner = threading.Thread(target=self._spawn)
+        spawner.daemon = True
+        spawner.start()
+        self._spawners = [s for s in self._spawners if s.is_alive()]
+        self._spawners.append(spawner)
+
+    def _spawn(self):
+        try:
+            worker = PlannerWorker()
+        except OSError:
+            rhbplog.logerr("Could not start planner worker: %s", sys.exc_info()[1])
+            with self._condition:
+                self._worker_count -= 1
+                self.available = False
+                self._condition.notify_all()
+            return
+        with self._condition:
+            if not self._closed:
+                self._idle_workers.append(worker)
+                self._condition.notify()
+                return
+            self._worker_count -= 1
+        worker.close()
+
+
+class _TimeoutError(Exception):
+    pass
+
+
+def _write_message(fd, message):
+    data = marshal.dumps(message)
+    data = _HEADER.pack(len(data)) + data
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def _read_exactly(fd, size, deadline):
+    """
+    :return: the read data or None if the pipe has been closed
+    """
+    data = ''
+    while len(data) < size:
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise _TimeoutError()
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def _read_message(fd, deadline=None):
+    """
+    Read a marshalled message
+    :param fd: file descriptor
+    :param deadline: time.time() value after which a _TimeoutError is raised, None for waiting forever
+    :return: the message or None if the pipe has been closed
+    """
+    header = _read_exactly(fd, _HEADER.size, deadline)
+    if header is None:
+        return None
+    data = _read_exactly(fd, _HEADER.unpack(header)[0], deadline)
+    if data is None:
+        return None
+    return marshal.loads(data)
+
+
+def run_worker():
+    """
+    Main function of the worker processes
+    """
+    # the worker is terminated by closing its input, avoid that it is stopped together with the ROS node by Ctrl-C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # keep the original stdout for the responses and redirect everything Metric-FF prints to stderr
+    response_fd = os.dup(1)
+    os.dup2(2, 1)
+    request_fd = 0
+
+    try:
+        import ff
+    except ImportError as e:
+        _write_message(response_fd, ('error', str(e)))
+        sys.exit(1)
+
+    try:
+        _write_message(response_fd, ('ready', None))
+        while True:
+            request = _read_message(request_fd)
+            if request is None:  # closed by the pool
+                break
+            try:
+                response = ('result', ff.plan(**request))
+            except Exception as e:
+                response = ('error', str(e))
+            sys.stdout.flush()
+            _write_message(response_fd, response)
+    except OSError:  # the pool has been closed in the meantime
+        pass
@@ -0,0 +1,240 @@
+'''
+Created on 18.10.2026
+
+@author: hrabia
+'''
+from __future__ import division  # force floating point division when using plain /
+
+import heapq
+import itertools
+import math
+
+from .planner import Planner, PlanningDomain
+from .pddl_model import PDDLDomain, PDDLProblem, COST_FUNCTION, evaluate_condition, parse_condition, parse_state
+
+import utils.rhbp_logging
+rhbplog = utils.rhbp_logging.LogManager(logger_name=utils.rhbp_logging.LOGGER_DEFAULT_NAME + '.planning')
+
+_increasing_comparators = frozenset(['>', '>='])
+_decreasing_comparators = frozenset(['<', '<='])
+_mirrored_comparators = {'<': '>', '<=': '>=', '=': '=', '>=': '<=', '>': '<'}
+
+
+class _DomainAnalysis(object):
+    """
+    Information about the actions of a domain that is used by the search heuristic
+    """
+
+    def __init__(self, domain):
+        """
+        :param domain: PDDLDomain
+        """
+        self.domain = domain
+        self.actions = sorted(domain.actions.values(), key=lambda action: action.name)  # deterministic search
+        self.max_increase = {}  # function name -> biggest constant increase of a single action
+        self.max_decrease = {}  # function name -> biggest constant decrease of a single action
+        self.unknown_changes = set()  # functions with changes that are not constant increases or decreases
+        costs = []
+        for action in self.actions:
+            action_cost = 0.0
+            for head, name, amount in self._get_numeric_effects(action.effect):
+                if name == COST_FUNCTION:
+                    action_cost += amount if head == 'increase' and amount is not None else 0.0
+                elif amount is None or head not in ('increase', 'decrease'):
+                    self.unknown_changes.add(name)
+                elif (head == 'increase') == (amount >= 0):
+                    self.max_increase[name] = max(self.max_increase.get(name, 0.0), abs(amount))
+                else:
+                    self.max_decrease[name] = max(self.max_decrease.get(name, 0.0), abs(amount))
+            costs.append(action_cost)
+        positive_costs = [c for c in costs if c > 0]
+        self.min_action_cost = min(positive_costs) if positive_costs else 1.0
+
+    def _get_numeric_effects(self, expression):
+        """
+        :return: generator of tuple(operator, function name, constant amount or None) of all numeric effects, including
+                 conditional ones
+        """
+        if not expression:
+            return
+        head = expression[0]
+        if head == 'and':
+            for e in expression[1:]:
+                for effect in self._get_numeric_effects(e):
+                    yield effect
+        elif head == 'when':
+            for effect in self._get_numeric_effects(expression[2]):
+                yield effect
+        elif head in ('assign', 'increase', 'decrease', 'scale-up', 'scale-down'):
+            amount = expression[2]
+            yield head, expression[1][0], float(amount) if not isinstance(amount, list) else None
+
+    def estimate(self, goals, state):
+        """
+        Estimate the costs to reach the goals, the estimate is not admissible because it ignores that a single action
+        may contribute to several goals
+        :param goals: list of parsed goal conditions that all have to be reached
+        :param state: dict {name: value}
+        :return: estimated costs or None if the goals are not reachable
+        """
+        steps = 0
+        for goal in goals:
+            if evaluate_condition(goal, state):
+                continue
+            goal_steps = self._estimate_numeric_steps(goal, state)
+            if goal_steps is None:
+                return None
+            steps += goal_steps
+        return steps * self.min_action_cost
+
+    def _estimate_numeric_steps(self, goal, state):
+        """
+        :return: amount of actions needed for an unsatisfied goal, None if it is not reachable
+        """
+        if len(goal) != 3 or goal[0] not in _mirrored_comparators:
+            return 1
+        comparator, function, bound = goal
+        if not isinstance(function, list):  # constant on the left side
+            comparator, function, bound = _mirrored_comparators[comparator], bound, function
+        if not isinstance(function, list) or len(function) != 1 or isinstance(bound, list):
+            return 1
+        name = function[0]
+        value = state.get(name)
+        if value is None and name not in self.unknown_changes:
+            return None  # undefined functions can only be defined by an assignment
+        if name in self.unknown_changes or value is None or isinstance(value, bool):
+            return 1
+        gap = float(bound) - value
+        if comparator in _increasing_comparators or (comparator == '=' and gap > 0):
+            change = self.max_increase.get(name)
+        elif comparator in _decreasing_comparators or (comparator == '=' and gap < 0):
+            change = self.max_decrease.get(name)
+        else:
+            return 1
+        if not change:
+            return None
+        return max(1, int(math.ceil(abs(gap) / change)))
+
+
+class PythonPlanner(Planner):
+    """
+    In-process forward search planner for the parameterless domains generated by the manager. It supports STRIPS
+    actions with negative, disjunctive and numeric preconditions as well as conditional and numeric effects and
+    minimises the function 'costs'.
+    The search is a weighted A* with a goal counting heuristic that estimates the required steps of numeric goals from
+    the biggest change of the function by a single action.
+    """
+
+    def __init__(self, weight=1.0, max_expansions=100000):
+        """
+        :param weight: weight of the heuristic, 1.0 for A*, higher values find plans faster but maybe with higher costs
+        :param max_expansions: maximum amount of expanded states, afterwards the search is aborted without plan
+        """
+        self.weight = weight
+        self.max_expansions = max_expansions
+        self._domain_pddl = None
+        self._domain_analysis = None
+
+    def plan(self, domain_pddl, problem_pddl):
+        if domain_pddl != self._domain_pddl:
+            self._domain_analysis = _DomainAnalysis(PDDLDomain.from_pddl(domain_pddl))
+            self._domain_pddl = domain_pddl
+        problem = PDDLProblem.from_pddl(problem_pddl)
+        return self._search(self._domain_analysis, problem.state, problem.goal)
+
+    def load_domain(self, domain_pddl):
+        """
+        The handle contains the parsed and analysed domain
+        """
+        return PlanningDomain(domain_pddl, model=_DomainAnalysis(PDDLDomain.from_pddl(domain_pddl)))
+
+    def _plan_problem(self, domain, state_statement, goal_statement, cost_bound):
+        if not isinstance(domain.model, _DomainAnalysis):  # loaded by another planner
+            return super(PythonPlanner, self)._plan_problem(domain, state_statement, goal_statement, cost_bound)
+        return self._search(domain.model, parse_state(state_statement), parse_condition(goal_statement), cost_bound)
+
+    def _search(self, analysis, initial_state, goal, cost_bound=None):
+        """
+        :param analysis: _DomainAnalysis
+        :param initial_state: dict {name: value}
+        :param goal: parsed goal expression
+        :param cost_bound: states with higher costs are not expanded, None for no bound
+        :return: plan dictionary, additionally with the amount of evaluated states in the field 'evaluated_states'
+        """
+        goals = self._get_goal_conjuncts(goal)
+
+        initial_costs = initial_state.get(COST_FUNCTION) or 0.0
+        estimate = analysis.estimate(goals, initial_state)
+        if estimate is None:
+            return {'cost': -1.0, 'actions': {}}  # this is the indicator that the planning problem is impossible
+
+        # open list entries: (f, tie breaker, g, state key)
+        tie_breaker = itertools.count()
+        initial_key = self._get_state_key(initial_state)
+        open_list = [(self.weight * estimate, next(tie_breaker), 0.0, initial_key)]
+        states = {initial_key: initial_state}
+        best_costs = {initial_key: 0.0}
+        parents = {initial_key: None}  # state key -> (parent state key, action name)
+        expansions = 0
+
+        while open_list:
+            _f, _tie, costs, key = heapq.heappop(open_list)
+            if costs > best_costs[key]:  # outdated entry
+                continue
+            state = states[key]
+            if all(evaluate_condition(goal, state) for goal in goals):
+                return {'cost': costs, 'actions': self._extract_plan(parents, key), 'evaluated_states': len(states)}
+
+            expansions += 1
+            if expansions > self.max_expansions:
+                rhbplog.logwarn("Python planner aborted the search after %d expansions", self.max_expansions)
+                return None
+
+            for action in analysis.actions:
+                if not action.is_applicable(state):
+                    continue
+                successor = action.apply(state)
+                successor_key = self._get_state_key(successor)
+                successor_costs = (successor.get(COST_FUNCTION) or 0.0) - initial_costs
+                if successor_costs >= best_costs.get(successor_key, float('inf')) or \
+                        (cost_bound is not None and successor_costs > cost_bound):
+                    continue
+                estimate = analysis.estimate(goals, successor)
+                if estimate is None:
+                    continue
+                states[successor_key] = successor
+                best_costs[successor_key] = successor_costs
+                parents[successor_key] = (key, action.name)
+                heapq.heappush(open_list, (successor_costs + self.weight * estimate, next(tie_breaker),
+                                           successor_costs, successor_key))
+
+        # the reachable state space is exhausted
+        return {'cost': -1.0, 'actions': {}, 'evaluated_states': len(states)}
+
+    @staticmethod
+    def _get_goal_conjuncts(goal):
+        """
+        :return: list of the conditions of a (nested) conjunction
+        """
+        if not goal:
+            return []
+        if goal[0] == 'and':
+            return list(itertools.chain.from_iterable(PythonPlanner._get_goal_conjuncts(g) for g in goal[1:]))
+        return [goal]
+
+    @staticmethod
+    def _get_state_key(state):
+        # the accumulated costs are not part of the state, otherwise every path would lead to a different state
+        return frozenset(item for item in state.iteritems() if item[0] != COST_FUNCTION and item[1] is not False)
+
+    @staticmethod
+    def _extract_plan(parents, key):
+        action_names = []
+        while parents[key] is not None:
+            key, action_name = parents[key]
+            action_names.append(action_name)
+        action_names.reverse()
+        return dict(enumerate(action_names))
+
+    def configuration_key(self):
+        return 'python', self.weight, self.max_expansions
@@ -103,6 +103,35 @@ class TestConditionElements(unittest.TestCase):
         # goal_proxy.sync()
         # self.assertTrue(goal_proxy.satisfied, 'Goal is not satisfied')
 
+    def test_action_pddl_caching(self):
+        """
+        Test that the action PDDL is only recreated after the behaviour has been changed
+        """
+
+        planner_prefix = "condition_elements_test_caching"
+
+        sensor1 = Sensor()
+        sensor1.update(newValue=0.8)
+        sensor2 = Sensor()
+        sensor2.update(newValue=0.4)
+
+        condition = Condition(sensor1, LinearActivator(zeroActivationValue=0, fullActivationValue=1))
+
+        behaviour = BehaviourBase("behaviour_caching", planner_prefix=planner_prefix)
+        behaviour.add_effect(Effect(sensor_name=sensor1.name, indicator=-0.1, sensor_type=float))
+        behaviour.add_precondition(condition)
+
+        action_pddl = behaviour.getActionPDDL()
+        self.assertIs(action_pddl, behaviour.getActionPDDL())
+
+        behaviour.add_effect(Effect(sensor_name=sensor2.name, indicator=0.1, sensor_type=float))
+        changed_action_pddl = behaviour.getActionPDDL()
+        self.assertIsNot(action_pddl, changed_action_pddl)
+        self.assertIn(sensor2.name, changed_action_pddl.functions)
+
+        behaviour.readyThreshold = 0.5
+        self.assertIsNot(changed_action_pddl, behaviour.getActionPDDL())
+
 
 if __name__ == '__main__':
     rostest.rosrun(PKG, 'test_condition_elements_node', TestConditionElements)
@@ -15,6 +15,7 @@ from behaviour_components.activators import BooleanActivator, GreedyActivator, T
 from behaviour_components.conditions import Condition, Conjunction
 from behaviour_components.goals import GoalBase
 from behaviour_components.managers import Manager
+from behaviour_components.planner import Planner
 from behaviour_components.behaviours import BehaviourBase
 from behaviour_components.condition_elements import Effect
 from behaviour_components.sensors import TopicSensor, Sensor
@@ -25,6 +26,35 @@ from tests.common import SetTrueBehavior, IncreaserBehavior
 
 PKG = 'rhbp_core'
 
+
+class SlowPlanner(Planner):
+    """
+    Planner wrapper that delays the planning
+    """
+
+    def __init__(self, planner, delay):
+        self.planner = planner
+        self.delay = delay
+
+    def plan(self, domain_pddl, problem_pddl):
+        time.sleep(self.delay)
+        return self.planner.plan(domain_pddl, problem_pddl)
+
+    def close(self):
+        self.planner.close()
+
+
+class FailingPlanner(Planner):
+    """
+    Planner that fails for any domain
+    """
+
+    def plan(self, domain_pddl, problem_pddl):
+        raise RuntimeError("Planner failure")
+
+    def load_domain(self, domain_pddl):
+        raise RuntimeError("Planner failure")
+
 """
 System test for manager and its integration with other components
 """
@@ -265,6 +295,47 @@ class TestManager(unittest.TestCase):
         self.assertEquals(len(res.plan_sequence), len(expected_plan_seq))
         self.assertListEqual(res.plan_sequence, expected_plan_seq)
 
+    def test_planning_snapshot(self):
+
+        method_prefix = self.__message_prefix + "test_planning_snapshot"
+        planner_prefix = method_prefix + "Manager"
+        manager = Manager(activationThreshold=7.0, prefix=planner_prefix)
+
+        sensor_1 = Sensor(name="Sensor1", initial_value=False)
+        sensor_2 = Sensor(name="Sensor2", initial_value=False)
+        sensor_3 = Sensor(name="Sensor3", initial_value=False)
+
+        behaviour_1 = BehaviourBase(name="Behaviour1", planner_prefix=planner_prefix)
+        behaviour_1.add_effect(Effect(sensor_name=sensor_1.name, indicator=1))
+        behaviour_2 = BehaviourBase(name="Behaviour2", planner_prefix=planner_prefix)
+        behaviour_2.add_effect(Effect(sensor_name=sensor_2.name, indicator=1))
+        behaviour_2.add_precondition(Condition(sensor_1, BooleanActivator()))
+        behaviour_3 = BehaviourBase(name="Behaviour3", planner_prefix=planner_prefix)
+        behaviour_3.add_effect(Effect(sensor_name=sensor_3.name, indicator=1))
+        behaviour_3.add_precondition(Condition(sensor_2, BooleanActivator()))
+
+        goal1 = GoalBase(name="Test_Goal1", conditions=[Condition(sensor_3, BooleanActivator())],
+                         planner_prefix=planner_prefix)
+
+        goal2 = GoalBase(name="Test_Goal2", conditions=[Condition(sensor_2, BooleanActivator())],
+                         planner_prefix=planner_prefix)
+
+        # the snapshot is also available without prior decision step
+        snapshot = manager.create_planning_snapshot()
+
+        plan = snapshot.plan_this_single_goal(goal2.getGoalStatements())
+        self.assertListEqual(["Behaviour1", "Behaviour2"], [plan["actions"][i] for i in sorted(plan["actions"])])
+
+        # several queries can be planned in parallel for the same snapshot
+        full_plan_job = snapshot.submit_with_additional_goal(goal1.getGoalStatements())
+        single_plan_job = snapshot.submit_single_goal(goal2.getGoalStatements())
+        full_plan = full_plan_job.result()
+        self.assertListEqual(["Behaviour1", "Behaviour2", "Behaviour3"],
+                             [full_plan["actions"][i] for i in sorted(full_plan["actions"])])
+        self.assertEquals(plan, single_plan_job.result())
+
+        self.assertEquals(full_plan, manager.plan_with_additional_goal(goal1.getGoalStatements()))
+
     def test_guarantee_decision(self):
         """
         Testing guarantee_decision parameter of manager.step()
@@ -402,6 +473,207 @@ class TestManager(unittest.TestCase):
         self.assertTrue(manager._are_effects_of_planned_behaviour_realised())
         manager._planExecutionIndex += 1
 
+    def test_batched_status_fetching(self):
+        """
+        Test fetching the status of all behaviours and goals of this node with one batched request
+        """
+
+        method_prefix = self.__message_prefix + "test_batched_status_fetching"
+        planner_prefix = method_prefix + "Manager"
+        m = Manager(activationThreshold=7, prefix=planner_prefix, batch_status_fetching=True)
+
+        topic_name_1 = method_prefix + '/sensor_1'
+        sensor = TopicSensor(topic=topic_name_1, message_type=Bool, initial_value=False)
+        condition = Condition(sensor, BooleanActivator())
+
+        behaviour = SetTrueBehavior(effect_name=sensor.name, topic_name=topic_name_1,
+                                    name=method_prefix + "SetTrue", planner_prefix=planner_prefix)
+
+        goal = GoalBase(method_prefix + 'CentralGoal', planner_prefix=planner_prefix)
+        goal.add_condition(condition)
+
+        m.step()
+        rospy.sleep(0.1)
+
+        groups = m._Manager__status_fetcher._groups
+        self.assertTrue(rospy.get_name() in groups, "Components of this node are not batched")
+        self.assertEqual(len(groups[rospy.get_name()]), 2, "Not all components are part of the batch")
+
+        for x in range(0, 3, 1):
+            m.step()
+            rospy.sleep(0.1)
+
+        goal_proxy = m.goals[0]
+        self.assertTrue(goal_proxy.satisfied, 'Goal is not satisfied')
+        self.assertTrue(behaviour.was_executed or behaviour._isExecuting, "Behaviour is not executed")
+
+    def test_concurrent_status_fetching(self):
+        """
+        Test fetching the status of behaviours and goals with concurrent single requests
+        """
+
+        method_prefix = self.__message_prefix + "test_concurrent_status_fetching"
+        planner_prefix = method_prefix + "Manager"
+        m = Manager(activationThreshold=7, prefix=planner_prefix, batch_status_fetching=False, status_fetch_threads=4)
+
+        topic_name_1 = method_prefix + '/sensor_1'
+        sensor = TopicSensor(topic=topic_name_1, message_type=Bool, initial_value=False)
+        condition = Condition(sensor, BooleanActivator())
+
+        SetTrueBehavior(effect_name=sensor.name, topic_name=topic_name_1, name=method_prefix + "SetTrue",
+                        planner_prefix=planner_prefix)
+        SetTrueBehavior(effect_name=None, topic_name=method_prefix + '/sensor_2', name=method_prefix + "SetTrue2",
+                        planner_prefix=planner_prefix, independentFromPlanner=True)
+
+        goal = GoalBase(method_prefix + 'CentralGoal', planner_prefix=planner_prefix)
+        goal.add_condition(condition)
+
+        for x in range(0, 4, 1):
+            m.step()
+            rospy.sleep(0.1)
+
+        self.assertEqual([b.name for b in m.behaviours], [method_prefix + "SetTrue", method_prefix + "SetTrue2"])
+        self.assertTrue(all(b.active for b in m.behaviours), "Not all behaviour status have been fetched")
+        self.assertTrue(m.goals[0].satisfied, 'Goal is not satisfied')
+        self.assertTrue(m.status_fetch_duration > 0.0)
+        self.assertIsNone(goal._status_publisher, "Status publisher without push mode")
+
+        m.unregister()
+
+    def test_status_push(self):
+        """
+        Test the manager push mode, in which behaviours and goals publish their status
+        """
+
+        method_prefix = self.__message_prefix + "test_status_push"
+        planner_prefix = method_prefix + "Manager"
+        m = Manager(activationThreshold=7, prefix=planner_prefix, status_push=True)
+
+        topic_name_1 = method_prefix + '/sensor_1'
+        sensor = TopicSensor(topic=topic_name_1, message_type=Bool, initial_value=False)
+        condition = Condition(sensor, BooleanActivator())
+
+        behaviour = SetTrueBehavior(effect_name=sensor.name, topic_name=topic_name_1,
+                                    name=method_prefix + "SetTrue", planner_prefix=planner_prefix)
+
+        goal = GoalBase(method_prefix + 'CentralGoal', planner_prefix=planner_prefix)
+        goal.add_condition(condition)
+
+        self.assertIsNotNone(behaviour._status_publisher, "Behaviour status publisher is missing")
+        self.assertIsNotNone(goal._status_publisher, "Goal status publisher is missing")
+
+        m.step()  # first step is based on requested status
+        rospy.sleep(0.1)
+
+        cache = m._Manager__status_cache
+        self.assertIsNotNone(cache.get_goal_status(goal._name, m.current_step), "Goal status was not pushed")
+        self.assertIsNotNone(cache.get_behaviour_status(behaviour._name, m.current_step) or behaviour._isExecuting,
+                             "Behaviour status was not pushed")
+
+        for x in range(0, 3, 1):
+            m.step()
+            rospy.sleep(0.1)
+
+        self.assertTrue(m.goals[0].satisfied, 'Goal is not satisfied')
+
+        m.unregister()
+
+    def test_parallel_goal_sequences(self):
+        """
+        Test the concurrent planning of goal sequences with an unreachable goal of the highest priority
+        """
+
+        method_prefix = self.__message_prefix + "test_parallel_goal_sequences"
+        planner_prefix = method_prefix + "Manager"
+        m = Manager(activationThreshold=7, prefix=planner_prefix, planner_parallel_goal_sequences=4)
+
+        goals = []
+        for i in range(3):
+            topic_name = method_prefix + '/sensor_' + str(i)
+            sensor = TopicSensor(topic=topic_name, message_type=Bool, initial_value=False)
+            condition = Condition(sensor, BooleanActivator())
+            if i > 0:  # no behaviour influences the first sensor
+                SetTrueBehavior(effect_name=sensor.name, topic_name=topic_name, name=method_prefix + "SetTrue" + str(i),
+                                planner_prefix=planner_prefix)
+            goals.append(GoalBase(method_prefix + 'Goal' + str(i), planner_prefix=planner_prefix, priority=3 - i,
+                                  conditions=[condition]))
+
+        m.step()
+        rospy.sleep(0.1)
+
+        self.assertEqual([goals[1]._name, goals[2]._name], [g.name for g in m._currently_pursued_goals],
+                         "Reachable goals are not pursued")
+        self.assertTrue(m.plan, "No plan found")
+
+        telemetry = m.get_planning_telemetry()
+        self.assertEqual(1, telemetry['planning_duration']['count'])
+        self.assertLessEqual(2, telemetry['planning_goal_sequences']['max'], "Infeasible sequences are not counted")
+        self.assertLessEqual(1, telemetry['planner']['calls'])
+
+        m.unregister()
+
+    def test_planning_deadline(self):
+        """
+        Test that planning continues in the background if the planning deadline is exceeded
+        """
+
+        method_prefix = self.__message_prefix + "test_planning_deadline"
+        planner_prefix = method_prefix + "Manager"
+        # high activation threshold to avoid that the behaviour changes the state before the plan is adopted
+        m = Manager(activationThreshold=1000, prefix=planner_prefix, planning_deadline=0.1)
+        m.planner = SlowPlanner(planner=m.planner, delay=0.5)
+
+        topic_name_1 = method_prefix + '/sensor_1'
+        sensor = TopicSensor(topic=topic_name_1, message_type=Bool, initial_value=False)
+        condition = Condition(sensor, BooleanActivator())
+
+        SetTrueBehavior(effect_name=sensor.name, topic_name=topic_name_1, name=method_prefix + "SetTrue",
+                        planner_prefix=planner_prefix)
+
+        goal = GoalBase(method_prefix + 'CentralGoal', planner_prefix=planner_prefix)
+        goal.add_condition(condition)
+
+        m.step()
+        self.assertFalse(m.plan, "Manager waited for the planner")
+
+        rospy.sleep(0.6)
+        m.step()
+        self.assertTrue(m.plan, "Plan of the background planning has not been adopted")
+
+        m.unregister()
+
+    def test_planner_error(self):
+        """
+        Test that planner errors, e.g. domains the planner cannot load, do not escape the manager step
+        """
+
+        method_prefix = self.__message_prefix + "test_planner_error"
+        configurations = [{'planning_deadline': 0.0}, {'planning_deadline': 1.0}, {'background_planning': True}]
+        for i, configuration in enumerate(configurations):
+            planner_prefix = method_prefix + "Manager" + str(i)
+            m = Manager(activationThreshold=7, prefix=planner_prefix, **configuration)
+            m.planner = FailingPlanner()
+
+            topic_name_1 = method_prefix + '/sensor_' + str(i)
+            sensor = TopicSensor(topic=topic_name_1, message_type=Bool, initial_value=False)
+            condition = Condition(sensor, BooleanActivator())
+
+            SetTrueBehavior(effect_name=sensor.name, topic_name=topic_name_1, name=planner_prefix + "SetTrue",
+                            planner_prefix=planner_prefix)
+
+            goal = GoalBase(planner_prefix + 'CentralGoal', planner_prefix=planner_prefix)
+            goal.add_condition(condition)
+
+            m.step()
+            self.assertFalse(m.plan, "Plan despite planner error")
+            self.assertTrue(m._Manager__replanningNeeded, "Planning is not repeated after the planner error")
+            self.assertEqual([], m.plan_with_registered_goals([]))
+            snapshot = m.create_planning_snapshot()
+            self.assertEqual(-1.0, snapshot.plan_this_single_goal(goal.getGoalStatements())['cost'])
+            self.assertEqual(-1.0, snapshot.submit_single_goal(goal.getGoalStatements()).result(timeout=1.0)['cost'])
+
+            m.unregister()
+
 
 if __name__ == '__main__':
     rostest.rosrun(PKG, 'test_goals_node', TestManager)
@@ -5,8 +5,12 @@
 import unittest
 
 import collections
+import random
 
-from behaviour_components.activation_algorithm import ActivationAlgorithmFactory, BaseActivationAlgorithm
+from behaviour_components.activation_algorithm import ActivationAlgorithmFactory, BaseActivationAlgorithm, \
+    UniformActivationAlgorithm, _SUPPORTING_EFFECTS, _CONFLICTING_EFFECTS, _SHARED_WISHES
+from behaviour_components.numpy_activation_algorithm import NumpyActivationAlgorithm, \
+    NumpyUniformActivationAlgorithm
 
 from behaviour_components.managers import Manager
 
@@ -14,6 +18,42 @@ from behaviour_components.managers import Manager
 from mock import patch, MagicMock
 from rospy.rostime import Time
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class EffectMock(object):
+
+    def __init__(self, name, indicator):
+        self.name = name
+        self.indicator = indicator
+
+    def get_pddl_effect_name(self):
+        return self.name
+
+
+class ComponentMock(object):
+    """
+    Behaviour or goal with the attributes used by the activation algorithms
+    """
+
+    def __init__(self, name, correlations, wishes, executable, activation, operational=True, priority=0):
+        self.name = name
+        self.correlations = correlations
+        self.wishes = wishes
+        self.executable = executable
+        self.preconditionSatisfaction = 1.0 if executable else 0.0
+        self.activation = activation
+        self.operational = operational
+        self.priority = priority
+        self.activationFromPreconditions = 0.0
+        self.activation_components = []
+
+    def __repr__(self):
+        return self.name
+
 
 class ActivationAlgorithmTestSuite(unittest.TestCase):
 
@@ -78,6 +118,189 @@ class ActivationAlgorithmTestSuite(unittest.TestCase):
         algo.step_preparation()
         self.assertEqual(algo._goal_priority_weights[b3], 1.5)
 
+    def test_indexed_spreading(self):
+        """
+        Testing the activation spreading based on the effect and wish index of a step
+        """
+
+        algo = BaseActivationAlgorithm(self.manager)
+
+        goal = ComponentMock("G", correlations=[], wishes=[EffectMock("s1", 1.0)], executable=False, activation=0.0)
+        b1 = ComponentMock("B1", correlations=[EffectMock("s1", 1.0)], wishes=[EffectMock("s2", 1.0)],
+                           executable=False, activation=1.0)
+        b2 = ComponentMock("B2", correlations=[EffectMock("s1", 0.5), EffectMock("s2", 1.0)], wishes=[],
+                           executable=True, activation=2.0)
+        b3 = ComponentMock("B3", correlations=[EffectMock("s1", -1.0)], wishes=[EffectMock("s1", 0.0)],
+                           executable=True, activation=1.0)
+
+        self.manager._operational_goals.append(goal)
+        self.manager._operational_behaviours.extend([b1, b2, b3])
+        self.manager._totalActivation = 4.0
+        algo.step_preparation()
+
+        # the goal activation is shared by both behaviours supporting the wish
+        self.assertAlmostEqual(0.5, algo.get_activation_from_goals(b1)[0])
+        self.assertAlmostEqual(0.25, algo.get_activation_from_goals(b2)[0])
+        self.assertAlmostEqual(-0.1, algo.get_inhibition_from_goals(b3)[0])
+        # B2 is an executable predecessor of B1
+        self.assertAlmostEqual(0.5, algo.get_activation_from_predecessors(b1)[0])
+        self.assertAlmostEqual(0.25, algo.get_activation_from_successors(b2)[0])
+        self.assertAlmostEqual(0.0, algo.get_activation_from_successors(b1)[0])
+        # B2 would undo the satisfied wish of B3 like all other behaviours correlated to s1
+        self.assertAlmostEqual(-0.125 / 3, algo.get_inhibition_from_conflictors(b2)[0])
+
+    def test_diagnostics(self):
+        """
+        Testing that the activation components are only recorded in the diagnostics mode
+        """
+
+        algo = BaseActivationAlgorithm(self.manager)
+
+        goal = ComponentMock("G", correlations=[], wishes=[EffectMock("s1", 1.0)], executable=False, activation=0.0)
+        behaviour = ComponentMock("B1", correlations=[EffectMock("s1", 1.0)], wishes=[], executable=True,
+                                  activation=1.0)
+        self.manager._operational_goals.append(goal)
+        self.manager._operational_behaviours.append(behaviour)
+        self.manager._totalActivation = 1.0
+        algo.step_preparation()
+
+        activation_step = algo.compute_behaviour_activation_step(behaviour)
+        self.assertEqual(7, len(behaviour.activation_components))
+
+        algo.diagnostics = False
+        self.assertEqual(activation_step, algo.compute_behaviour_activation_step(behaviour))
+        self.assertEqual([], behaviour.activation_components, "Outdated activation components")
+
+    def test_spreading_term_cache(self):
+        """
+        Testing that the spreading terms are only recomputed if their inputs changed
+        """
+
+        class CountingActivationAlgorithm(BaseActivationAlgorithm):
+
+            def __init__(self, manager):
+                super(CountingActivationAlgorithm, self).__init__(manager)
+                self.goal_computations = 0
+                self.predecessor_computations = 0
+
+            def get_activation_from_goals(self, ref_behaviour):
+                self.goal_computations += 1
+                return super(CountingActivationAlgorithm, self).get_activation_from_goals(ref_behaviour)
+
+            def get_activation_from_predecessors(self, ref_behaviour):
+                self.predecessor_computations += 1
+                return super(CountingActivationAlgorithm, self).get_activation_from_predecessors(ref_behaviour)
+
+        algo = CountingActivationAlgorithm(self.manager)
+        uncached_algo = BaseActivationAlgorithm(self.manager)
+        uncached_algo.cache_spreading_terms = False
+
+        goal_wish = EffectMock("s1", 1.0)
+        goal = ComponentMock("G", correlations=[], wishes=[goal_wish], executable=False, activation=0.0)
+        b1 = ComponentMock("B1", correlations=[EffectMock("s1", 1.0)], wishes=[EffectMock("s2", 1.0)],
+                           executable=False, activation=1.0)
+        b2 = ComponentMock("B2", correlations=[EffectMock("s2", 1.0)], wishes=[], executable=True, activation=2.0)
+        self.manager._operational_goals.append(goal)
+        self.manager._operational_behaviours.extend([b1, b2])
+        self.manager._totalActivation = 3.0
+
+        def assert_step(goal_computations, predecessor_computations):
+            activation_steps = []
+            for activation_algorithm in [uncached_algo, algo]:
+                activation_algorithm.step_preparation()
+                activation_steps.append([activation_algorithm.compute_behaviour_activation_step(b) for b in [b1, b2]])
+            self.assertEqual(activation_steps[0], activation_steps[1])
+            self.assertEqual(goal_computations, algo.goal_computations)
+            self.assertEqual(predecessor_computations, algo.predecessor_computations)
+
+        assert_step(2, 2)
+
+        # nothing changed
+        assert_step(2, 2)
+
+        # the activation of B2 only affects B1, B2 has no predecessors
+        b2.activation = 1.0
+        self.manager._totalActivation = 2.0
+        assert_step(2, 3)
+
+        # only B1 is correlated to the goal
+        goal_wish.indicator = 0.5
+        assert_step(3, 3)
+
+        # the weights are part of all terms
+        algo.update_config(goalBias=2.0)
+        uncached_algo.update_config(goalBias=2.0)
+        assert_step(5, 5)
+
+    def test_sharing_behaviours(self):
+        """
+        Testing the precomputation of the behaviours sharing an influence on an effect
+        """
+
+        b1 = ComponentMock("B1", correlations=[EffectMock("s1", 1.0), EffectMock("s1", 0.5)],
+                           wishes=[EffectMock("s2", 1.0)], executable=False, activation=1.0)
+        b2 = ComponentMock("B2", correlations=[EffectMock("s1", -0.5), EffectMock("s2", 0.0)],
+                           wishes=[EffectMock("s2", 0.3)], executable=True, activation=1.0)
+        self.manager._operational_behaviours.extend([b1, b2])
+
+        for algo in [BaseActivationAlgorithm(self.manager), UniformActivationAlgorithm(self.manager)]:
+            algo.step_preparation()
+            # a behaviour is only counted once per effect and direction
+            self.assertEqual({(_SUPPORTING_EFFECTS, "s1", 1): [b1],
+                              (_SUPPORTING_EFFECTS, "s1", -1): [b2],
+                              (_CONFLICTING_EFFECTS, "s1", 1): [b2],
+                              (_CONFLICTING_EFFECTS, "s1", -1): [b1],
+                              (_CONFLICTING_EFFECTS, "s1", 0): [b1, b2],
+                              (_SHARED_WISHES, "s2", 1): [b1, b2]}, algo._sharing_behaviours)
+            # the lookup only depends on the direction of the indicator
+            self.assertEqual([b1], algo._get_sharing_behaviours(_SUPPORTING_EFFECTS, "s1", 0.3))
+            self.assertEqual([b1, b2], algo._get_sharing_behaviours(_CONFLICTING_EFFECTS, "s1", 0.0))
+            self.assertEqual([], algo._get_sharing_behaviours(_SHARED_WISHES, "s2", -1.0))
+            self.assertEqual([], algo._get_sharing_behaviours(_SUPPORTING_EFFECTS, "unknown", 1.0))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_algorithms(self):
+        """
+        Testing that the vectorised algorithms compute the same activation as the loop based ones
+        """
+
+        rand = random.Random(0)
+        effect_names = ["s%d" % i for i in range(6)]
+        indicators = [-1.0, -0.5, 0.0, 0.3, 0.5, 1.0]
+
+        def create_effects():
+            return [EffectMock(rand.choice(effect_names), rand.choice(indicators)) for _ in range(rand.randint(0, 4))]
+
+        behaviours = [ComponentMock("B%d" % i, correlations=create_effects(), wishes=create_effects(),
+                                    executable=rand.random() < 0.5, activation=rand.random() * 3,
+                                    operational=rand.random() < 0.9) for i in range(20)]
+        goals = [ComponentMock("G%d" % i, correlations=[], wishes=create_effects(), executable=False, activation=0.0,
+                               priority=rand.randint(0, 3)) for i in range(4)]
+
+        self.manager._behaviours.extend(behaviours)
+        self.manager._operational_behaviours.extend(b for b in behaviours if b.operational)
+        self.manager._operational_goals.extend(goals)
+        self.manager._totalActivation = sum(b.activation for b in self.manager._operational_behaviours)
+
+        for algo_class, numpy_algo_class in [(BaseActivationAlgorithm, NumpyActivationAlgorithm),
+                                             (UniformActivationAlgorithm, NumpyUniformActivationAlgorithm)]:
+            algo = algo_class(self.manager)
+            numpy_algo = numpy_algo_class(self.manager)
+            for a in [algo, numpy_algo]:
+                a.update_config(activationGoalPriority=True)
+                a.step_preparation()
+            for behaviour in behaviours:
+                for component in ['get_activation_from_goals', 'get_inhibition_from_goals',
+                                  'get_activation_from_predecessors', 'get_activation_from_successors',
+                                  'get_inhibition_from_conflictors']:
+                    self.assertAlmostEqual(getattr(algo, component)(behaviour)[0],
+                                           getattr(numpy_algo, component)(behaviour)[0],
+                                           msg="%s differs for %s with %s" % (component, behaviour,
+                                                                              numpy_algo_class.__name__))
+
+        self.assertTrue(isinstance(ActivationAlgorithmFactory.create_algorithm("numpy", self.manager),
+                                   NumpyActivationAlgorithm), "Not the correct algorithm")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,114 @@
+'''
+@author: hrabia
+'''
+
+import unittest
+
+import rospy
+from std_srvs.srv import Empty, EmptyRequest, EmptyResponse
+
+from behaviour_components.component_registry import ComponentRegistry, ComponentServiceProxy, MessageListRevision
+
+from mock import patch, MagicMock
+
+
+class MessageListRevisionTestSuite(unittest.TestCase):
+    """Testing the revision tracking of message lists in status messages"""
+
+    def test_unchanged_list_is_skipped(self):
+        """
+        Test that a list is only sent if the requester does not know the current revision
+        """
+        revision_tracker = MessageListRevision()
+
+        messages, revision = revision_tracker.get_delta(['a', 'b'], 0)
+        self.assertEqual(['a', 'b'], messages)
+        self.assertNotEqual(0, revision)
+
+        messages, same_revision = revision_tracker.get_delta(['a', 'b'], revision)
+        self.assertEqual([], messages)
+        self.assertEqual(revision, same_revision)
+
+    def test_changed_list_increments_revision(self):
+        """
+        Test that a changed list gets a new revision and is sent again
+        """
+        revision_tracker = MessageListRevision()
+
+        _, revision = revision_tracker.get_delta(['a'], 0)
+        messages, new_revision = revision_tracker.get_delta(['a', 'b'], revision)
+        self.assertEqual(['a', 'b'], messages)
+        self.assertNotEqual(revision, new_revision)
+        self.assertNotEqual(0, new_revision)
+
+    def test_revision_overflow(self):
+        """
+        Test that the revision wraps around without using the reserved 0
+        """
+        revision_tracker = MessageListRevision()
+        revision_tracker._revision = MessageListRevision.MAX_REVISION
+
+        _, revision = revision_tracker.get_delta(['a'], 0)
+        self.assertEqual(1, revision)
+
+
+class ComponentServiceProxyTestSuite(unittest.TestCase):
+    """Testing the in-process calls of component services"""
+
+    STATUS_SERVICE_NAME = '/test/behaviour/GetStatus'
+    SERVICE_NAME = '/test/behaviour/Start'
+
+    def setUp(self):
+        # avoid the creation of the aggregated status service
+        ComponentRegistry._batch_service = MagicMock()
+        self.handler = MagicMock(return_value=EmptyResponse())
+        service = MagicMock(resolved_name=self.SERVICE_NAME, handler=self.handler, request_class=EmptyRequest,
+                            response_class=EmptyResponse)
+        ComponentRegistry.register(self.STATUS_SERVICE_NAME, MagicMock(), services=[service])
+
+    def tearDown(self):
+        ComponentRegistry.unregister(self.STATUS_SERVICE_NAME)
+        ComponentRegistry._batch_service = None
+
+    @patch('rospy.ServiceProxy')
+    def test_local_call(self, service_proxy):
+        """
+        Test that the handler of a component in the same process is called directly
+        """
+        proxy = ComponentServiceProxy(self.SERVICE_NAME, Empty)
+
+        self.assertTrue(proxy.local)
+        self.assertIsInstance(proxy(), EmptyResponse)
+        self.assertEqual(1, self.handler.call_count)
+        self.assertIsInstance(self.handler.call_args[0][0], EmptyRequest)
+        service_proxy.assert_not_called()
+
+    def test_failing_local_call(self):
+        """
+        Test that failing handlers are reported like failing service calls
+        """
+        proxy = ComponentServiceProxy(self.SERVICE_NAME, Empty)
+
+        self.handler.return_value = None
+        self.assertRaises(rospy.ServiceException, proxy)
+
+        self.handler.side_effect = ValueError()
+        self.assertRaises(rospy.ServiceException, proxy)
+
+    @patch('rospy.wait_for_service')
+    @patch('rospy.ServiceProxy')
+    def test_remote_call(self, service_proxy, wait_for_service):
+        """
+        Test that unregistered components are called via ROS services
+        """
+        ComponentRegistry.unregister(self.STATUS_SERVICE_NAME)
+        proxy = ComponentServiceProxy(self.SERVICE_NAME, Empty)
+
+        self.assertFalse(proxy.local)
+        proxy()
+        self.assertEqual(1, service_proxy.return_value.call_count)
+        self.handler.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+'''
+Micro-benchmark of the PDDL parsing, it is not meant to check the absolute performance but to notice regressions
+like quadratic runtime behaviour. The runtime measurements depend on the load of the machine, hence they are only
+executed if the environment variable RHBP_BENCHMARK is set.
+
+@author: hrabia
+'''
+
+import os
+import timeit
+import unittest
+
+import rospy
+
+import behaviour_components.pddl as pddl_module
+from behaviour_components.pddl import PDDL, PDDLState, parsePDDL, tokenizePDDL
+
+from mock import patch
+
+BENCHMARK_ENABLED = bool(os.environ.get('RHBP_BENCHMARK'))
+
+
+def _legacy_tokenize(pddl_string):
+    """
+    Former character based implementation of tokenizePDDL() used as reference
+    """
+    tokens = []
+    snippet = ""
+    obr = 0
+    for c in pddl_string:
+        snippet += c
+        if c == '(':
+            obr += 1
+        elif c == ')':
+            obr -= 1
+            if obr == 0:
+                tokens.append(snippet.strip())
+                snippet = ""
+    return tokens
+
+
+def _create_state(sensor_count):
+    """
+    Generate a state description like it is created by the behaviours
+    :param sensor_count: amount of sensors, every second one is a function
+    :return: state PDDL
+    """
+    facts = []
+    for i in xrange(sensor_count):
+        if i % 2:
+            facts.append("( = (sensor_{0}) {1:f} )".format(i, i * 0.5))
+        elif i % 4:
+            facts.append("(not (sensor_{0}))".format(i))
+        else:
+            facts.append("(sensor_{0})".format(i))
+    return PDDL(statement="\n\t\t".join(facts), time_stamp=rospy.Time(secs=10))
+
+
+class PDDLBenchmarkTestSuite(unittest.TestCase):
+    """Benchmark of the PDDL parsing"""
+
+    SENSOR_COUNTS = [10, 100, 1000]
+    REPETITIONS = 10
+    BEHAVIOUR_COUNT = 10
+
+    def setUp(self):
+        self._rospy_patcher = patch('rospy.Time.now')
+        self._rospy_patcher.start()
+
+    def tearDown(self):
+        self._rospy_patcher.stop()
+
+    def _measure(self, function):
+        """
+        :return: best runtime of a single call in seconds
+        """
+        return min(timeit.repeat(function, repeat=3, number=self.REPETITIONS)) / self.REPETITIONS
+
+    @staticmethod
+    def _create_merge(states):
+        """
+        :return: function merging the states into one uncached state PDDL
+        """
+        def merge():
+            pddl_module._token_cache.clear()
+            merged_state = PDDLState()
+            for state in states:
+                merged_state.add_pddl(state)
+            return merged_state.get_pddl(include_negative_predicates=False)
+        return merge
+
+    def test_tokenize(self):
+        """
+        Compare the tokenizer with the former implementation
+        """
+        for sensor_count in self.SENSOR_COUNTS:
+            statement = _create_state(sensor_count).statement
+            self.assertEqual(_legacy_tokenize(statement), tokenizePDDL(statement))
+
+    def test_state_merge(self):
+        """
+        Merge the states of several behaviours
+        """
+        for sensor_count in self.SENSOR_COUNTS:
+            states = [_create_state(sensor_count) for _ in xrange(self.BEHAVIOUR_COUNT)]
+            self.assertEqual(sensor_count, len(PDDLState.from_pddl(states[0])))
+            merged_state = self._create_merge(states)()
+            # the states are identical, hence the merged state contains every fact once without the negative ones
+            expected_facts = [f for f in states[0].statement.split("\n\t\t") if not f.startswith("(not")]
+            self.assertEqual("\n\t\t".join(expected_facts), merged_state.statement)
+            self.assertEqual(set("sensor_{0}".format(i) for i in xrange(0, sensor_count, 4)), merged_state.predicates)
+            self.assertEqual(set("sensor_{0}".format(i) for i in xrange(1, sensor_count, 2)), merged_state.functions)
+
+    @unittest.skipUnless(BENCHMARK_ENABLED, "set RHBP_BENCHMARK to run the runtime measurements")
+    def test_tokenize_runtime(self):
+        """
+        Measure the tokenizer in comparison to the former implementation
+        """
+        for sensor_count in self.SENSOR_COUNTS:
+            statement = _create_state(sensor_count).statement
+
+            def parse_uncached():
+                pddl_module._token_cache.clear()
+                parsePDDL(statement)
+
+            legacy_time = self._measure(lambda: _legacy_tokenize(statement))
+            parse_time = self._measure(parse_uncached)
+            cached_time = self._measure(lambda: parsePDDL(statement))
+            rospy.loginfo("tokenize %d sensors: legacy %.6fs, uncached %.6fs, cached %.6fs", sensor_count, legacy_time,
+                          parse_time, cached_time)
+
+    @unittest.skipUnless(BENCHMARK_ENABLED, "set RHBP_BENCHMARK to run the runtime measurements")
+    def test_state_merge_runtime(self):
+        """
+        Check that the runtime of merging the states of several behaviours scales linearly with the amount of sensors
+        """
+        times = {}
+        for sensor_count in self.SENSOR_COUNTS:
+            states = [_create_state(sensor_count) for _ in xrange(self.BEHAVIOUR_COUNT)]
+            times[sensor_count] = self._measure(self._create_merge(states))
+            rospy.loginfo("merge %d behaviours with %d sensors: %.6fs", self.BEHAVIOUR_COUNT, sensor_count,
+                          times[sensor_count])
+
+        # linear runtime would result in a factor of 10, quadratic in a factor of 100
+        self.assertLess(times[1000] / times[100], 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+'''
+@author: hrabia
+'''
+
+import unittest
+
+from behaviour_components.managers import Manager
+from behaviour_components.pddl_model import PDDLDomain, apply_effect, evaluate_condition, parse_condition
+
+
+class PDDLModelTestSuite(unittest.TestCase):
+    """Testing the evaluation of domain descriptions"""
+
+    def setUp(self):
+        self.domain_pddl = \
+            "(define (domain UNNAMED) \n\
+            (:requirements :strips :adl :equality :negation :conditional-effects :fluents) \n\
+            (:predicates (door_open) (lights_on))\n\
+            (:functions (costs) (temp_sensor)) \n\
+            (:action open_door \n\
+            :parameters () \n\
+            :precondition (not (door_open)) \n\
+            :effect (and (increase (costs) 1.0) (door_open) (when (lights_on) (increase (temp_sensor) 2))) \n\
+            ) \n\
+            (:action heat \n\
+            :parameters () \n\
+            :precondition (and (door_open) ( <= (temp_sensor) 20.000000 )) \n\
+            :effect (and (increase (costs) 2.0) (increase (temp_sensor) 5) (not (lights_on))) \n\
+            )\n\
+            )"
+        self.state = {'costs': 0.0, 'temp_sensor': 10.0, 'door_open': False, 'lights_on': True}
+
+    def test_domain(self):
+        """
+        Test parsing the actions and simulating them
+        """
+        domain = PDDLDomain.from_pddl(self.domain_pddl)
+        self.assertEqual(set(['open_door', 'heat']), set(domain.actions.keys()))
+
+        self.assertFalse(domain.actions['heat'].is_applicable(self.state))
+        self.assertIsNone(domain.simulate(['heat'], self.state))
+
+        state = domain.simulate(['open_door', 'heat'], self.state)
+        self.assertEqual({'costs': 3.0, 'temp_sensor': 17.0, 'door_open': True, 'lights_on': False}, state)
+        # the initial state is not modified
+        self.assertFalse(self.state['door_open'])
+
+        self.assertIsNone(domain.simulate(['open_door', 'open_door'], self.state))
+        self.assertIsNone(domain.simulate(['unknown'], self.state))
+
+    def test_conditions(self):
+        """
+        Test the evaluation of conditions
+        """
+        self.assertTrue(evaluate_condition(parse_condition("(and (lights_on) (not (door_open)))"), self.state))
+        self.assertTrue(evaluate_condition(parse_condition("(or (door_open) ( > (temp_sensor) 5))"), self.state))
+        self.assertTrue(evaluate_condition(parse_condition("( = (+ (temp_sensor) 2) 12)"), self.state))
+        self.assertFalse(evaluate_condition(parse_condition("(unknown_predicate)"), self.state))
+        self.assertFalse(evaluate_condition(parse_condition("( > (unknown_function) 0)"), self.state))
+
+    def test_effects(self):
+        """
+        Test that delete effects are applied before add effects
+        """
+        state = apply_effect(parse_condition("(and (door_open) (not (door_open)) (assign (temp_sensor) 3))"),
+                             self.state)
+        self.assertTrue(state['door_open'])
+        self.assertEqual(3.0, state['temp_sensor'])
+
+    def test_plan_repair_skip_ahead(self):
+        """
+        Test finding the shortest remainder of a plan that still reaches the goals
+        """
+        domain = PDDLDomain.from_pddl(self.domain_pddl)
+        actions = ['open_door', 'heat']
+        goal_condition = parse_condition("( > (temp_sensor) 14)")
+
+        plan = Manager._skip_ahead(domain, actions, self.state, goal_condition)
+        self.assertEqual({'cost': 3.0, 'actions': {0: 'open_door', 1: 'heat'}}, plan)
+
+        # the door has been opened in the meantime
+        state = dict(self.state, door_open=True)
+        self.assertEqual({'cost': 2.0, 'actions': {0: 'heat'}}, Manager._skip_ahead(domain, actions, state,
+                                                                                   goal_condition))
+
+        # the deviation already reached the goals
+        state = dict(self.state, temp_sensor=15.0)
+        self.assertEqual({'cost': 0.0, 'actions': {}}, Manager._skip_ahead(domain, actions, state, goal_condition))
+
+        # the plan does not reach the goals any longer
+        self.assertIsNone(Manager._skip_ahead(domain, actions, self.state, parse_condition("( > (temp_sensor) 30)")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@ import unittest
 
 import rospy
 
-from behaviour_components.pddl import create_valid_pddl_name, PDDL, mergeStatePDDL
+from behaviour_components.pddl import create_valid_pddl_name, PDDL, mergeStatePDDL, PDDLState, parseStatePDDL
 
 from mock import patch
 from rospy.rostime import Time
@@ -61,6 +61,29 @@ class PDDLTestSuite(unittest.TestCase):
 
         self.assertEquals(function_one, merged.statement)
 
+    def test_state(self):
+        """
+        Test merging, filtering and parsing of the structured state representation
+        """
+
+        state = PDDLState()
+        state.add_pddl(PDDL(statement="(a) (not (b)) ( = (c) 1.0 )", predicates=["a", "b"], functions="c",
+                            time_stamp=rospy.Time(secs=10)))
+        state.add_pddl(PDDL(statement="(not (a)) ( = (c) 2.0 )", predicates="a", functions="c",
+                            time_stamp=rospy.Time(secs=11)))
+        state.add_pddl(PDDL(statement="(b)", predicates="b", time_stamp=rospy.Time(secs=9)))
+        state.init_missing_functions(["c", "d"])
+
+        self.assertEqual({"a": False, "b": False, "c": 2.0, "d": 0.0}, state.values)
+
+        self.assertEqual("(not (a))\n\t\t(not (b))\n\t\t( = (c) 2.0 )\n\t\t( = (d) 0)", state.get_pddl().statement)
+
+        filtered = state.get_pddl(include_negative_predicates=False)
+        self.assertEqual("( = (c) 2.0 )\n\t\t( = (d) 0)", filtered.statement)
+        self.assertEqual(set(["c", "d"]), filtered.functions)
+
+        self.assertEqual({"a": False, "b": False, "c": 2.0, "d": 0.0}, parseStatePDDL(state.get_pddl()))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -2,9 +2,44 @@
 @author: hrabia
 '''
 
+import threading
 import unittest
 
-from behaviour_components.planner import MetricFF, MetricFFSearchMode
+from behaviour_components.planner import Planner, MetricFF, MetricFFSearchMode, CachingPlanner, PlanningCancelledError, \
+    PlannerThread, InstrumentedPlanner, RollingHistogram, PlanningSnapshot
+from behaviour_components.python_planner import PythonPlanner
+from behaviour_components.pddl_model import PDDLDomain, PDDLProblem, evaluate_condition
+
+
+class CountingPlanner(Planner):
+    """
+    Planner stub that counts the planning requests
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def plan(self, domain_pddl, problem_pddl):
+        self.calls += 1
+        if "impossible" in problem_pddl:
+            return {'cost': -1.0, 'actions': {}}
+        return {'cost': 1.0, 'actions': {0: 'action_' + str(self.calls)}}
+
+
+class BoundRecordingPlanner(Planner):
+    """
+    Planner stub that records the cost bounds and does not find any plan
+    """
+
+    def __init__(self):
+        self.cost_bounds = []
+
+    def plan(self, domain_pddl, problem_pddl):
+        return {'cost': -1.0, 'actions': {}}
+
+    def _plan_problem(self, domain, state_statement, goal_statement, cost_bound):
+        self.cost_bounds.append(cost_bound)
+        return super(BoundRecordingPlanner, self)._plan_problem(domain, state_statement, goal_statement, cost_bound)
 
 
 class PlannerTestSuite(unittest.TestCase):
@@ -68,6 +103,266 @@ class PlannerTestSuite(unittest.TestCase):
         planner = MetricFF(search_mode=MetricFFSearchMode.EHC_H_BFS)
         self._check_plan(planner)
 
+    def test_worker_pool(self):
+        """
+        Test planning with reused worker processes including results that terminate the planner
+        """
+        planner = MetricFF(search_mode=MetricFFSearchMode.EHC_H_A_STAR_EPSILON, worker_pool_size=1, timeout=10.0)
+        try:
+            for _ in xrange(3):
+                self._check_plan(planner)
+
+            # goal already reached
+            plan = planner.plan(self.domain_pddl, self.problem_pddl.replace("( = (temp_sensor) 10)",
+                                                                            "( = (temp_sensor) 20)"))
+            self.assertEquals(0.0, plan['cost'])
+            self.assertFalse(plan['actions'])
+
+            # the terminated worker has been replaced
+            self._check_plan(planner)
+        finally:
+            planner.close()
+
+    def test_plan_cache(self):
+        """
+        Test the LRU plan cache
+        """
+        counting_planner = CountingPlanner()
+        planner = CachingPlanner(planner=counting_planner, size=2)
+
+        plan = planner.plan(self.domain_pddl, self.problem_pddl)
+        plan['actions'].clear()  # cached results are not affected by modifications
+
+        # same problem with different whitespace
+        cached_plan = planner.plan(self.domain_pddl, " ".join(self.problem_pddl.split()))
+        self.assertEquals({0: 'action_1'}, cached_plan['actions'])
+        self.assertEquals(1, counting_planner.calls)
+
+        # impossible problems are cached as well
+        impossible_problem = self.problem_pddl.replace("problem-UNNAMED", "impossible")
+        self.assertEquals(-1.0, planner.plan(self.domain_pddl, impossible_problem)['cost'])
+        self.assertEquals(-1.0, planner.plan(self.domain_pddl, impossible_problem)['cost'])
+        self.assertEquals(2, counting_planner.calls)
+
+        # least recently used plan is dropped
+        planner.plan(self.domain_pddl, self.problem_pddl)
+        planner.plan(self.domain_pddl, self.problem_pddl.replace("15", "16"))
+        planner.plan(self.domain_pddl, impossible_problem)
+        self.assertEquals(4, counting_planner.calls)
+        planner.plan(self.domain_pddl, self.problem_pddl.replace("15", "16"))
+        self.assertEquals(4, counting_planner.calls)
+
+        self.assertEquals({'hits': 4, 'misses': 4, 'size': 2}, planner.get_statistics())
+
+        # the result of a hinted request can be the remainder of the hint, it is not used for other hints
+        bound_recording_planner = BoundRecordingPlanner()
+        planner = CachingPlanner(planner=bound_recording_planner)
+        domain = planner.load_domain(self.domain_pddl)
+        state_statement = "( = (temp_sensor) 12) ( = (costs) 0)"
+        goal_statement = "( > (temp_sensor) 15)"
+        hint = ['increase_temp'] * 4
+        self.assertEquals(4.0, planner.plan_problem(domain, state_statement, goal_statement, hint=hint)['cost'])
+        self.assertEquals(-1.0, planner.plan_problem(domain, state_statement, goal_statement)['cost'])
+        self.assertEquals(4.0, planner.plan_problem(domain, state_statement, goal_statement, hint=hint)['cost'])
+        self.assertEquals([4.0, None], bound_recording_planner.cost_bounds)
+
+        # expired plans are planned again
+        planner = CachingPlanner(planner=counting_planner, size=2, ttl=0.0)
+        planner.plan(self.domain_pddl, self.problem_pddl)
+        planner.plan(self.domain_pddl, self.problem_pddl)
+        self.assertEquals(6, counting_planner.calls)
+
+    def test_planning_jobs(self):
+        """
+        Test asynchronous planning including cancellation and the plan cache
+        """
+        counting_planner = CountingPlanner()
+        planner = CachingPlanner(planner=counting_planner)
+
+        job = planner.submit(self.domain_pddl, self.problem_pddl)
+        self.assertEquals({0: 'action_1'}, job.result(timeout=5.0)['actions'])
+        self.assertTrue(job.done())
+
+        finished_jobs = []
+        cached_job = planner.submit(self.domain_pddl, self.problem_pddl)
+        cached_job.add_done_callback(finished_jobs.append)
+        self.assertEquals([cached_job], finished_jobs)
+        self.assertEquals(1, counting_planner.calls)
+
+        metric_ff = MetricFF(worker_pool_size=1)
+        try:
+            job = metric_ff.submit(self.domain_pddl, self.problem_pddl)
+            job.cancel()
+            self.assertTrue(job.cancelled)
+            self.assertRaises(PlanningCancelledError, job.result)
+            self.assertTrue(job.wait(timeout=0.0), "Waiting must not raise the exception of the job")
+        finally:
+            metric_ff.close()
+
+    def test_planner_thread(self):
+        """
+        Test that superseded requests of the planner thread are dropped
+        """
+        planner_thread = PlannerThread()
+        try:
+            started = threading.Event()
+            release = threading.Event()
+
+            def block():
+                started.set()
+                return release.wait(5.0)
+
+            running_job = planner_thread.submit(block)
+            started.wait(5.0)
+            superseded_job = planner_thread.submit(lambda: 'superseded')
+            latest_job = planner_thread.submit(lambda: 'latest')
+            self.assertEquals(3, planner_thread.queue_depth)
+
+            release.set()
+            self.assertTrue(running_job.result(timeout=5.0))
+            self.assertEquals('latest', latest_job.result(timeout=5.0))
+            self.assertTrue(superseded_job.cancelled)
+            self.assertGreater(planner_thread.latency, 0.0)
+        finally:
+            planner_thread.shutdown()
+
+    def test_python_planner(self):
+        """
+        Test the in-process planner and cross-check its plans with Metric-FF
+        """
+        planner = PythonPlanner()
+        self._check_plan(planner)
+
+        reference_planner = MetricFF(search_mode=MetricFFSearchMode.EHC_H_A_STAR_EPSILON)
+        domain = PDDLDomain.from_pddl(self.domain_pddl)
+        for initial_temp, goal in [(10, "( > (temp_sensor) 15)"), (10, "( < (temp_sensor) 7)"),
+                                   (10, "( = (temp_sensor) 12)"), (20, "( > (temp_sensor) 15)")]:
+            problem_pddl = self.problem_pddl.replace("( = (temp_sensor) 10)",
+                                                     "( = (temp_sensor) {0})".format(initial_temp)) \
+                .replace("( > (temp_sensor) 15)", goal)
+            plan = planner.plan(self.domain_pddl, problem_pddl)
+            reference_plan = reference_planner.plan(self.domain_pddl, problem_pddl)
+            self.assertEquals(reference_plan['cost'], plan['cost'], goal)
+
+            # the plan reaches the goal
+            problem = PDDLProblem.from_pddl(problem_pddl)
+            actions = [plan['actions'][index] for index in sorted(plan['actions'])]
+            state = domain.simulate(actions, problem.state)
+            self.assertTrue(evaluate_condition(problem.goal, state), goal)
+
+        # impossible goal
+        plan = planner.plan(self.domain_pddl, self.problem_pddl.replace("( > (temp_sensor) 15)",
+                                                                        "( > (unknown_sensor) 15)"))
+        self.assertEquals(-1.0, plan['cost'])
+
+    def test_planning_domain(self):
+        """
+        Test planning with a loaded domain and only initial states and goals
+        """
+        state_statement = "( = (temp_sensor) 10) ( = (costs) 0)"
+        goal_statement = "( > (temp_sensor) 15)"
+        for planner in [PythonPlanner(), CachingPlanner(CountingPlanner())]:
+            domain = planner.load_domain(self.domain_pddl)
+            self.assertEquals("UNNAMED", domain.name)
+            self.assertEquals(planner.plan(self.domain_pddl, domain.create_problem_pddl(state_statement,
+                                                                                         goal_statement)),
+                              planner.plan_problem(domain, state_statement, goal_statement))
+            self.assertEquals(planner.plan_problem(domain, state_statement, goal_statement),
+                              planner.submit_problem(domain, state_statement, goal_statement).result())
+
+        # the cache does not distinguish between complete problems and problems of loaded domains
+        self.assertEquals(1, planner.planner.calls)
+        self.assertEquals({'hits': 3, 'misses': 1, 'size': 1}, planner.get_statistics())
+
+        planner = PythonPlanner()
+        domain = planner.load_domain(self.domain_pddl)
+        plan = planner.plan_problem(domain, state_statement, "( < (temp_sensor) 8)")
+        self.assertEquals(3, plan['cost'])
+
+    def test_planning_snapshot(self):
+        """
+        Test the planning queries of a snapshot, including a snapshot of a domain the planner could not load
+        """
+        counting_planner = CountingPlanner()
+        snapshot = PlanningSnapshot(planner=counting_planner, domain=counting_planner.load_domain(self.domain_pddl),
+                                    state_statement="( = (temp_sensor) 10) ( = (costs) 0)",
+                                    goal_statements=["( > (temp_sensor) 15)"])
+        self.assertEquals(1.0, snapshot.plan_with_additional_goal("( < (temp_sensor) 20)")['cost'])
+        self.assertEquals(1.0, snapshot.submit_single_goal("( < (temp_sensor) 20)").result(timeout=5.0)['cost'])
+        self.assertEquals(2, counting_planner.calls)
+
+        snapshot = PlanningSnapshot(planner=counting_planner, domain=None, state_statement=snapshot.state_statement,
+                                    goal_statements=snapshot.goal_statements)
+        self.assertEquals(-1.0, snapshot.plan_this_single_goal("( < (temp_sensor) 20)")['cost'])
+        self.assertEquals(-1.0, snapshot.submit_with_additional_goal("( < (temp_sensor) 20)").result()['cost'])
+        self.assertEquals(2, counting_planner.calls)
+
+    def test_plan_hint(self):
+        """
+        Test that a still valid remainder of a hint plan bounds the search
+        """
+        goal_statement = "( > (temp_sensor) 15)"
+        hint = ['decrease_temp'] + ['increase_temp'] * 6
+
+        planner = BoundRecordingPlanner()
+        domain = planner.load_domain(self.domain_pddl)
+        # the shortest remainder of the hint that reaches the goal is used
+        plan = planner.plan_problem(domain, "( = (temp_sensor) 12) ( = (costs) 0)", goal_statement, hint=hint)
+        self.assertEquals({'cost': 4.0, 'actions': dict(enumerate(['increase_temp'] * 4))}, plan)
+        self.assertEquals([4.0], planner.cost_bounds)
+
+        # goal already reached, no planning at all
+        plan = planner.plan_problem(domain, "( = (temp_sensor) 20) ( = (costs) 0)", goal_statement, hint=hint)
+        self.assertEquals({'cost': 0.0, 'actions': {}}, plan)
+        self.assertEquals([4.0], planner.cost_bounds)
+
+        # invalid hint
+        plan = planner.plan_problem(domain, "( = (temp_sensor) 5) ( = (costs) 0)", goal_statement, hint=hint)
+        self.assertEquals(-1.0, plan['cost'])
+        self.assertEquals([4.0, None], planner.cost_bounds)
+
+        # the planner finds a cheaper plan than the hint
+        planner = PythonPlanner()
+        domain = planner.load_domain(self.domain_pddl)
+        plan = planner.plan_problem(domain, "( = (temp_sensor) 10) ( = (costs) 0)", "( < (temp_sensor) 9)",
+                                    hint=['decrease_temp', 'increase_temp', 'decrease_temp', 'decrease_temp'])
+        self.assertEquals(2.0, plan['cost'])
+        self.assertEquals({0: 'decrease_temp', 1: 'decrease_temp'}, plan['actions'])
+
+    def test_planner_telemetry(self):
+        """
+        Test the measurement of planner calls
+        """
+        histogram = RollingHistogram(bounds=[1, 10], window=3)
+        for value in [20, 0.5, 1, 5]:
+            histogram.add(value)
+        self.assertEquals([2, 1, 0], histogram.get_counts())  # 20 has been dropped
+        summary = histogram.get_summary()
+        self.assertEquals(3, summary['count'])
+        self.assertEquals(5, summary['max'])
+
+        planner = InstrumentedPlanner(PythonPlanner(), window=10)
+        self._check_plan(planner)
+        domain = planner.load_domain(self.domain_pddl)
+        plan = planner.plan_problem(domain, "( = (temp_sensor) 10) ( = (costs) 0)", "( < (temp_sensor) 9)")
+        self.assertEquals(2.0, plan['cost'])
+
+        statistics = planner.get_statistics()
+        self.assertEquals(2, statistics['calls'])
+        self.assertEquals(0, statistics['failures'])
+        self.assertEquals(('python', 1.0, 100000), statistics['configuration'])
+        self.assertEquals(plan['evaluated_states'], statistics['last_call']['evaluated_states'])
+        self.assertTrue(statistics['last_call']['feasible'])
+        self.assertEquals(2, statistics['duration']['count'])
+        self.assertEquals(2, sum(statistics['evaluated_states']['counts']))
+
+        planner = InstrumentedPlanner(CountingPlanner())
+        planner.plan(self.domain_pddl, "impossible")
+        statistics = planner.get_statistics()
+        self.assertFalse(statistics['last_call']['feasible'])
+        self.assertIsNone(statistics['last_call']['evaluated_states'])
+        self.assertEquals(0, statistics['evaluated_states']['count'])
+
     def _check_plan_empty(self, planner):
         plan = planner.plan(self.domain_pddl, self.problem_pddl)
 
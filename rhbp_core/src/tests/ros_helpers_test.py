@@ -0,0 +1,67 @@
+'''
+@author: hrabia
+'''
+
+import unittest
+
+import rospy
+
+from utils.ros_helpers import PersistentServiceProxy
+
+from mock import patch, MagicMock
+
+
+class PersistentServiceProxyTestSuite(unittest.TestCase):
+    """Testing the persistent service proxy"""
+
+    def setUp(self):
+        self._wait_patcher = patch('rospy.wait_for_service')
+        self.wait_for_service = self._wait_patcher.start()
+        self._proxy_patcher = patch('rospy.ServiceProxy')
+        self.service_proxy = self._proxy_patcher.start()
+
+    def tearDown(self):
+        self._wait_patcher.stop()
+        self._proxy_patcher.stop()
+
+    def test_connection_reuse(self):
+        """
+        Test that the connection is only established once
+        """
+        proxy = PersistentServiceProxy('/test/GetStatus', MagicMock, timeout=1)
+
+        proxy(current_step=1)
+        proxy(current_step=2)
+
+        self.assertEqual(self.wait_for_service.call_count, 1)
+        self.assertEqual(self.service_proxy.call_count, 1)
+        self.assertEqual(self.service_proxy.return_value.call_count, 2)
+        self.assertTrue(proxy.connected)
+
+    def test_reconnect(self):
+        """
+        Test reconnection and repetition of a failing call over an established connection
+        """
+        proxy = PersistentServiceProxy('/test/GetStatus', MagicMock, timeout=1)
+
+        proxy(current_step=1)
+
+        broken_connection = MagicMock(side_effect=rospy.ServiceException("connection lost"))
+        new_connection = MagicMock(return_value="response")
+        self.service_proxy.side_effect = [new_connection]
+        proxy._proxy = broken_connection
+
+        self.assertEqual(proxy(current_step=2), "response")
+        self.assertEqual(self.wait_for_service.call_count, 2)
+        broken_connection.close.assert_called_once_with()
+
+    def test_failing_new_connection(self):
+        """
+        Test that a failing call over a new connection is not repeated and raised to the caller
+        """
+        self.service_proxy.return_value.side_effect = rospy.ServiceException("service error")
+        proxy = PersistentServiceProxy('/test/GetStatus', MagicMock, timeout=1)
+
+        self.assertRaises(rospy.ServiceException, proxy, current_step=1)
+        self.assertEqual(self.service_proxy.return_value.call_count, 1)
+        self.assertFalse(proxy.connected)
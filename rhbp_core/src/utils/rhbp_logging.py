@@ -20,4 +20,7 @@ class LogManager(object):
 
         self.logerr = logging.getLogger(logger_name).error
 
-        self.logfatal = logging.getLogger(logger_name).critical
\ No newline at end of file
+        self.logfatal = logging.getLogger(logger_name).critical
+
+        # allows to skip the preparation of expensive log messages, e.g. is_enabled_for(logging.DEBUG)
+        self.is_enabled_for = logging.getLogger(logger_name).isEnabledFor
@@ -50,3 +50,65 @@ def get_topic_type(topic_name):
         return None
     else:
         return get_message_class(topic_info[0], True)
+
+
+class PersistentServiceProxy(object):
+    """
+    Wrapper of a persistent rospy.ServiceProxy that keeps its connection for the lifetime of the object.
+    rospy.wait_for_service() is only called while no connection is established. If a call over an already used
+    connection fails with a ServiceException the connection is re-established and the call is repeated once.
+    The exceptions of rospy.wait_for_service() and rospy.ServiceProxy are passed to the caller.
+    """
+
+    def __init__(self, name, service_class, timeout=None):
+        """
+        :param name: name of the service
+        :param service_class: service type class
+        :param timeout: timeout in seconds for waiting for the service, None for waiting forever
+        """
+        self._name = name
+        self._service_class = service_class
+        self._timeout = timeout
+        self._proxy = None
+        self._used = False  # True if the current connection has been used successfully before
+
+    def __call__(self, *args, **kwargs):
+        if self._proxy and self._used:
+            try:
+                return self._proxy(*args, **kwargs)
+            except rospy.ServiceException:
+                # the connection is probably broken, e.g. because the service provider was restarted
+                rospy.logdebug("Reconnecting to service %s", self._name)
+                self.close()
+        if not self._proxy:
+            self._connect()
+        try:
+            response = self._proxy(*args, **kwargs)
+        except rospy.ServiceException:
+            self.close()
+            raise
+        self._used = True
+        return response
+
+    def _connect(self):
+        rospy.logdebug("Waiting for service %s", self._name)
+        rospy.wait_for_service(self._name, timeout=self._timeout)
+        self._proxy = rospy.ServiceProxy(self._name, self._service_class, persistent=True)
+        self._used = False
+
+    def close(self):
+        """
+        Close the connection, it is re-established with the next call
+        """
+        if self._proxy:
+            self._proxy.close()
+            self._proxy = None
+        self._used = False
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def connected(self):
+        return self._proxy is not None
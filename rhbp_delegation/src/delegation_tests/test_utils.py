@@ -55,11 +55,59 @@ class MockedManager(object):
         plan["cost"] = self.plan["cost"]
         return plan
 
+    def create_planning_snapshot(self):
+        return MockedPlanningSnapshot(manager=self)
+
     @property
     def prefix(self):
         return self._prefix
 
 
+class MockedPlanningJob(object):
+    """
+    Mocked PlanningJob, that already contains its result
+    """
+
+    def __init__(self, function, *args, **kwargs):
+        self.cancelled = False
+        try:
+            self._result = function(*args, **kwargs)
+            self._exception = None
+        except Exception as e:
+            self._result = None
+            self._exception = e
+
+    def result(self, timeout=None):
+        if self._exception:
+            raise self._exception
+        return self._result
+
+    def cancel(self):
+        self.cancelled = True
+        return True
+
+
+class MockedPlanningSnapshot(object):
+    """
+    Mocked PlanningSnapshot, that uses the plans of the MockedManager
+    """
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def plan_with_additional_goal(self, goal_statement):
+        return self._manager.plan_with_additional_goal(goal_statement=goal_statement)
+
+    def submit_with_additional_goal(self, goal_statement):
+        return MockedPlanningJob(self.plan_with_additional_goal, goal_statement)
+
+    def plan_this_single_goal(self, goal_statement):
+        return self._manager.plan_this_single_goal(goal_statement=goal_statement)
+
+    def submit_single_goal(self, goal_statement):
+        return MockedPlanningJob(self.plan_this_single_goal, goal_statement)
+
+
 class MockedBehaviour(object):
     """
     Basic mocked Behaviour
@@ -52,11 +52,16 @@ class PDDLCostEvaluator(CostEvaluatorBase):
         :rtype: CostParameters
         """
 
-        # Make plans
-        # TODO here it would also save performance if PDDL domain and state are only calculated once! And not again
-        # in both following methods
-        full_plan = self._manager.plan_with_additional_goal(goal_statement=goal_representation)
-        simple_plan = self._manager.plan_this_single_goal(goal_statement=goal_representation)
+        # Make plans, PDDL domain and state are only calculated once for both plans
+        snapshot = self._manager.create_planning_snapshot()
+        # the full plan is computed in parallel to the simple plan
+        full_plan_job = snapshot.submit_with_additional_goal(goal_statement=goal_representation)
+        try:
+            simple_plan = snapshot.plan_this_single_goal(goal_statement=goal_representation)
+        except Exception:
+            full_plan_job.cancel()
+            raise
+        full_plan = full_plan_job.result()
         # Check if planned successful
         if not (full_plan and "cost" in full_plan and full_plan["cost"] != -1.0):
             raise DelegationPlanningWarning("Full plan unsuccessful!")